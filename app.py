@@ -1,5 +1,6 @@
 import os
 import logging
+import multiprocessing
 from flask import Flask
 from dotenv import load_dotenv
 
@@ -7,32 +8,67 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Import utility modules
-from utils.config import UPLOAD_FOLDER, GENERATED_FOLDER, ensure_directories
+from utils.config import UPLOAD_FOLDER, GENERATED_FOLDER, MAX_CONTENT_LENGTH, ensure_directories
+from utils.file_handler import StreamingUploadRequest
 from routes import register_routes
 from utils.tunnel_manager import get_tunnel_manager
+from utils.gpu_detector import get_encoder_registry
+from utils.media_manager import get_stats_reconciler
+from utils.media_retention import get_retention_worker
 
 # ==============================================================================
 # APPLICATION SETUP
 # ==============================================================================
-app = Flask(__name__)
 
-# Ensure directories exist
-ensure_directories()
+def create_app(start_workers=True):
+    """Create the Flask app and start the background workers.
 
-# Configure Flask app
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['GENERATED_FOLDER'] = GENERATED_FOLDER
+    Not run at import time: parallel render workers started with spawn
+    (Windows) re-import the main module and must not bootstrap the app.
+    Pass start_workers=False in a process that will not serve requests.
+    """
+    app = Flask(__name__)
+    # Stream uploaded files straight to disk instead of buffering them first
+    app.request_class = StreamingUploadRequest
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
+    # Ensure directories exist
+    ensure_directories()
 
-# Register all routes
-register_routes(app)
+    # Configure Flask app
+    app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+    app.config['GENERATED_FOLDER'] = GENERATED_FOLDER
+    app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
+
+    # Setup logging
+    logging.basicConfig(level=logging.INFO)
+
+    # Register all routes
+    register_routes(app)
+
+    if not start_workers:
+        return app
+
+    # Load cached encoder capabilities (or probe them in the background)
+    get_encoder_registry().warm_up()
+
+    # Keep media stats in sync with files changed outside the app
+    get_stats_reconciler().start()
+
+    # Apply the media retention policies on a schedule (if any is enabled)
+    get_retention_worker().start()
+
+    return app
 
 # ==============================================================================
 # APPLICATION STARTUP
 # ==============================================================================
 if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    # The debug reloader runs this file twice: a watcher process and the child
+    # that serves requests. Only the child starts the workers, so they do not
+    # run twice against the same database and cache folders.
+    app = create_app(start_workers=os.environ.get('WERKZEUG_RUN_MAIN') == 'true')
+
     # Check if tunnel should be enabled
     enable_tunnel = os.getenv('ENABLE_TUNNEL', 'false').lower() == 'true'
     
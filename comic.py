@@ -1,6 +1,7 @@
 import os
 import logging
 import threading
+import multiprocessing
 import webbrowser
 import tkinter as tk
 from tkinter import font
@@ -13,13 +14,19 @@ load_dotenv()
 # Asumsikan file-file ini ada di direktori yang sama atau path-nya benar
 # Jika file ini tidak ada, Anda bisa membuat file dummy atau hapus bagian import ini
 try:
-    from utils.config import UPLOAD_FOLDER, GENERATED_FOLDER, ensure_directories
+    from utils.config import UPLOAD_FOLDER, GENERATED_FOLDER, MAX_CONTENT_LENGTH, ensure_directories
+    from utils.file_handler import StreamingUploadRequest
     from routes import register_routes
+    from utils.gpu_detector import get_encoder_registry
+    from utils.media_manager import get_stats_reconciler
+    from utils.media_retention import get_retention_worker
 except ImportError:
     # Fallback jika modul tidak ditemukan (untuk testing)
     print("Peringatan: Modul 'utils' atau 'routes' tidak ditemukan. Menggunakan konfigurasi default.")
     UPLOAD_FOLDER = 'uploads'
     GENERATED_FOLDER = 'generated'
+    MAX_CONTENT_LENGTH = None
+    StreamingUploadRequest = Flask.request_class
     def ensure_directories():
         os.makedirs(UPLOAD_FOLDER, exist_ok=True)
         os.makedirs(GENERATED_FOLDER, exist_ok=True)
@@ -27,30 +34,58 @@ except ImportError:
         @app.route('/')
         def index():
             return "<h1>Flask App Running!</h1><p>Created by tialota.</p>"
+    get_encoder_registry = None
+    get_stats_reconciler = None
+    get_retention_worker = None
 
 # ==============================================================================
 # APPLICATION SETUP
 # ==============================================================================
-app = Flask(__name__)
 
-# Pastikan direktori yang diperlukan ada
-ensure_directories()
+def create_app():
+    """Membuat aplikasi Flask dan menjalankan worker latar belakang.
 
-# Konfigurasi Flask app
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['GENERATED_FOLDER'] = GENERATED_FOLDER
+    Hanya dipanggil dari blok __main__: worker render paralel (spawn di Windows
+    dan executable PyInstaller) mengimpor ulang modul ini dan tidak boleh ikut
+    membuat app atau memulai worker.
+    """
+    app = Flask(__name__)
+    # Simpan file unggahan langsung ke disk secara streaming
+    app.request_class = StreamingUploadRequest
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
+    # Pastikan direktori yang diperlukan ada
+    ensure_directories()
 
-# Daftarkan semua routes
-register_routes(app)
+    # Konfigurasi Flask app
+    app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+    app.config['GENERATED_FOLDER'] = GENERATED_FOLDER
+    app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
+
+    # Setup logging
+    logging.basicConfig(level=logging.INFO)
+
+    # Daftarkan semua routes
+    register_routes(app)
+
+    # Muat kemampuan encoder dari cache (atau deteksi di background)
+    if get_encoder_registry:
+        get_encoder_registry().warm_up()
+
+    # Sinkronkan statistik media dengan file yang berubah di luar aplikasi
+    if get_stats_reconciler:
+        get_stats_reconciler().start()
+
+    # Jalankan kebijakan retensi media secara terjadwal (bila ada yang diaktifkan)
+    if get_retention_worker:
+        get_retention_worker().start()
+
+    return app
 
 # ==============================================================================
 # FLASK & TKINTER FUNCTIONS
 # ==============================================================================
 
-def start_flask_app():
+def start_flask_app(app):
     """Fungsi untuk menjalankan server Flask."""
     # Menjalankan Flask tanpa debug mode di thread untuk stabilitas
     # use_reloader=False penting agar tidak me-restart di dalam thread
@@ -117,8 +152,14 @@ def create_tkinter_ui():
 # APPLICATION STARTUP
 # ==============================================================================
 if __name__ == '__main__':
+    # Diperlukan agar worker render paralel bisa berjalan di executable PyInstaller;
+    # harus dipanggil sebelum app dibuat
+    multiprocessing.freeze_support()
+
+    app = create_app()
+
     # Jalankan server Flask di thread terpisah agar tidak memblokir UI
-    flask_thread = threading.Thread(target=start_flask_app)
+    flask_thread = threading.Thread(target=start_flask_app, args=(app,))
     flask_thread.daemon = True  # Set daemon agar thread berhenti saat program utama ditutup
     flask_thread.start()
 
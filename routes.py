@@ -1,20 +1,30 @@
 import os
+import json
 import logging
-from flask import render_template, request, jsonify, redirect, url_for, send_file, abort
+import hashlib
+from datetime import datetime, timedelta
+from flask import render_template, request, jsonify, url_for, send_file, abort, current_app, Response
+from werkzeug.exceptions import RequestEntityTooLarge
 
 # Import utility modules
-from utils.config import TTS_VOICES, VISION_MODELS, LANGUAGES, GPU_ACCELERATION_OPTIONS
+from utils.config import (
+    TTS_VOICES, VISION_MODELS, LANGUAGES, GPU_ACCELERATION_OPTIONS, RENDER_ENGINE_OPTIONS,
+    MEDIA_LIST_PAGE_SIZE, MEDIA_LIST_MAX_PAGE_SIZE, JOB_EVENTS_HEARTBEAT_SECONDS
+)
 from utils.prompt_manager import (
-    load_prompts, add_prompt, delete_prompt, update_prompt
+    load_prompts, add_prompt, delete_prompt, update_prompt, get_prompt_store
 )
-from utils.ai_services import generate_narration, generate_tts_audio
-from utils.video_processor import create_video_from_scenes, cleanup_temporary_files, get_effect_weights
-from utils.file_handler import save_uploaded_file, generate_unique_filename
+from utils.video_processor import get_effect_weights
+from utils.file_handler import ingest_uploaded_file
 from utils.media_manager import (
-    register_generated_media, get_all_generated_media, delete_generated_media,
-    cleanup_old_media, get_media_stats, cleanup_orphaned_files
+    list_generated_media, get_media_list_version, delete_generated_media,
+    cleanup_old_media, get_media_stats, cleanup_orphaned_files, touch_media
 )
-from utils.gpu_detector import detect_available_encoders
+from utils.media_retention import get_retention_worker
+from utils.gpu_detector import get_encoder_registry
+from utils.http_client import get_http_metrics
+from utils.job_manager import get_job_manager
+from utils.video_pipeline import run_video_pipeline
 
 # ==============================================================================
 # MAIN ROUTES
@@ -23,18 +33,31 @@ from utils.gpu_detector import detect_available_encoders
 def register_routes(app):
     """Register all routes with the Flask app."""
     
+    @app.errorhandler(RequestEntityTooLarge)
+    def handle_upload_too_large(e):
+        return jsonify({"success": False, "error": upload_too_large_message(e)}), 413
+    
     @app.route('/', methods=['GET', 'POST'])
     def index():
         if request.method == 'POST':
             return handle_video_creation(app)
         
+        # Show a finished video when redirected from a completed job
+        video_file = None
+        requested_video = request.args.get('video', '')
+        if requested_video.startswith('generated/') and '..' not in requested_video:
+            if os.path.exists(os.path.join('static', requested_video)):
+                video_file = requested_video
+        
         # For GET request, show main page with all options
         return render_template('index.html', 
+                               video_file=video_file,
                                tts_voices=TTS_VOICES, 
                                vision_models=VISION_MODELS, 
                                prompts=load_prompts(),
                                languages=LANGUAGES,
-                               gpu_options=GPU_ACCELERATION_OPTIONS)
+                               gpu_options=GPU_ACCELERATION_OPTIONS,
+                               render_engines=RENDER_ENGINE_OPTIONS)
 
     # ==============================================================================
     # PROMPT MANAGEMENT API ROUTES
@@ -42,8 +65,16 @@ def register_routes(app):
     
     @app.route('/prompts', methods=['GET'])
     def get_prompts():
-        """Get all prompts."""
-        return jsonify(load_prompts())
+        """Get all prompts; unchanged prompts answer If-None-Match with 304."""
+        prompts, version, etag = get_prompt_store().get()
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = jsonify(prompts)
+        response.set_etag(etag)
+        response.headers['X-Prompts-Version'] = str(version)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
 
     @app.route('/prompts/add', methods=['POST'])
     def add_prompt_route():
@@ -54,7 +85,7 @@ def register_routes(app):
         
         success, result = add_prompt(name, text)
         if success:
-            return jsonify({"success": True, "prompts": result})
+            return jsonify({"success": True, "prompts": result, "version": get_prompt_store().version})
         else:
             return jsonify({"success": False, "error": result}), 400
 
@@ -66,7 +97,7 @@ def register_routes(app):
         
         success, result = delete_prompt(name)
         if success:
-            return jsonify({"success": True, "prompts": result})
+            return jsonify({"success": True, "prompts": result, "version": get_prompt_store().version})
         else:
             return jsonify({"success": False, "error": result}), 404
 
@@ -79,7 +110,7 @@ def register_routes(app):
         
         success, result = update_prompt(name, new_text)
         if success:
-            return jsonify({"success": True, "prompts": result})
+            return jsonify({"success": True, "prompts": result, "version": get_prompt_store().version})
         else:
             return jsonify({"success": False, "error": result}), 404
 
@@ -89,10 +120,44 @@ def register_routes(app):
     
     @app.route('/media/list', methods=['GET'])
     def get_media_list():
-        """Get list of all generated media."""
+        """Get one page of generated media.
+
+        Query parameters: limit, cursor (from next_cursor), from/to (ISO dates
+        or timestamps, to is inclusive for plain dates) and exists (true/false).
+        Unchanged listings answer If-None-Match with 304.
+        """
+        try:
+            limit = min(max(request.args.get('limit', MEDIA_LIST_PAGE_SIZE, type=int), 1), MEDIA_LIST_MAX_PAGE_SIZE)
+            created_from = parse_date_filter(request.args.get('from'))
+            created_to = parse_date_filter(request.args.get('to'), end_of_day=True)
+        except ValueError as e:
+            return jsonify({"success": False, "error": f"Invalid filter: {e}"}), 400
+
+        exists_arg = request.args.get('exists', '').lower()
+        file_exists = {'true': True, 'false': False}.get(exists_arg)
+
         try:
-            media_list = get_all_generated_media()
-            return jsonify({"success": True, "media_list": media_list})
+            # The ETag covers both the registry state and the exact query
+            version = get_media_list_version()
+            etag = hashlib.sha256(f"{version}|{request.query_string.decode()}".encode()).hexdigest()[:32]
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+            else:
+                media_list, next_cursor = list_generated_media(
+                    limit, request.args.get('cursor'), created_from, created_to, file_exists
+                )
+                response = jsonify({
+                    "success": True,
+                    "media_list": media_list,
+                    "next_cursor": next_cursor,
+                    "has_more": next_cursor is not None
+                })
+            response.set_etag(etag)
+            # Let browsers keep the listing but always revalidate it
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
         except Exception as e:
             logging.error(f"Error getting media list: {e}")
             return jsonify({"success": False, "error": str(e)}), 500
@@ -136,6 +201,18 @@ def register_routes(app):
             logging.error(f"Error during cleanup: {e}")
             return jsonify({"success": False, "error": str(e)}), 500
 
+    @app.route('/media/retention', methods=['GET'])
+    def get_retention_metrics_route():
+        """Get retention policies, progress of a running pass and last-run metrics."""
+        return jsonify(get_retention_worker().get_metrics())
+
+    @app.route('/media/retention/run', methods=['POST'])
+    def run_retention_route():
+        """Start a retention pass in the background."""
+        worker = get_retention_worker()
+        worker.trigger()
+        return jsonify({"success": True, "message": "Retention run scheduled", "metrics": worker.get_metrics()}), 202
+
     @app.route('/media/stats', methods=['GET'])
     def get_media_stats_route():
         """Get media statistics."""
@@ -154,12 +231,70 @@ def register_routes(app):
     def get_gpu_encoders():
         """Get available GPU encoders."""
         try:
-            encoders = detect_available_encoders()
-            return jsonify({"success": True, "encoders": encoders})
+            capabilities = get_encoder_registry().get_capabilities()
+            return jsonify({"success": True, "encoders": capabilities['encoders'], "probed_at": capabilities['probed_at']})
         except Exception as e:
             logging.error(f"Error detecting GPU encoders: {e}")
             return jsonify({"success": False, "error": str(e)}), 500
 
+    # ==============================================================================
+    # HTTP METRICS API ROUTE
+    # ==============================================================================
+    
+    @app.route('/api/http-metrics', methods=['GET'])
+    def get_http_metrics_route():
+        """Get request metrics for the external AI endpoints."""
+        return jsonify({"success": True, "metrics": get_http_metrics()})
+
+    # ==============================================================================
+    # VIDEO JOB API ROUTES
+    # ==============================================================================
+    
+    @app.route('/jobs/<job_id>', methods=['GET'])
+    def get_job_status(job_id):
+        """Get status and per-stage progress of a video job."""
+        job = get_job_manager().get_job(job_id)
+        if not job:
+            return jsonify({"success": False, "error": "Job not found"}), 404
+        
+        return jsonify({"success": True, "job": job.to_dict()})
+
+    @app.route('/jobs/<job_id>/events', methods=['GET'])
+    def stream_job_events(job_id):
+        """Stream progress events of a video job as Server-Sent Events until it finishes."""
+        job = get_job_manager().get_job(job_id)
+        if not job:
+            return jsonify({"success": False, "error": "Job not found"}), 404
+        
+        response = Response(generate_job_events(job), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        # Stop reverse proxies from buffering the stream
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+
+    @app.route('/jobs/<job_id>/result', methods=['GET'])
+    def get_job_result(job_id):
+        """Get the result of a finished video job."""
+        job = get_job_manager().get_job(job_id)
+        if not job:
+            return jsonify({"success": False, "error": "Job not found"}), 404
+        
+        if job.status == 'failed':
+            return jsonify({"success": False, "status": job.status, "error": job.error}), 500
+        if job.status != 'completed':
+            return jsonify({"success": False, "status": job.status, "error": "Job is not finished yet"}), 409
+        
+        result = job.result
+        return jsonify({
+            "success": True,
+            "status": job.status,
+            "media_id": result['media_id'],
+            "scenes_count": result['scenes_count'],
+            "video_file": result['video_file'],
+            "video_url": url_for('static', filename=result['video_file']),
+            "page_url": url_for('index', video=result['video_file'])
+        })
+
     # ==============================================================================
     # FILE DOWNLOAD ROUTE
     # ==============================================================================
@@ -173,17 +308,84 @@ def register_routes(app):
                 logging.error(f"File not found for download: {file_path}")
                 abort(404)
             
+            touch_media(file_path)
             return send_file(file_path, as_attachment=True)
         except Exception as e:
             logging.error(f"Error downloading file {filename}: {e}")
             abort(500)
 
+# ==============================================================================
+# MEDIA LIST HELPERS
+# ==============================================================================
+
+def parse_date_filter(value, end_of_day=False):
+    """Turn a from/to query value into an ISO timestamp bound for created_at.
+
+    A plain date used as the upper bound covers that whole day. created_at
+    is stored as naive local time, so values with a UTC offset are converted
+    to local time first.
+    """
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    if end_of_day and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed.isoformat()
+
+# ==============================================================================
+# JOB EVENT STREAM HELPERS
+# ==============================================================================
+
+def format_sse(event_type, data, event_id=None):
+    """Format one Server-Sent Events message."""
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data)}")
+    return '\n'.join(lines) + '\n\n'
+
+def generate_job_events(job):
+    """Yield a snapshot of the job, then each new event until the job finishes.
+
+    Every connection (including automatic reconnects) starts from a fresh
+    snapshot, so events missed while disconnected are never needed. Idle
+    streams get a comment line now and then to keep proxies from closing them.
+    """
+    snapshot = job.to_dict()
+    yield "retry: 3000\n\n"
+    yield format_sse('snapshot', snapshot, snapshot['last_event_id'])
+    if snapshot['status'] in ('completed', 'failed'):
+        return
+    
+    after_id = snapshot['last_event_id']
+    while True:
+        events = job.get_events(after_id, timeout=JOB_EVENTS_HEARTBEAT_SECONDS)
+        if not events:
+            yield ": keep-alive\n\n"
+            continue
+        
+        for event in events:
+            yield format_sse(event['type'], event, event['id'])
+            if event['type'] == 'status' and event['status'] in ('completed', 'failed'):
+                return
+        after_id = events[-1]['id']
+
 # ==============================================================================
 # VIDEO CREATION HANDLER
 # ==============================================================================
 
+def upload_too_large_message(error):
+    """User-facing message for an upload that exceeds the per-file or per-request limit."""
+    if error.description and error.description != RequestEntityTooLarge.description:
+        return error.description
+    limit_mb = (current_app.config.get('MAX_CONTENT_LENGTH') or 0) // (1024 * 1024)
+    return f"Upload too large: the images together must be at most {limit_mb} MB"
+
 def handle_video_creation(app):
-    """Handle the enhanced video creation process."""
+    """Validate the form, save uploads and queue a background video job."""
+    job = None
+    started = False
     try:
         # Extract form data
         mode = request.form.get('mode')
@@ -197,6 +399,7 @@ def handle_video_creation(app):
         image_positioning = request.form.get('image_positioning', 'fit_screen')
         enable_movement = request.form.get('enable_movement') == 'on'
         gpu_acceleration = request.form.get('gpu_acceleration', 'auto')
+        render_engine = request.form.get('render_engine', 'moviepy')
         
         # Get pause duration
         try:
@@ -244,98 +447,73 @@ def handle_video_creation(app):
         uploaded_files = request.files.getlist('images')
         if not uploaded_files or all(not file.filename for file in uploaded_files):
             logging.error("No files uploaded")
-            return redirect(url_for('index'))
+            return jsonify({"success": False, "error": "No images uploaded"}), 400
         
-        scenes = []
+        job_manager = get_job_manager()
+        job = job_manager.create_job()
+        if not job:
+            return jsonify({"success": False, "error": "Server is busy, please try again later"}), 503
         
-        # Process each uploaded image
+        # Uploads must be saved while the request is still open
+        job.start_stage('upload', total=len(uploaded_files), message='Saving uploaded images')
+        scene_inputs = []
         for i, file in enumerate(uploaded_files):
             if file and file.filename != '':
                 logging.info(f"Processing file {i}: {file.filename}")
                 
-                # Save uploaded file
-                image_path = save_uploaded_file(file, app.config['UPLOAD_FOLDER'])
+                # Save uploaded file (deduplicated by content hash)
+                image_path, image_hash = ingest_uploaded_file(file, app.config['UPLOAD_FOLDER'])
+                job.advance_stage('upload', message=f"Saved image {i + 1} of {len(uploaded_files)}", scene=i + 1)
                 if not image_path:
                     logging.error(f"Failed to save file: {file.filename}")
                     continue
                 
-                # Get narration based on mode
-                narration = ""
-                if mode == 'full-ai':
-                    narration = generate_narration(image_path, vision_model, system_prompt, language)
-                elif mode == 'semi-auto':
-                    custom_prompt = request.form.get(f'prompt_{i}', '')
-                    if custom_prompt:
-                        custom_system_prompt = f"You are an expert narrator. Use the following context: {custom_prompt}. Describe the image incorporating this context."
-                        narration = generate_narration(image_path, vision_model, custom_system_prompt, language)
-                    else:
-                        logging.warning(f"No custom prompt provided for image {i}")
-                        continue
-                else:  # semi-manual mode
-                    narration = request.form.get(f'narration_{i}', '')
-
-                if not narration or narration.startswith("Error:"):
-                    logging.warning(f"Skipping scene for {file.filename} due to narration error: {narration}")
-                    continue
-                
-                # Generate audio (TTS)
-                audio_path = generate_unique_filename(f"audio_{i}", "mp3", app.config['GENERATED_FOLDER'])
-                logging.info(f"Generating TTS audio for scene {i}")
-                
-                if generate_tts_audio(narration, voice_model, audio_path):
-                    scenes.append({
-                        'image_path': image_path, 
-                        'narration': narration, 
-                        'audio_path': audio_path
-                    })
-                    logging.info(f"Successfully created scene {i}")
-                else:
-                    logging.warning(f"Skipping scene for {file.filename} due to audio generation error.")
-        
-        if not scenes:
-            logging.error("No valid scenes created")
-            return redirect(url_for('index'))
+                scene_inputs.append({
+                    'index': i,
+                    'filename': file.filename,
+                    'image_path': image_path,
+                    'image_hash': image_hash,
+                    'custom_prompt': request.form.get(f'prompt_{i}', ''),
+                    'narration': request.form.get(f'narration_{i}', '')
+                })
+        job.finish_stage('upload')
         
-        logging.info(f"Creating video with {len(scenes)} scenes")
-        video_path = create_video_from_scenes(
-            scenes, 
-            app.config['GENERATED_FOLDER'],
-            resolution=resolution,
-            image_positioning=image_positioning,
-            enable_movement=enable_movement,
-            effect_weights=effect_weights,
-            pause_duration=pause_duration,
-            movement_speed=movement_speed,
-            gpu_acceleration=gpu_acceleration
-        )
+        options = {
+            'mode': mode,
+            'voice_model': voice_model,
+            'vision_model': vision_model,
+            'language': language,
+            'system_prompt': system_prompt,
+            'resolution': resolution,
+            'image_positioning': image_positioning,
+            'enable_movement': enable_movement,
+            'effect_weights': effect_weights,
+            'pause_duration': pause_duration,
+            'movement_speed': movement_speed,
+            'gpu_acceleration': gpu_acceleration,
+            'render_engine': render_engine,
+            'generated_folder': app.config['GENERATED_FOLDER'],
+            'scene_inputs': scene_inputs
+        }
+        job_manager.start_job(job, run_video_pipeline, options)
+        started = True
         
-        if video_path and os.path.exists(video_path):
-            # Register the generated media
-            media_id = register_generated_media(video_path, scenes)
-            logging.info(f"Video generated and registered with ID: {media_id}")
-            
-            # Clean up temporary files
-            cleanup_temporary_files(scenes)
-            
-            # --- FIX STARTS HERE ---
-            # Get the filename from the full path
-            video_filename = os.path.basename(video_path)
-            # Create a path relative to the 'static' folder for the template
-            # This path will be used with url_for('static', filename=...) in the template
-            template_video_path = os.path.join('generated', video_filename)
-            # --- FIX ENDS HERE ---
-
-            return render_template('index.html', 
-                                   video_file=template_video_path, # Use the corrected, dynamic path
-                                   tts_voices=TTS_VOICES, 
-                                   vision_models=VISION_MODELS, 
-                                   prompts=load_prompts(),
-                                   languages=LANGUAGES,
-                                   gpu_options=GPU_ACCELERATION_OPTIONS)
-        else:
-            logging.error("Video creation failed")
-            return redirect(url_for('index'))
+        return jsonify({
+            "success": True,
+            "job_id": job.id,
+            "status_url": url_for('get_job_status', job_id=job.id),
+            "events_url": url_for('stream_job_events', job_id=job.id),
+            "result_url": url_for('get_job_result', job_id=job.id)
+        }), 202
 
+    except RequestEntityTooLarge as e:
+        logging.warning(f"Upload rejected: {e.description}")
+        if job and not started:
+            get_job_manager().fail_unstarted_job(job, upload_too_large_message(e))
+        return jsonify({"success": False, "error": upload_too_large_message(e)}), 413
     except Exception as e:
         logging.error(f"Error in video creation: {e}", exc_info=True)
-        return redirect(url_for('index'))
\ No newline at end of file
+        if job and not started:
+            # Otherwise it would stay queued and hold a queue slot forever
+            get_job_manager().fail_unstarted_job(job, str(e))
+        return jsonify({"success": False, "error": str(e)}), 500
@@ -111,12 +111,162 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
-    // Show loader on form submission
+    // --- VIDEO JOB LOGIC ---
+
+    const jobProgress = document.getElementById('job-progress');
+    const jobProgressFill = jobProgress ? jobProgress.querySelector('.job-progress-fill') : null;
+    const jobProgressText = jobProgress ? jobProgress.querySelector('.job-progress-text') : null;
+    const submitButton = form ? form.querySelector('button[type="submit"]') : null;
+
+    function setSubmitting(isSubmitting) {
+        if (loader) loader.style.display = isSubmitting ? 'block' : 'none';
+        if (submitButtonText) submitButtonText.style.display = isSubmitting ? 'none' : 'inline';
+        if (submitButton) submitButton.disabled = isSubmitting;
+    }
+
+    function renderJobProgress(progress, text, failed = false) {
+        if (!jobProgress) return;
+        jobProgress.style.display = 'block';
+        jobProgress.classList.toggle('failed', failed);
+        if (jobProgressFill) jobProgressFill.style.width = `${progress}%`;
+        if (jobProgressText) jobProgressText.textContent = text;
+    }
+
+    // The job being followed survives reloads, so the page reattaches instead of resubmitting
+    const ACTIVE_JOB_KEY = 'activeVideoJob';
+    const UPLOAD_PROGRESS_SHARE = 5;  // Weight of the upload stage in the job progress
+
+    function forgetActiveJob() {
+        sessionStorage.removeItem(ACTIVE_JOB_KEY);
+    }
+
+    function handleJobFailure(message) {
+        forgetActiveJob();
+        setSubmitting(false);
+        renderJobProgress(100, `❌ ${message}`, true);
+    }
+
+    async function showJobResult(resultUrl) {
+        const response = await fetch(resultUrl);
+        const result = await response.json();
+        forgetActiveJob();
+        if (result.success) {
+            window.location.href = result.page_url;
+        } else {
+            handleJobFailure(result.error || 'Video creation failed');
+        }
+    }
+
+    async function pollJob(statusUrl, resultUrl) {
+        try {
+            const response = await fetch(statusUrl);
+            if (response.status === 404) {
+                handleJobFailure('Job not found');
+                return;
+            }
+            const data = await response.json();
+            if (!data.success) throw new Error(data.error || 'Job not found');
+
+            const job = data.job;
+            renderJobProgress(job.progress, `${job.message} (${Math.round(job.progress)}%)`);
+
+            if (job.status === 'completed' || job.status === 'failed') {
+                await showJobResult(resultUrl);
+                return;
+            }
+        } catch (error) {
+            console.error('Failed to fetch job status:', error);
+        }
+        setTimeout(() => pollJob(statusUrl, resultUrl), 2000);
+    }
+
+    // Follow a job through its Server-Sent Events stream, polling where that isn't available
+    function followJob(activeJob) {
+        sessionStorage.setItem(ACTIVE_JOB_KEY, JSON.stringify(activeJob));
+        setSubmitting(true);
+
+        if (!window.EventSource || !activeJob.eventsUrl) {
+            pollJob(activeJob.statusUrl, activeJob.resultUrl);
+            return;
+        }
+
+        const source = new EventSource(activeJob.eventsUrl);
+        const handleJobEvent = (e) => {
+            const event = JSON.parse(e.data);
+            renderJobProgress(event.progress, `${event.message} (${Math.round(event.progress)}%)`);
+
+            if (event.type === 'stage' && event.state === 'done') {
+                console.info(`Job ${activeJob.jobId}: ${event.stage} finished in ${event.duration}s`);
+            }
+            if (event.status === 'completed' || event.status === 'failed') {
+                source.close();
+                showJobResult(activeJob.resultUrl);
+            }
+        };
+        ['snapshot', 'status', 'stage', 'progress'].forEach(type => source.addEventListener(type, handleJobEvent));
+
+        source.onerror = () => {
+            // Dropped connections are retried by the browser; a closed source means the stream was refused
+            if (source.readyState === EventSource.CLOSED) {
+                pollJob(activeJob.statusUrl, activeJob.resultUrl);
+            }
+        };
+    }
+
+    // XMLHttpRequest rather than fetch, so the upload itself can report progress
+    function submitJob(formData) {
+        return new Promise((resolve, reject) => {
+            const xhr = new XMLHttpRequest();
+            xhr.open('POST', form.action || '/');
+            xhr.responseType = 'json';
+            xhr.upload.addEventListener('progress', (e) => {
+                if (!e.lengthComputable) return;
+                const percent = e.loaded / e.total * 100;
+                renderJobProgress(percent * UPLOAD_PROGRESS_SHARE / 100, `Uploading images... (${Math.round(percent)}%)`);
+            });
+            xhr.addEventListener('load', () => {
+                resolve(xhr.response || { success: false, error: `Request failed (${xhr.status})` });
+            });
+            xhr.addEventListener('error', () => reject(new Error('Network error')));
+            xhr.send(formData);
+        });
+    }
+
+    // Submit the form in the background and follow the job progress
     if (form) {
-        form.addEventListener('submit', function() {
-            if (loader) loader.style.display = 'block';
-            if (submitButtonText) submitButtonText.style.display = 'none';
+        form.addEventListener('submit', async function(e) {
+            e.preventDefault();
+            if (sessionStorage.getItem(ACTIVE_JOB_KEY)) return;
+            setSubmitting(true);
+            renderJobProgress(0, 'Uploading images...');
+
+            try {
+                const result = await submitJob(new FormData(form));
+                if (!result.success) {
+                    handleJobFailure(result.error || 'Failed to start video job');
+                    return;
+                }
+                followJob({
+                    jobId: result.job_id,
+                    statusUrl: result.status_url,
+                    eventsUrl: result.events_url,
+                    resultUrl: result.result_url
+                });
+            } catch (error) {
+                console.error('Failed to submit video job:', error);
+                handleJobFailure('Failed to submit video job');
+            }
         });
+
+        // Reattach to a job still running from before a reload
+        const savedJob = sessionStorage.getItem(ACTIVE_JOB_KEY);
+        if (savedJob) {
+            try {
+                followJob(JSON.parse(savedJob));
+            } catch (error) {
+                forgetActiveJob();
+            }
+        }
     }
 
     // Attach event listeners
@@ -140,14 +290,26 @@ document.addEventListener('DOMContentLoaded', function() {
 
     // --- PROMPT MANAGER LOGIC ---
 
+    // Last prompts received from the server, revalidated with their ETag
+    let cachedPrompts = null;
+    let promptsEtag = null;
+    let renderedPrompts = null;
+
     async function fetchPrompts() {
         try {
-            const response = await fetch('/prompts');
+            const headers = {};
+            if (promptsEtag && cachedPrompts) headers['If-None-Match'] = promptsEtag;
+
+            const response = await fetch('/prompts', { headers });
+            if (response.status === 304) return cachedPrompts;
             if (!response.ok) throw new Error('Network response was not ok');
-            return await response.json();
+
+            cachedPrompts = await response.json();
+            promptsEtag = response.headers.get('ETag');
+            return cachedPrompts;
         } catch (error) {
             console.error('Failed to fetch prompts:', error);
-            return {};
+            return cachedPrompts || {};
         }
     }
 
@@ -184,7 +346,10 @@ document.addEventListener('DOMContentLoaded', function() {
 
     async function loadAndRenderPrompts() {
         const prompts = await fetchPrompts();
+        // A 304 hands back the same object: skip re-rendering (and resetting the select)
+        if (prompts === renderedPrompts) return;
         renderPrompts(prompts);
+        renderedPrompts = prompts;
     }
 
     async function handleAddOrUpdatePrompt() {
@@ -211,6 +376,8 @@ document.addEventListener('DOMContentLoaded', function() {
                 newPromptNameInput.value = '';
                 newPromptTextInput.value = '';
                 renderPrompts(result.prompts);
+                cachedPrompts = renderedPrompts = result.prompts;
+                promptsEtag = null;
             } else {
                 alert('Error saving prompt: ' + result.error);
             }
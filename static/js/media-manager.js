@@ -2,8 +2,14 @@ document.addEventListener('DOMContentLoaded', function() {
     const mediaListElement = document.getElementById('media-list');
     const refreshBtn = document.getElementById('refresh-media-btn');
     const cleanupBtn = document.getElementById('cleanup-media-btn');
+    const loadMoreBtn = document.getElementById('load-more-media-btn');
+    const statusFilter = document.getElementById('media-status-filter');
     const statsContainer = document.getElementById('media-stats');
 
+    // Pagination state: cursor for the next page and the ETag of the first page
+    let nextCursor = null;
+    let listEtag = null;
+
     // Load media list on page load
     loadMediaList();
     loadMediaStats();
@@ -36,17 +42,87 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
-    async function loadMediaList() {
+    if (loadMoreBtn) {
+        loadMoreBtn.addEventListener('click', function() {
+            this.disabled = true;
+            this.textContent = 'Loading...';
+
+            loadMediaList(true).finally(() => {
+                this.disabled = false;
+                this.textContent = 'Load More';
+            });
+        });
+    }
+
+    if (statusFilter) {
+        statusFilter.addEventListener('change', function() {
+            // A different query never matches the cached ETag
+            listEtag = null;
+            loadMediaList();
+        });
+    }
+
+    if (mediaListElement) {
+        // Delegated listeners, so items appended by "Load More" work too
+        mediaListElement.addEventListener('click', function(event) {
+            const deleteBtn = event.target.closest('.delete-media-btn');
+            if (deleteBtn) {
+                const mediaId = deleteBtn.dataset.id;
+                const confirmMessage = deleteBtn.dataset.confirm;
+
+                if (confirm(confirmMessage)) {
+                    // Disable button during deletion
+                    deleteBtn.disabled = true;
+                    deleteBtn.textContent = 'Deleting...';
+
+                    deleteMedia(mediaId).finally(() => {
+                        // Re-enable button if deletion fails
+                        deleteBtn.disabled = false;
+                        deleteBtn.textContent = 'Delete';
+                    });
+                }
+                return;
+            }
+
+            const downloadBtn = event.target.closest('.download-media-btn');
+            if (downloadBtn) {
+                downloadFile(downloadBtn.dataset.path, downloadBtn.dataset.filename);
+            }
+        });
+    }
+
+    function buildMediaListUrl(append) {
+        const params = new URLSearchParams();
+        if (append && nextCursor) params.set('cursor', nextCursor);
+        if (statusFilter && statusFilter.value) params.set('exists', statusFilter.value);
+
+        const query = params.toString();
+        return query ? `/media/list?${query}` : '/media/list';
+    }
+
+    async function loadMediaList(append = false) {
         try {
-            showNotification('Loading media list...', 'info');
-            
-            const response = await fetch('/media/list');
+            if (!append) showNotification('Loading media list...', 'info');
+
+            // Revalidate the first page; the server answers 304 if nothing changed
+            const headers = {};
+            if (!append && listEtag) headers['If-None-Match'] = listEtag;
+
+            const response = await fetch(buildMediaListUrl(append), { headers });
+            if (response.status === 304) {
+                showNotification('Media list is up to date', 'success');
+                return;
+            }
             if (!response.ok) throw new Error('Failed to fetch media list');
             
             const data = await response.json();
-            renderMediaList(data.media_list || []);
+            if (!append) listEtag = response.headers.get('ETag');
+            nextCursor = data.next_cursor || null;
+
+            renderMediaList(data.media_list || [], append);
+            if (loadMoreBtn) loadMoreBtn.style.display = data.has_more ? '' : 'none';
             
-            showNotification('Media list loaded successfully', 'success');
+            if (!append) showNotification('Media list loaded successfully', 'success');
         } catch (error) {
             console.error('Error loading media list:', error);
             showNotification('Error loading media list', 'error');
@@ -65,10 +141,10 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
-    function renderMediaList(mediaList) {
+    function renderMediaList(mediaList, append = false) {
         if (!mediaListElement) return;
         
-        if (!mediaList || mediaList.length === 0) {
+        if (!append && (!mediaList || mediaList.length === 0)) {
             mediaListElement.innerHTML = '<p class="text-muted">No generated videos found.</p>';
             return;
         }
@@ -110,36 +186,11 @@ document.addEventListener('DOMContentLoaded', function() {
             `;
         }).join('');
 
-        mediaListElement.innerHTML = listHTML;
-
-        // Attach delete event listeners with improved confirmation
-        document.querySelectorAll('.delete-media-btn').forEach(btn => {
-            btn.addEventListener('click', function() {
-                const mediaId = this.dataset.id;
-                const confirmMessage = this.dataset.confirm;
-                
-                if (confirm(confirmMessage)) {
-                    // Disable button during deletion
-                    this.disabled = true;
-                    this.textContent = 'Deleting...';
-                    
-                    deleteMedia(mediaId).finally(() => {
-                        // Re-enable button if deletion fails
-                        this.disabled = false;
-                        this.textContent = 'Delete';
-                    });
-                }
-            });
-        });
-
-        // Attach download event listeners
-        document.querySelectorAll('.download-media-btn').forEach(btn => {
-            btn.addEventListener('click', function() {
-                const filePath = this.dataset.path;
-                const filename = this.dataset.filename;
-                downloadFile(filePath, filename);
-            });
-        });
+        if (append) {
+            mediaListElement.insertAdjacentHTML('beforeend', listHTML);
+        } else {
+            mediaListElement.innerHTML = listHTML;
+        }
     }
 
     function renderMediaStats(stats) {
@@ -171,7 +222,8 @@ document.addEventListener('DOMContentLoaded', function() {
         try {
             // Create a temporary anchor element for download
             const link = document.createElement('a');
-            link.href = `/static/${filePath}`;
+            // Through /download so the server records the access for LRU eviction
+            link.href = `/download/${filePath}`;
             link.download = filename;
             link.style.display = 'none';
             
@@ -0,0 +1,63 @@
+from PIL import Image
+from utils.image_processor import load_scaled_image
+
+def test_load_scaled_image_reduces_palette_image(tmp_path):
+    path = tmp_path / 'palette.png'
+    image = Image.new('P', (1200, 1600), 0)
+    image.putpalette([200, 40, 40] + [0] * 765)
+    image.save(path)
+
+    image = load_scaled_image(str(path), 300, 400)
+
+    assert image.mode == 'RGB'
+    assert image.size == (300, 400)
+    assert image.getpixel((0, 0)) == (200, 40, 40)
+
+def test_load_scaled_image_reduces_transparent_palette_image(tmp_path):
+    path = tmp_path / 'transparent.png'
+    image = Image.new('P', (1200, 1600), 0)
+    image.putpalette([0, 0, 0, 10, 120, 220] + [0] * 762)
+    image.paste(1, (0, 0, 600, 1600))
+    image.save(path, transparency=0)
+
+    image = load_scaled_image(str(path), 300, 400)
+
+    assert image.mode == 'RGB'
+    assert image.getpixel((0, 0)) == (10, 120, 220)
+    # Transparent pixels are composited onto white
+    assert image.getpixel((299, 0)) == (255, 255, 255)
+
+def test_load_scaled_image_reduces_bilevel_image(tmp_path):
+    path = tmp_path / 'bilevel.png'
+    Image.new('1', (1200, 1600), 1).save(path)
+
+    image = load_scaled_image(str(path), 300, 400)
+
+    assert image.mode == 'RGB'
+    assert image.size == (300, 400)
+    assert image.getpixel((0, 0)) == (255, 255, 255)
+
+def test_load_scaled_image_reduces_palette_alpha_image(tmp_path):
+    path = tmp_path / 'palette_alpha.tif'
+    image = Image.new('PA', (1200, 1600), (1, 255))
+    image.putpalette([0, 0, 0, 10, 120, 220] + [0] * 762)
+    image.paste((1, 0), (600, 0, 1200, 1600))
+    image.save(path)
+
+    image = load_scaled_image(str(path), 300, 400)
+
+    assert image.mode == 'RGB'
+    assert image.size == (300, 400)
+    assert image.getpixel((0, 0)) == (10, 120, 220)
+    # Transparent pixels are composited onto white
+    assert image.getpixel((299, 0)) == (255, 255, 255)
+
+def test_load_scaled_image_reduces_16_bit_image(tmp_path):
+    path = tmp_path / 'gray16.tif'
+    Image.new('I;16', (1200, 1600), 100).save(path)
+
+    image = load_scaled_image(str(path), 300, 400)
+
+    assert image.mode == 'RGB'
+    assert image.size == (300, 400)
+    assert image.getpixel((0, 0)) == (100, 100, 100)
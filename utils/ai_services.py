@@ -1,10 +1,23 @@
 import os
+import re
+import json
 import base64
 import requests
 import logging
 import time
 import asyncio
-from threading import Lock
+from contextlib import contextmanager
+from threading import Lock, BoundedSemaphore
+from concurrent.futures import ThreadPoolExecutor
+from .config import (
+    CACHE_FOLDER, NARRATION_CACHE_MAX_MB, NARRATION_CACHE_MAX_AGE_DAYS, TTS_CACHE_MAX_MB, TTS_CACHE_MAX_AGE_DAYS,
+    VISION_IMAGE_MAX_EDGE, VISION_IMAGE_FORMAT, VISION_IMAGE_QUALITY,
+    TTS_CHUNK_WORKERS, TTS_CHUNK_RETRIES, HTTP_MAX_RETRIES
+)
+from .cache_store import DiskCache, hash_file, make_cache_key
+from .http_client import http_get, http_post
+from .image_processor import encode_image_for_vision
+from .audio_assembler import concat_audio_files
 
 # ==============================================================================
 # RATE LIMITING CONFIGURATION
@@ -15,44 +28,167 @@ RATE_LIMITS = {
     'vision': {
         'max_concurrent': 1,
         'interval': 3.0,  # 3 seconds between requests
-        'last_request_time': 0,
-        'lock': Lock()
     },
     'tts': {
+        'max_concurrent': None,  # No cap on requests in flight
         'interval': 15.0,  # 15 seconds between requests
-        'last_request_time': 0,
-        'lock': Lock()
     }
 }
 
+class TokenBucket:
+    """Token bucket rate limiter with an optional cap on requests in flight."""
+
+    def __init__(self, interval, capacity=1, max_concurrent=None):
+        self.rate = 1.0 / interval  # Tokens added per second
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.last_refill = time.monotonic()
+        self.lock = Lock()
+        self.slots = BoundedSemaphore(max_concurrent) if max_concurrent else None
+
+    def reserve(self):
+        """Take one token and return how long the caller must wait before using it.
+
+        Tokens may go negative, which queues callers in arrival order without
+        holding the lock while they sleep.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire_slot(self):
+        if self.slots:
+            self.slots.acquire()
+
+    def release_slot(self):
+        if self.slots:
+            self.slots.release()
+
+RATE_LIMITERS = {
+    api_type: TokenBucket(limit['interval'], max_concurrent=limit.get('max_concurrent'))
+    for api_type, limit in RATE_LIMITS.items()
+}
+
 def wait_for_rate_limit(api_type):
     """Wait for rate limit before making API request."""
-    if api_type not in RATE_LIMITS:
+    limiter = RATE_LIMITERS.get(api_type)
+    if not limiter:
         return
     
-    rate_limit = RATE_LIMITS[api_type]
+    wait_time = limiter.reserve()
+    if wait_time > 0:
+        logging.info(f"Rate limiting {api_type}: waiting {wait_time:.1f} seconds")
+        time.sleep(wait_time)
+
+def rate_limit_throttle(api_type):
+    """Throttle callback for request_with_retry: every HTTP attempt, retries included, takes a token."""
+    return lambda: wait_for_rate_limit(api_type)
+
+@contextmanager
+def rate_limited(api_type):
+    """Hold a concurrency slot for the duration of a request.
+
+    Tokens are not taken here but per HTTP attempt, by passing
+    rate_limit_throttle(api_type) to the request.
+    """
+    limiter = RATE_LIMITERS.get(api_type)
+    if not limiter:
+        yield
+        return
     
-    with rate_limit['lock']:
-        current_time = time.time()
-        time_since_last = current_time - rate_limit['last_request_time']
-        
-        if time_since_last < rate_limit['interval']:
-            wait_time = rate_limit['interval'] - time_since_last
-            logging.info(f"Rate limiting {api_type}: waiting {wait_time:.1f} seconds")
-            time.sleep(wait_time)
-        
-        rate_limit['last_request_time'] = time.time()
+    limiter.acquire_slot()
+    try:
+        yield
+    finally:
+        limiter.release_slot()
+
+# ==============================================================================
+# RESPONSE CACHES
+# ==============================================================================
+
+# Bump when a request template changes so old entries are ignored
+NARRATION_CACHE_VERSION = 2
+TTS_CACHE_VERSION = 1
+
+NARRATION_CACHE = DiskCache(
+    os.path.join(CACHE_FOLDER, 'narration'),
+    max_bytes=NARRATION_CACHE_MAX_MB * 1024 * 1024,
+    max_age=NARRATION_CACHE_MAX_AGE_DAYS * 24 * 3600,
+    suffix='.json'
+)
+
+TTS_CACHE = DiskCache(
+    os.path.join(CACHE_FOLDER, 'tts'),
+    max_bytes=TTS_CACHE_MAX_MB * 1024 * 1024,
+    max_age=TTS_CACHE_MAX_AGE_DAYS * 24 * 3600,
+    suffix='.mp3'
+)
+
+def get_tts_cache_key(cleaned_narration, voice_model):
+    """Build the TTS cache key from the cleaned narration text and voice."""
+    return make_cache_key(TTS_CACHE_VERSION, cleaned_narration, voice_model)
+
+def get_narration_cache_key(image_hash, vision_model, system_prompt, language, batch=False):
+    """Build the narration cache key from the image content and request settings.
+
+    For batches, image_hash is the list of panel hashes in order.
+    """
+    parts = [NARRATION_CACHE_VERSION, image_hash, vision_model, system_prompt, language,
+             VISION_IMAGE_MAX_EDGE, VISION_IMAGE_FORMAT, VISION_IMAGE_QUALITY]
+    if batch:
+        parts.append('batch')
+    return make_cache_key(*parts)
+
+# Longest text sent in one TTS request; longer narrations are split into chunks
+TTS_MAX_CHUNK_LENGTH = 500  # Conservative limit for URL length (GET fallback)
 
 # ==============================================================================
 # AI SERVICE FUNCTIONS (POLLINATIONS API)
 # ==============================================================================
 
-def generate_narration(image_path, vision_model, system_prompt, language="Indonesian"):
-    """Analyze image and generate narration in specified language with rate limiting."""
-    logging.info(f"Generating narration for {os.path.basename(image_path)} in {language} using model {vision_model}")
+def build_vision_image_part(image_path):
+    """Chat content part carrying one downscaled, re-encoded image."""
+    # Downscale and re-encode before upload instead of sending the raw scan
+    image_bytes, mime_type = encode_image_for_vision(
+        image_path, VISION_IMAGE_MAX_EDGE, VISION_IMAGE_FORMAT, VISION_IMAGE_QUALITY
+    )
+    base64_image = base64.b64encode(image_bytes).decode('utf-8')
+    return {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{base64_image}"}}
+
+def request_vision_completion(vision_model, system_prompt, content):
+    """Send one chat request to the vision endpoint and return the reply text, or None."""
+    headers = {"Content-Type": "application/json"}
+    payload = {
+        "model": vision_model,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": content}
+        ]
+    }
+    
+    # POST endpoint for vision capabilities (rate limited)
+    with rate_limited('vision'):
+        response = http_post("https://text.pollinations.ai/openai", 'vision', headers=headers, json=payload,
+                             throttle=rate_limit_throttle('vision'))
+    response.raise_for_status()
+    
+    data = response.json()
+    if 'choices' in data and len(data['choices']) > 0:
+        return data['choices'][0]['message']['content'].strip()
+    
+    logging.error(f"Unexpected API response format: {data}")
+    return None
+
+def generate_narration(image_path, vision_model, system_prompt, language="Indonesian", image_hash=None):
+    """Analyze image and generate narration in specified language with rate limiting.
     
-    # Apply rate limiting for vision API
-    wait_for_rate_limit('vision')
+    Results are cached by image content, model, prompt and language, so cache
+    hits skip the vision API and its rate limit entirely.
+    """
+    logging.info(f"Generating narration for {os.path.basename(image_path)} in {language} using model {vision_model}")
     
     try:
         # Check if image file exists
@@ -60,10 +196,11 @@ def generate_narration(image_path, vision_model, system_prompt, language="Indone
             logging.error(f"Image file not found: {image_path}")
             return f"Error: Image file not found"
         
-        with open(image_path, "rb") as image_file:
-            base64_image = base64.b64encode(image_file.read()).decode('utf-8')
-
-        headers = {"Content-Type": "application/json"}
+        cache_key = get_narration_cache_key(image_hash or hash_file(image_path), vision_model, system_prompt, language)
+        cached = NARRATION_CACHE.get_json(cache_key)
+        if cached and cached.get('narration'):
+            logging.info(f"Narration cache hit for {os.path.basename(image_path)}")
+            return cached['narration']
         
         # Improved prompt for better narration quality
         user_text_prompt = f"""Describe this image for a short comic explainer video. 
@@ -75,35 +212,20 @@ def generate_narration(image_path, vision_model, system_prompt, language="Indone
         - Write in {language} language
         - Make it sound natural when spoken aloud"""
 
-        payload = {
-            "model": vision_model,
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": user_text_prompt},
-                        {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}}
-                    ]
-                }
-            ]
-        }
+        content = [
+            {"type": "text", "text": user_text_prompt},
+            build_vision_image_part(image_path)
+        ]
         
-        # POST endpoint for vision capabilities
-        response = requests.post("https://text.pollinations.ai/openai", headers=headers, json=payload, timeout=90)
-        response.raise_for_status()
-        
-        data = response.json()
-        if 'choices' in data and len(data['choices']) > 0:
-            narration = data['choices'][0]['message']['content'].strip()
-            
+        narration = request_vision_completion(vision_model, system_prompt, content)
+        if narration:
             # Clean up narration text for better TTS
             narration = clean_narration_text(narration)
             
             logging.info(f"Narration received: {narration}")
+            NARRATION_CACHE.put_json(cache_key, {'narration': narration})
             return narration
         else:
-            logging.error(f"Unexpected API response format: {data}")
             return f"Error: Unexpected API response format"
         
     except requests.exceptions.RequestException as e:
@@ -113,6 +235,89 @@ def generate_narration(image_path, vision_model, system_prompt, language="Indone
         logging.error(f"Error generating narration: {e}")
         return f"Error: Could not generate narration for {os.path.basename(image_path)}."
 
+def parse_batch_narrations(reply, count):
+    """Parse a batch reply into exactly count narration strings, or return None.
+
+    Accepts a JSON array of strings (or of objects with a "narration" field),
+    optionally wrapped in a code fence or an object with a "narrations" key.
+    """
+    start, end = reply.find('['), reply.rfind(']')
+    if start == -1 or end <= start:
+        return None
+    
+    try:
+        items = json.loads(reply[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    
+    narrations = []
+    for item in items:
+        if isinstance(item, dict):
+            item = item.get('narration')
+        if not isinstance(item, str) or not item.strip():
+            return None
+        narrations.append(item.strip())
+    
+    return narrations if len(narrations) == count else None
+
+def generate_narrations_batch(image_paths, vision_model, system_prompt, language="Indonesian", image_hashes=None):
+    """Narrate consecutive panels with one multi-image request.
+
+    Returns one narration per image, in order. The whole batch is cached by
+    the panels' content and request settings. If the request fails or the
+    reply can't be parsed into one narration per panel, every panel falls
+    back to generate_narration (whose results may contain "Error:" entries).
+    """
+    if len(image_paths) == 1:
+        return [generate_narration(image_paths[0], vision_model, system_prompt, language,
+                                   image_hash=image_hashes[0] if image_hashes else None)]
+    
+    image_hashes = image_hashes or [None] * len(image_paths)
+    image_hashes = [image_hash or hash_file(path) for path, image_hash in zip(image_paths, image_hashes)]
+    count = len(image_paths)
+    logging.info(f"Generating narrations for {count} panels in one request using model {vision_model}")
+    
+    cache_key = get_narration_cache_key(image_hashes, vision_model, system_prompt, language, batch=True)
+    cached = NARRATION_CACHE.get_json(cache_key)
+    if cached and len(cached.get('narrations', [])) == count:
+        logging.info(f"Narration cache hit for batch of {count} panels")
+        return cached['narrations']
+    
+    user_text_prompt = f"""These are {count} consecutive comic panels, in reading order (Panel 1 to Panel {count}).
+        Describe each panel for a short comic explainer video so the narrations flow as one story.
+        Requirements:
+        - Keep each narration concise but complete (1-2 sentences maximum)
+        - Focus on the main action or story element of that panel
+        - Use clear, engaging language suitable for narration
+        - Avoid overly complex words that might be hard to pronounce
+        - Write in {language} language
+        - Make it sound natural when spoken aloud
+        Reply with only a JSON array of exactly {count} strings, one narration per panel, in panel order."""
+    
+    try:
+        content = [{"type": "text", "text": user_text_prompt}]
+        for number, image_path in enumerate(image_paths, start=1):
+            content.append({"type": "text", "text": f"Panel {number}:"})
+            content.append(build_vision_image_part(image_path))
+        
+        reply = request_vision_completion(vision_model, system_prompt, content)
+        narrations = parse_batch_narrations(reply, count) if reply else None
+    except Exception as e:
+        logging.warning(f"Batch narration request failed: {e}")
+        narrations = None
+    
+    if narrations is None:
+        logging.warning(f"Could not get {count} narrations from the batch reply, narrating panels one by one")
+        return [
+            generate_narration(image_path, vision_model, system_prompt, language, image_hash=image_hash)
+            for image_path, image_hash in zip(image_paths, image_hashes)
+        ]
+    
+    narrations = [clean_narration_text(narration) for narration in narrations]
+    logging.info(f"Batch narrations received for {count} panels")
+    NARRATION_CACHE.put_json(cache_key, {'narrations': narrations})
+    return narrations
+
 def clean_narration_text(text):
     """Clean narration text for better TTS quality."""
     # Remove quotes and unnecessary punctuation that might affect TTS
@@ -137,9 +342,6 @@ def generate_tts_audio(narration, voice_model, output_path):
     """Generate audio from narration text with improved handling for longer text."""
     logging.info(f"Generating audio for narration: '{narration[:50]}...' with voice {voice_model}")
     
-    # Apply rate limiting for TTS API
-    wait_for_rate_limit('tts')
-    
     try:
         # Ensure output directory exists
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
@@ -147,20 +349,37 @@ def generate_tts_audio(narration, voice_model, output_path):
         # Clean and prepare narration for TTS
         cleaned_narration = clean_narration_text(narration)
         
+        # Reuse audio generated earlier for the same text and voice
+        cache_key = get_tts_cache_key(cleaned_narration, voice_model)
+        if TTS_CACHE.copy_to(cache_key, output_path):
+            logging.info(f"TTS cache hit, audio reused at: {output_path}")
+            return True
+        
         # Check text length and split if necessary
-        max_length = 500  # Conservative limit for URL length
-        if len(cleaned_narration) > max_length:
+        if len(cleaned_narration) > TTS_MAX_CHUNK_LENGTH:
             logging.warning(f"Narration too long ({len(cleaned_narration)} chars), splitting...")
-            return generate_long_tts_audio(cleaned_narration, voice_model, output_path)
-        
-        # Use POST method for better reliability with longer text
-        success = generate_tts_post_method(cleaned_narration, voice_model, output_path)
+            # Every chunk request takes its own rate limit token
+            success, complete = generate_long_tts_audio(cleaned_narration, voice_model, output_path)
+        else:
+            # Apply rate limiting for TTS API
+            with rate_limited('tts'):
+                # Use POST method for better reliability with longer text
+                success = generate_tts_post_method(cleaned_narration, voice_model, output_path)
+                complete = success
+                
+                if not success:
+                    # Fallback to GET method with shorter text
+                    logging.info("POST method failed, trying GET method with truncated text...")
+                    truncated_text = cleaned_narration[:300] + "..." if len(cleaned_narration) > 300 else cleaned_narration
+                    success = generate_tts_get_method(truncated_text, voice_model, output_path)
+                    complete = (success and truncated_text == cleaned_narration
+                                and not tts_get_truncates(truncated_text))
         
-        if not success:
-            # Fallback to GET method with shorter text
-            logging.info("POST method failed, trying GET method with truncated text...")
-            truncated_text = cleaned_narration[:300] + "..." if len(cleaned_narration) > 300 else cleaned_narration
-            success = generate_tts_get_method(truncated_text, voice_model, output_path)
+        # Only audio that speaks the whole narration is cached
+        if complete:
+            TTS_CACHE.put_file(cache_key, output_path)
+        elif success:
+            logging.warning("TTS audio is missing part of the narration, not caching it")
         
         return success
         
@@ -168,7 +387,7 @@ def generate_tts_audio(narration, voice_model, output_path):
         logging.error(f"Error generating TTS audio: {e}")
         return False
 
-def generate_tts_post_method(narration, voice_model, output_path):
+def generate_tts_post_method(narration, voice_model, output_path, max_retries=HTTP_MAX_RETRIES):
     """Generate TTS using POST method for better handling of longer text."""
     try:
         headers = {"Content-Type": "application/json"}
@@ -179,8 +398,9 @@ def generate_tts_post_method(narration, voice_model, output_path):
             "response_format": "mp3"
         }
         
-        response = requests.post("https://text.pollinations.ai/openai/audio/speech", 
-                               headers=headers, json=payload, timeout=90)
+        response = http_post("https://text.pollinations.ai/openai/audio/speech", 'tts_post',
+                             headers=headers, json=payload, max_retries=max_retries,
+                             throttle=rate_limit_throttle('tts'))
         
         if response.status_code == 200:
             content_type = response.headers.get('Content-Type', '')
@@ -199,7 +419,11 @@ def generate_tts_post_method(narration, voice_model, output_path):
         logging.warning(f"POST method failed: {e}")
         return False
 
-def generate_tts_get_method(narration, voice_model, output_path):
+def tts_get_truncates(narration):
+    """Return True if the GET method has to shorten narration to fit the URL."""
+    return len(requests.utils.quote(f"baca teks ini dengan jelas: {narration}")) > 800
+
+def generate_tts_get_method(narration, voice_model, output_path, max_retries=HTTP_MAX_RETRIES):
     """Generate TTS using GET method (fallback)."""
     try:
         # Prepare TTS prompt
@@ -207,7 +431,7 @@ def generate_tts_get_method(narration, voice_model, output_path):
         encoded_narration = requests.utils.quote(tts_prompt)
         
         # Ensure URL is not too long
-        if len(encoded_narration) > 800:
+        if tts_get_truncates(narration):
             # Further truncate if still too long
             short_narration = narration[:200] + "..."
             tts_prompt = f"baca teks ini: {short_narration}"
@@ -216,7 +440,8 @@ def generate_tts_get_method(narration, voice_model, output_path):
         url = f"https://text.pollinations.ai/{encoded_narration}."
         params = {"model": "openai-audio", "voice": voice_model}
         
-        response = requests.get(url, params=params, timeout=90)
+        response = http_get(url, 'tts_get', params=params, max_retries=max_retries,
+                            throttle=rate_limit_throttle('tts'))
         response.raise_for_status()
         
         # Check if response contains audio
@@ -236,73 +461,89 @@ def generate_tts_get_method(narration, voice_model, output_path):
         logging.error(f"GET method failed: {e}")
         return False
 
-def generate_long_tts_audio(narration, voice_model, output_path):
-    """Handle long narration by splitting into chunks and combining."""
+def generate_tts_chunk(chunk, voice_model, output_path, max_retries=TTS_CHUNK_RETRIES):
+    """Generate audio for one chunk, retrying with both methods; each request takes a rate limit token.
+
+    Returns (success, complete); complete is False when only a shortened
+    GET fallback produced the audio.
+    """
+    for attempt in range(max_retries + 1):
+        with rate_limited('tts'):
+            # This loop owns the retries, so the HTTP layer sends each request once
+            success = generate_tts_post_method(chunk, voice_model, output_path, max_retries=0)
+            complete = success
+            if not success:
+                success = generate_tts_get_method(chunk, voice_model, output_path, max_retries=0)
+                complete = success and not tts_get_truncates(chunk)
+        
+        if success and os.path.exists(output_path):
+            return True, complete
+        if attempt < max_retries:
+            logging.warning(f"TTS chunk failed, retrying ({attempt + 1}/{max_retries}): {chunk[:50]}...")
+    return False, False
+
+def generate_long_tts_audio(narration, voice_model, output_path, max_length=TTS_MAX_CHUNK_LENGTH):
+    """Handle long narration by splitting into chunks and combining.
+
+    Chunks are requested concurrently (the shared TTS limiter still paces
+    them) and joined in their original order. Returns (success, complete);
+    complete is False when a chunk was dropped or only partly spoken.
+    """
+    chunks = split_into_chunks(narration, max_length)
+    chunk_paths = [output_path.replace('.mp3', f'_chunk_{i}.mp3') for i in range(len(chunks))]
+    logging.info(f"Generating {len(chunks)} TTS chunks ({', '.join(str(len(chunk)) for chunk in chunks)} chars)")
+    
     try:
-        from moviepy.editor import AudioFileClip, concatenate_audioclips
+        with ThreadPoolExecutor(max_workers=min(TTS_CHUNK_WORKERS, len(chunks)) or 1,
+                                thread_name_prefix='tts-chunk') as executor:
+            results = list(executor.map(
+                lambda item: generate_tts_chunk(item[0], voice_model, item[1]),
+                zip(chunks, chunk_paths)
+            ))
         
-        # Split narration into sentences
-        sentences = split_into_sentences(narration)
         audio_chunks = []
-        temp_files = []
-        
-        for i, sentence in enumerate(sentences):
-            if not sentence.strip():
-                continue
-                
-            temp_path = output_path.replace('.mp3', f'_chunk_{i}.mp3')
-            temp_files.append(temp_path)
-            
-            # Generate audio for this chunk
-            success = generate_tts_post_method(sentence, voice_model, temp_path)
-            if not success:
-                success = generate_tts_get_method(sentence, voice_model, temp_path)
-            
-            if success and os.path.exists(temp_path):
-                audio_chunks.append(temp_path)
+        complete = True
+        for i, (chunk, chunk_path, (success, chunk_complete)) in enumerate(zip(chunks, chunk_paths, results)):
+            if success:
+                audio_chunks.append(chunk_path)
             else:
-                logging.warning(f"Failed to generate audio for chunk {i}: {sentence[:50]}...")
+                logging.warning(f"Failed to generate audio for chunk {i}: {chunk[:50]}...")
+            complete = complete and chunk_complete
         
         if not audio_chunks:
             logging.error("No audio chunks were generated successfully")
-            return False
+            return False, False
         
         # Combine audio chunks
         if len(audio_chunks) == 1:
             # Only one chunk, just rename it
-            os.rename(audio_chunks[0], output_path)
+            os.replace(audio_chunks[0], output_path)
+            success = True
         else:
-            # Multiple chunks, combine them
-            clips = [AudioFileClip(chunk) for chunk in audio_chunks]
-            final_audio = concatenate_audioclips(clips)
-            final_audio.write_audiofile(output_path, logger=None)
-            
-            # Clean up clips
-            for clip in clips:
-                clip.close()
-            final_audio.close()
+            # Multiple chunks, joined by ffmpeg without decoding them
+            success = concat_audio_files(audio_chunks, output_path)
         
-        # Clean up temporary files
-        for temp_file in temp_files:
-            if os.path.exists(temp_file) and temp_file != output_path:
-                try:
-                    os.remove(temp_file)
-                except:
-                    pass
-        
-        logging.info(f"Long audio generated successfully: {output_path}")
-        return True
+        if success:
+            logging.info(f"Long audio generated successfully: {output_path}")
+        return success, success and complete
         
     except Exception as e:
         logging.error(f"Error generating long TTS audio: {e}")
-        return False
+        return False, False
+    
+    finally:
+        # Clean up temporary files
+        for chunk_path in chunk_paths:
+            if os.path.exists(chunk_path) and chunk_path != output_path:
+                try:
+                    os.remove(chunk_path)
+                except OSError:
+                    pass
 
 def split_into_sentences(text):
-    """Split text into sentences for better TTS processing."""
-    import re
-    
-    # Split by sentence endings
-    sentences = re.split(r'[.!?]+', text)
+    """Split text into sentences for better TTS processing (punctuation is kept)."""
+    # Split after sentence endings
+    sentences = re.split(r'(?<=[.!?])\s+', text)
     
     # Clean and filter sentences
     cleaned_sentences = []
@@ -314,9 +555,45 @@ def split_into_sentences(text):
                 sentence += '.'
             cleaned_sentences.append(sentence)
     
-    # If no proper sentences found, split by length
-    if not cleaned_sentences:
-        max_chunk = 200
-        cleaned_sentences = [text[i:i+max_chunk] for i in range(0, len(text), max_chunk)]
+    return cleaned_sentences
+
+def split_long_sentence(sentence, max_length):
+    """Split a sentence longer than max_length at word boundaries."""
+    pieces = []
+    current = ''
+    for word in sentence.split():
+        # Words longer than the budget are cut as a last resort
+        while len(word) > max_length:
+            if current:
+                pieces.append(current)
+                current = ''
+            pieces.append(word[:max_length])
+            word = word[max_length:]
+        
+        if current and len(current) + 1 + len(word) > max_length:
+            pieces.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    
+    if current:
+        pieces.append(current)
+    return pieces
+
+def split_into_chunks(text, max_length=TTS_MAX_CHUNK_LENGTH):
+    """Pack whole sentences into as few chunks as possible, each at most max_length chars."""
+    sentences = split_into_sentences(text) or [text.strip()]
+    
+    chunks = []
+    current = ''
+    for sentence in sentences:
+        for piece in ([sentence] if len(sentence) <= max_length else split_long_sentence(sentence, max_length)):
+            if current and len(current) + 1 + len(piece) > max_length:
+                chunks.append(current)
+                current = piece
+            else:
+                current = f"{current} {piece}" if current else piece
     
-    return cleaned_sentences
\ No newline at end of file
+    if current:
+        chunks.append(current)
+    return chunks
@@ -0,0 +1,67 @@
+import os
+import logging
+from .ffmpeg_renderer import run_ffmpeg, write_concat_list, build_audio_pad_filter
+
+# ==============================================================================
+# AUDIO ASSEMBLY
+# ==============================================================================
+
+def concat_audio_files(input_paths, output_path):
+    """Join audio files of the same format end to end into output_path.
+
+    TTS chunks share codec parameters, so the concat demuxer copies their
+    frames without decoding; if that fails (mismatched streams) they are
+    decoded once and re-encoded to MP3. Returns True on success.
+    """
+    list_path = f"{output_path}.txt"
+    write_concat_list(input_paths, list_path)
+
+    try:
+        success, stderr = run_ffmpeg(['-f', 'concat', '-safe', '0', '-i', list_path, '-c', 'copy', output_path])
+        if not success:
+            logging.warning(f"Stream copy concat failed, re-encoding audio: {stderr}")
+            success, stderr = run_ffmpeg([
+                '-f', 'concat', '-safe', '0', '-i', list_path,
+                '-c:a', 'libmp3lame', '-q:a', '2', output_path
+            ])
+    finally:
+        if os.path.exists(list_path):
+            os.remove(list_path)
+
+    if not success:
+        logging.error(f"Failed to concatenate {len(input_paths)} audio files: {stderr}")
+        return False
+
+    logging.info(f"Concatenated {len(input_paths)} audio files into {output_path}")
+    return True
+
+def assemble_audio_track(tracks, output_path):
+    """Build one pre-mixed track from (audio_path, duration) pairs in a single ffmpeg pass.
+
+    Each narration is padded with silence (apad) and cut to its scene's
+    duration, then all of them are concatenated. The result is written as
+    16-bit PCM WAV so the only lossy step left is the final video encode.
+    Returns True on success.
+    """
+    if not tracks:
+        logging.warning("No audio tracks given to assemble")
+        return False
+
+    input_args = []
+    chains = []
+    for i, (audio_path, duration) in enumerate(tracks):
+        input_args.extend(['-i', audio_path])
+        chains.append(f"[{i}:a]{build_audio_pad_filter(duration)}[a{i}]")
+    chains.append(f"{''.join(f'[a{i}]' for i in range(len(tracks)))}concat=n={len(tracks)}:v=0:a=1[outa]")
+
+    success, stderr = run_ffmpeg(input_args + [
+        '-filter_complex', ';'.join(chains),
+        '-map', '[outa]', '-c:a', 'pcm_s16le', output_path
+    ])
+
+    if not success:
+        logging.error(f"Failed to assemble audio track from {len(tracks)} scenes: {stderr}")
+        return False
+
+    logging.info(f"Assembled audio track of {sum(duration for _, duration in tracks):.2f}s: {output_path}")
+    return True
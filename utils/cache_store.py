@@ -0,0 +1,233 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+import numpy as np
+from threading import Lock
+
+# ==============================================================================
+# HASHING HELPERS
+# ==============================================================================
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def link_or_copy(source_path, dest_path):
+    """Hard link a file when possible, falling back to a copy (e.g. across devices)."""
+    try:
+        os.link(source_path, dest_path)
+    except OSError:
+        shutil.copyfile(source_path, dest_path)
+
+def make_cache_key(*parts):
+    """Build a cache key from any JSON-serializable parts."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+# ==============================================================================
+# PERSISTENT DISK CACHE WITH LRU EVICTION
+# ==============================================================================
+
+# Every DiskCache created in this process, swept on a schedule by the retention worker
+DISK_CACHES = []
+
+class DiskCache:
+    """Content-addressed cache storing one file per key.
+
+    The file modification time doubles as the "last used" timestamp, so hits
+    touch the entry and eviction removes the least recently used files first.
+    Writes only evict once the cache is over its size cap; expired entries
+    are removed by the periodic sweep_disk_caches().
+    """
+
+    def __init__(self, folder, max_bytes, max_age=None, suffix=''):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.max_age = max_age  # Seconds since last use, None to keep forever
+        self.suffix = suffix
+        self.total_bytes = None  # Computed lazily on first write
+        self.lock = Lock()
+        DISK_CACHES.append(self)
+
+    def path_for(self, key):
+        return os.path.join(self.folder, f"{key}{self.suffix}")
+
+    def contains_path(self, path):
+        """Check whether a path lives inside this cache folder."""
+        try:
+            return os.path.commonpath([os.path.abspath(path), os.path.abspath(self.folder)]) == os.path.abspath(self.folder)
+        except ValueError:
+            return False
+
+    def get_path(self, key):
+        """Return the path of a cached entry and mark it as used, or None on a miss."""
+        path = self.path_for(key)
+        try:
+            if self.max_age and time.time() - os.path.getmtime(path) > self.max_age:
+                self._remove(path)
+                raise FileNotFoundError(path)
+            os.utime(path)
+        except OSError:
+            return None
+
+        return path
+
+    def get_json(self, key):
+        """Return a cached JSON value, or None on a miss."""
+        path = self.get_path(key)
+        if not path:
+            return None
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logging.warning(f"Dropping unreadable cache entry {path}: {e}")
+            self._remove(path)
+            return None
+
+    def put_json(self, key, value):
+        """Store a JSON value in the cache."""
+        data = json.dumps(value, ensure_ascii=False).encode('utf-8')
+        return self._store(key, lambda tmp_path: self._write_bytes(tmp_path, data))
+
+    def get_array(self, key):
+        """Return a cached NumPy array, or None on a miss."""
+        path = self.get_path(key)
+        if not path:
+            return None
+
+        try:
+            return np.load(path, allow_pickle=False)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Dropping unreadable cache entry {path}: {e}")
+            self._remove(path)
+            return None
+
+    def put_array(self, key, array):
+        """Store a NumPy array in the cache (raw .npy, cheap to load)."""
+        def write_array(tmp_path):
+            with open(tmp_path, 'wb') as f:
+                np.save(f, array, allow_pickle=False)
+        return self._store(key, write_array)
+
+    def put_file(self, key, source_path):
+        """Link or copy a file into the cache and return the cached path."""
+        return self._store(key, lambda tmp_path: link_or_copy(source_path, tmp_path))
+
+    def copy_to(self, key, dest_path):
+        """Hand out a cached file as a hard link (or copy) at dest_path.
+
+        Returns True on a hit. The caller owns dest_path and may delete it
+        without affecting the cached entry.
+        """
+        path = self.get_path(key)
+        if not path:
+            return False
+
+        try:
+            if os.path.exists(dest_path):
+                os.remove(dest_path)
+            link_or_copy(path, dest_path)
+            return True
+        except OSError as e:
+            logging.warning(f"Failed to use cache entry {path}: {e}")
+            return False
+
+    def _write_bytes(self, path, data):
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    def _store(self, key, writer):
+        os.makedirs(self.folder, exist_ok=True)
+        path = self.path_for(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+
+        try:
+            writer(tmp_path)
+            size = os.path.getsize(tmp_path)
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logging.warning(f"Failed to write cache entry {path}: {e}")
+            if os.path.exists(tmp_path):
+                self._remove(tmp_path)
+            return None
+
+        with self.lock:
+            if self.total_bytes is None:
+                self.total_bytes = self._scan_total()
+            else:
+                self.total_bytes += size - old_size
+            over_limit = self.total_bytes > self.max_bytes
+
+        if over_limit:
+            self.evict()
+        return path
+
+    def _scan_entries(self):
+        entries = []
+        try:
+            with os.scandir(self.folder) as it:
+                for entry in it:
+                    if entry.is_file() and not entry.name.endswith('.tmp'):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _scan_total(self):
+        return sum(size for _, size, _ in self._scan_entries())
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def evict(self):
+        """Remove expired entries, then least recently used ones until under the size cap."""
+        with self.lock:
+            entries = sorted(self._scan_entries())
+            total = sum(size for _, size, _ in entries)
+            now = time.time()
+            removed = 0
+
+            for mtime, size, path in entries:
+                expired = self.max_age and now - mtime > self.max_age
+                if not expired and total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+                removed += 1
+
+            self.total_bytes = total
+
+        if removed:
+            logging.info(f"Evicted {removed} entries from cache {self.folder}")
+        return removed
+
+def has_expiring_caches():
+    """Whether any disk cache has a maximum entry age to enforce."""
+    return any(cache.max_age for cache in DISK_CACHES)
+
+def sweep_disk_caches():
+    """Remove expired entries (and any over the size cap) from every disk cache.
+
+    Returns the number of entries removed.
+    """
+    removed = 0
+    for cache in DISK_CACHES:
+        try:
+            removed += cache.evict()
+        except OSError as e:
+            logging.warning(f"Failed to sweep cache {cache.folder}: {e}")
+    return removed
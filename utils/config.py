@@ -8,6 +8,37 @@ import os
 UPLOAD_FOLDER = os.path.join('static', 'uploads')
 GENERATED_FOLDER = os.path.join('static', 'generated')
 PROMPTS_FILE = 'prompts.json'
+MEDIA_DATABASE_FILE = 'media.db'  # SQLite media registry
+CACHE_FOLDER = 'cache'
+SCRATCH_FOLDER = 'scratch'  # Per-job working directories, removed when the job ends
+
+# Upload limits
+MAX_UPLOAD_FILE_MB = int(os.getenv('MAX_UPLOAD_FILE_MB', 25))  # Per image
+MAX_UPLOAD_REQUEST_MB = int(os.getenv('MAX_UPLOAD_REQUEST_MB', 200))  # Whole form submission
+MAX_CONTENT_LENGTH = MAX_UPLOAD_REQUEST_MB * 1024 * 1024
+ALLOWED_UPLOAD_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp')  # Stored as <sha256><ext>
+
+# Cache settings
+NARRATION_CACHE_MAX_MB = int(os.getenv('NARRATION_CACHE_MAX_MB', 50))
+NARRATION_CACHE_MAX_AGE_DAYS = int(os.getenv('NARRATION_CACHE_MAX_AGE_DAYS', 30))
+TTS_CACHE_MAX_MB = int(os.getenv('TTS_CACHE_MAX_MB', 1024))
+TTS_CACHE_MAX_AGE_DAYS = int(os.getenv('TTS_CACHE_MAX_AGE_DAYS', 30))
+CANVAS_CACHE_MAX_MB = int(os.getenv('CANVAS_CACHE_MAX_MB', 256))
+SEGMENT_CACHE_MAX_MB = int(os.getenv('SEGMENT_CACHE_MAX_MB', 2048))
+
+# Media registry settings
+MEDIA_LIST_PAGE_SIZE = int(os.getenv('MEDIA_LIST_PAGE_SIZE', 50))
+MEDIA_LIST_MAX_PAGE_SIZE = 200
+MEDIA_STATS_RECONCILE_MINUTES = int(os.getenv('MEDIA_STATS_RECONCILE_MINUTES', 15))  # Background re-check of video files
+
+# Retention policies applied by the background retention worker. The media
+# policies are off by default; the worker also sweeps expired cache entries
+RETENTION_INTERVAL_MINUTES = int(os.getenv('RETENTION_INTERVAL_MINUTES', 60))
+MEDIA_RETENTION_DAYS = int(os.getenv('MEDIA_RETENTION_DAYS', 0))  # Delete videos older than this (0 disables)
+MEDIA_DISK_QUOTA_MB = int(os.getenv('MEDIA_DISK_QUOTA_MB', 0))  # Evict least recently used videos above this total (0 disables)
+RETENTION_DELETE_ORPHANS = os.getenv('RETENTION_DELETE_ORPHANS', 'false').lower() == 'true'  # Also sweep unregistered files
+ORPHAN_GRACE_HOURS = int(os.getenv('ORPHAN_GRACE_HOURS', 24))  # Unregistered files younger than this are kept
+RETENTION_BATCH_SIZE = 500  # Media deleted per registry transaction
 
 # Model and language lists
 TTS_VOICES = [
@@ -32,7 +63,49 @@ GPU_ACCELERATION_OPTIONS = [
     {"value": "amd", "label": "AMD AMF", "description": "AMD GPU acceleration"}
 ]
 
+# Render engine options
+RENDER_ENGINE_OPTIONS = [
+    {"value": "moviepy", "label": "MoviePy (Compatible)", "description": "Composite every frame in Python with MoviePy"},
+    {"value": "ffmpeg", "label": "FFmpeg Filtergraph (Fast)", "description": "Render all scenes with a single ffmpeg command"}
+]
+
+# Hardware encoder probe results are cached and refreshed in the background
+ENCODER_CAPABILITIES_FILE = os.path.join(CACHE_FOLDER, 'encoder_capabilities.json')
+ENCODER_PROBE_TTL_HOURS = int(os.getenv('ENCODER_PROBE_TTL_HOURS', 24))
+
+# Scene segments are rendered in parallel and joined without re-encoding
+PARALLEL_SEGMENT_RENDERING = os.getenv('PARALLEL_SEGMENT_RENDERING', 'true').lower() == 'true'
+RENDER_WORKERS = int(os.getenv('RENDER_WORKERS', os.cpu_count() or 1))  # CPU segment renders shared by all jobs
+HW_ENCODER_MAX_SESSIONS = int(os.getenv('HW_ENCODER_MAX_SESSIONS', 2))  # Consumer GPUs limit concurrent encodes
+
+# Background job settings
+MAX_CONCURRENT_JOBS = int(os.getenv('MAX_CONCURRENT_JOBS', 2))  # Video jobs rendered in parallel
+MAX_QUEUED_JOBS = int(os.getenv('MAX_QUEUED_JOBS', 10))  # Jobs waiting for a free worker
+JOB_RETENTION_SECONDS = 3600  # How long finished jobs stay queryable
+JOB_EVENT_HISTORY = 500  # Progress events kept per job so reconnecting clients can catch up
+JOB_EVENTS_HEARTBEAT_SECONDS = 15  # Keep-alive comment interval on idle event streams
+RENDER_PROGRESS_INTERVAL = float(os.getenv('RENDER_PROGRESS_INTERVAL', 0.5))  # Min seconds between frame progress events
+SCENE_WORKERS = int(os.getenv('SCENE_WORKERS', 4))  # Scenes narrated/voiced concurrently per job
+TTS_CHUNK_WORKERS = int(os.getenv('TTS_CHUNK_WORKERS', 4))  # Chunks of one long narration requested concurrently
+TTS_CHUNK_RETRIES = int(os.getenv('TTS_CHUNK_RETRIES', 2))  # Extra attempts per failed chunk
+
+# Images sent to the vision model are downscaled and re-encoded first
+VISION_IMAGE_MAX_EDGE = int(os.getenv('VISION_IMAGE_MAX_EDGE', 1024))
+VISION_IMAGE_FORMAT = os.getenv('VISION_IMAGE_FORMAT', 'JPEG')  # JPEG or WEBP
+VISION_IMAGE_QUALITY = int(os.getenv('VISION_IMAGE_QUALITY', 85))
+NARRATION_BATCH_SIZE = int(os.getenv('NARRATION_BATCH_SIZE', 6))  # Panels narrated per vision request in full-AI mode (1 disables batching)
+
+# HTTP client settings for the Pollinations API
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 10))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 90))
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', 3))
+HTTP_BACKOFF_BASE = 1.0  # Seconds, doubled on every retry
+HTTP_BACKOFF_MAX = 30.0
+HTTP_POOL_SIZE = 10  # Keep-alive connections per host
+
 def ensure_directories():
     """Create necessary directories if they don't exist."""
     os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-    os.makedirs(GENERATED_FOLDER, exist_ok=True)
\ No newline at end of file
+    os.makedirs(GENERATED_FOLDER, exist_ok=True)
+    os.makedirs(CACHE_FOLDER, exist_ok=True)
+    os.makedirs(SCRATCH_FOLDER, exist_ok=True)
\ No newline at end of file
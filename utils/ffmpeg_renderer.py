@@ -0,0 +1,191 @@
+import os
+import logging
+import subprocess
+from moviepy.config import get_setting
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+from .gpu_detector import get_encoder_ffmpeg_args, get_encoder_params
+
+# ==============================================================================
+# FFMPEG HELPERS
+# ==============================================================================
+
+def get_ffmpeg_binary():
+    """Get the ffmpeg binary used by MoviePy (system ffmpeg or imageio-ffmpeg)."""
+    return get_setting("FFMPEG_BINARY")
+
+def get_media_duration(path):
+    """Get the duration of an audio or video file in seconds."""
+    return ffmpeg_parse_infos(path)['duration']
+
+def run_ffmpeg(args, timeout=None):
+    """Run ffmpeg with the given arguments, returning (success, stderr)."""
+    cmd = [get_ffmpeg_binary(), '-y', '-hide_banner', '-loglevel', 'error'] + args
+
+    popen_params = {}
+    if os.name == "nt":
+        popen_params["creationflags"] = 0x08000000  # CREATE_NO_WINDOW
+
+    try:
+        result = subprocess.run(cmd, capture_output=True, timeout=timeout, **popen_params)
+    except (subprocess.TimeoutExpired, FileNotFoundError) as e:
+        return False, str(e)
+
+    return result.returncode == 0, result.stderr.decode(errors='ignore')
+
+def write_concat_list(paths, list_path):
+    """Write an input list for ffmpeg's concat demuxer."""
+    with open(list_path, 'w', encoding='utf-8') as f:
+        for path in paths:
+            # Absolute paths, single-quoted and escaped for the demuxer syntax
+            escaped = os.path.abspath(path).replace('\\', '/').replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+def get_video_codec_args(encoder_params):
+    """Build the ffmpeg video codec arguments for the given encoder params."""
+    codec = encoder_params['codec']
+    args = ['-c:v', codec]
+    if codec in ('libx264', 'h264_nvenc'):
+        args.extend(['-preset', encoder_params.get('preset', 'medium')])
+    args.extend(get_encoder_ffmpeg_args(encoder_params))
+    return args
+
+# ==============================================================================
+# FILTERGRAPH BUILDERS
+# ==============================================================================
+
+def build_positioning_filter(positioning, target_w, target_h):
+    """Filter chain that turns a decoded image into a target-size canvas."""
+    if positioning == 'center_blur':
+        # Stretched and blurred background with the whole image centered on top;
+        # the blur runs at 1/8 resolution and is scaled back up
+        return (
+            f"split=2[bg][fg];"
+            f"[bg]scale={max(target_w // 8, 1)}:{max(target_h // 8, 1)},boxblur=3:2,"
+            f"scale={target_w}:{target_h}:flags=bicubic[blurred];"
+            f"[fg]scale={target_w}:{target_h}:force_original_aspect_ratio=decrease[front];"
+            f"[blurred][front]overlay=(W-w)/2:(H-h)/2"
+        )
+
+    # Cover the canvas, cropping whatever overflows (fit_screen and default)
+    return (
+        f"scale={target_w}:{target_h}:force_original_aspect_ratio=increase,"
+        f"crop={target_w}:{target_h}"
+    )
+
+def build_audio_pad_filter(duration):
+    """Audio chain that pads a narration with silence and cuts it to exactly duration seconds."""
+    return (
+        f"aresample=44100,aformat=channel_layouts=stereo,"
+        f"apad=whole_dur={duration:.3f},atrim=0:{duration:.3f}"
+    )
+
+def build_movement_filter(effect_type, intensity, frames, target_w, target_h, fps):
+    """Zoompan filter reproducing the Ken Burns effects of apply_ken_burns_effect.
+
+    The canvas is upscaled 2x first so zoompan's integer crop offsets don't
+    make the motion jitter.
+    """
+    zoom_factor = 1 + intensity * 3
+    travel_factor = intensity * 4
+    # Pan distance in canvas pixels, see apply_ken_burns_effect
+    range_x = (zoom_factor - 1) / 2 * travel_factor / zoom_factor
+    range_y = range_x
+    progress = f"(on/{max(frames - 1, 1)})"
+
+    center_x = "(iw-iw/zoom)/2"
+    center_y = "(ih-ih/zoom)/2"
+
+    if effect_type == 'zoom_in':
+        zoom = f"1+{zoom_factor - 1}*{progress}"
+        x, y = center_x, center_y
+    elif effect_type == 'zoom_out':
+        zoom = f"{zoom_factor}-{zoom_factor - 1}*{progress}"
+        x, y = center_x, center_y
+    else:
+        zoom = f"{zoom_factor}"
+        x, y = center_x, center_y
+        if effect_type == 'pan_right':
+            x = f"{center_x}+iw*{range_x}*{progress}"
+        elif effect_type == 'pan_left':
+            x = f"{center_x}-iw*{range_x}*{progress}"
+        elif effect_type == 'pan_up':
+            y = f"{center_y}-ih*{range_y}*{progress}"
+        elif effect_type == 'pan_down':
+            y = f"{center_y}+ih*{range_y}*{progress}"
+
+    return (
+        f"scale={target_w * 2}:{target_h * 2},"
+        f"zoompan=z='{zoom}':x='{x}':y='{y}':d={frames}:s={target_w}x{target_h}:fps={fps}"
+    )
+
+def build_filtergraph(scene_specs, target_w, target_h, fps):
+    """Build the complete filtergraph for a list of scene specs.
+
+    Inputs are expected in pairs: image (2*i) and audio (2*i + 1).
+    """
+    chains = []
+    concat_inputs = []
+
+    for i, spec in enumerate(scene_specs):
+        frames = spec['frames']
+        duration = frames / fps
+        video_chain = f"[{2 * i}:v]{build_positioning_filter(spec['positioning'], target_w, target_h)}"
+
+        if spec.get('effect'):
+            video_chain += f"," + build_movement_filter(spec['effect'], spec['intensity'], frames, target_w, target_h, fps)
+        else:
+            # Repeat the single composed frame instead of re-scaling every frame
+            video_chain += f",loop=loop={frames - 1}:size=1:start=0,setpts=N/({fps}*TB)"
+
+        chains.append(f"{video_chain},setsar=1,format=yuv420p[v{i}]")
+        # Pad the narration with the pause and cut it to the exact scene length
+        chains.append(f"[{2 * i + 1}:a]{build_audio_pad_filter(duration)}[a{i}]")
+        concat_inputs.append(f"[v{i}][a{i}]")
+
+    chains.append(f"{''.join(concat_inputs)}concat=n={len(scene_specs)}:v=1:a=1[outv][outa]")
+    return ";".join(chains)
+
+# ==============================================================================
+# RENDERING
+# ==============================================================================
+
+def render_video_with_ffmpeg(scene_specs, output_path, target_w, target_h, encoder_params, fps=24, allow_cpu_fallback=True):
+    """Render scene specs into one video with a single ffmpeg invocation.
+
+    Each spec is a dict with image_path, audio_path, frames, positioning
+    ('cover' or 'center_blur'), and optionally effect and intensity.
+    Returns True on success. A failing hardware encoder is retried on the CPU
+    unless allow_cpu_fallback is False.
+    """
+    if not scene_specs:
+        logging.warning("No scenes given to the ffmpeg renderer")
+        return False
+
+    input_args = []
+    for spec in scene_specs:
+        input_args.extend(['-i', spec['image_path'], '-i', spec['audio_path']])
+
+    filtergraph = build_filtergraph(scene_specs, target_w, target_h, fps)
+    output_args = [
+        '-filter_complex', filtergraph,
+        '-map', '[outv]', '-map', '[outa]',
+        '-r', str(fps),
+        '-c:a', encoder_params.get('audio_codec', 'aac'), '-b:a', '192k',
+        '-movflags', '+faststart'
+    ]
+
+    logging.info(f"Rendering {len(scene_specs)} scenes with ffmpeg using {encoder_params['codec']}...")
+    success, stderr = run_ffmpeg(input_args + output_args + get_video_codec_args(encoder_params) + [output_path])
+
+    if not success and allow_cpu_fallback and encoder_params['codec'] != 'libx264':
+        logging.error(f"Hardware encoding failed: {stderr}")
+        logging.info("Falling back to CPU encoding...")
+        cpu_params = get_encoder_params('libx264')
+        success, stderr = run_ffmpeg(input_args + output_args + get_video_codec_args(cpu_params) + [output_path])
+
+    if not success:
+        logging.error(f"ffmpeg rendering failed: {stderr}")
+        return False
+
+    logging.info(f"Video successfully rendered with ffmpeg: {output_path}")
+    return True
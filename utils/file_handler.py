@@ -1,31 +1,127 @@
 import os
 import uuid
+import shutil
+import hashlib
 import logging
+import tempfile
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
+from .config import MAX_UPLOAD_FILE_MB, ALLOWED_UPLOAD_EXTENSIONS
 
-def save_uploaded_file(file, upload_folder):
+# ==============================================================================
+# STREAMING UPLOAD INGESTION
+# ==============================================================================
+
+class HashingUploadFile:
+    """Writable file handed to Werkzeug's multipart parser for each uploaded file.
+
+    Parts are written to a temp file in the upload folder chunk by chunk as
+    they arrive, hashed on the way and cut off once they exceed max_bytes.
+    Unless finalize() moves it into place, the temp file is removed on close.
     """
-    Menyimpan file yang diunggah ke folder yang ditentukan dengan nama yang unik.
-    Sangat penting, fungsi ini mengembalikan path lengkap ke file yang disimpan.
+
+    def __init__(self, folder, max_bytes):
+        os.makedirs(folder, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(prefix='upload_', suffix='.part', dir=folder)
+        self.file = os.fdopen(fd, 'w+b')
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.max_bytes = max_bytes
+        self.finalized = False
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            self.close()
+            raise RequestEntityTooLarge(f"Each image must be at most {self.max_bytes // (1024 * 1024)} MB")
+        self.digest.update(data)
+        return self.file.write(data)
+
+    def hexdigest(self):
+        return self.digest.hexdigest()
+
+    def finalize(self, dest_path):
+        """Move the upload to dest_path; returns False if identical content was already stored there."""
+        self.file.close()
+        self.finalized = True
+        if os.path.exists(dest_path):
+            os.remove(self.path)
+            # Refresh the mtime so the orphan grace period covers the reused file too
+            os.utime(dest_path)
+            return False
+        os.replace(self.path, dest_path)
+        return True
+
+    def close(self):
+        self.file.close()
+        if not self.finalized and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __getattr__(self, name):
+        # read/seek/tell/readline etc. go to the underlying file
+        return getattr(self.file, name)
+
+class StreamingUploadRequest(Request):
+    """Request class that streams file parts straight into the upload folder."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        stream = HashingUploadFile(current_app.config['UPLOAD_FOLDER'], MAX_UPLOAD_FILE_MB * 1024 * 1024)
+        # Tracked separately so parts are cleaned up even if parsing fails halfway
+        self.__dict__.setdefault('upload_streams', []).append(stream)
+        return stream
+
+    def close(self):
+        super().close()
+        for stream in self.__dict__.get('upload_streams', []):
+            stream.close()
+
+def ingest_uploaded_file(file, upload_folder):
+    """Store an upload under its SHA-256 content hash, deduplicating identical files.
+
+    Returns (path, content_hash), or (None, None) if the file can't be saved.
     """
     if not file or not file.filename:
         logging.warning("Upaya penyimpanan file gagal: tidak ada file atau nama file.")
-        return None
-    
-    # Membersihkan nama file untuk keamanan
-    filename = secure_filename(file.filename)
-    # Membuat nama file yang unik untuk menghindari penimpaan file
-    unique_filename = f"{uuid.uuid4().hex}_{filename}"
-    # Membuat path lengkap tempat file akan disimpan
-    full_path = os.path.join(upload_folder, unique_filename)
-    
+        return None, None
+
+    extension = os.path.splitext(secure_filename(file.filename))[1].lower()
+    if extension not in ALLOWED_UPLOAD_EXTENSIONS:
+        logging.warning(f"Ekstensi file {file.filename} tidak didukung, file dilewati.")
+        return None, None
+
+    stream = file.stream
+    owns_stream = not isinstance(stream, HashingUploadFile)
     try:
-        file.save(full_path)
-        logging.info(f"File berhasil disimpan di: {full_path}")
-        return full_path # Mengembalikan path lengkap yang benar
+        if owns_stream:
+            # Not parsed by StreamingUploadRequest: copy it over in chunks
+            stream = HashingUploadFile(upload_folder, MAX_UPLOAD_FILE_MB * 1024 * 1024)
+            shutil.copyfileobj(file.stream, stream, 1024 * 1024)
+
+        content_hash = stream.hexdigest()
+        full_path = os.path.join(upload_folder, f"{content_hash}{extension}")
+        if stream.finalize(full_path):
+            logging.info(f"File berhasil disimpan di: {full_path} ({stream.size / 1024:.0f} KB)")
+        else:
+            logging.info(f"File {file.filename} identik dengan {full_path}, memakai file yang sudah ada")
+        return full_path, content_hash
+    except RequestEntityTooLarge:
+        raise
     except Exception as e:
-        logging.error(f"Terjadi kesalahan saat menyimpan file {full_path}: {e}")
-        return None
+        logging.error(f"Terjadi kesalahan saat menyimpan file {file.filename}: {e}")
+        return None, None
+    finally:
+        # Removes our temp .part file unless finalize() moved it into place
+        if owns_stream and isinstance(stream, HashingUploadFile):
+            stream.close()
+
+def save_uploaded_file(file, upload_folder):
+    """
+    Menyimpan file yang diunggah ke folder yang ditentukan (berdasarkan hash isinya).
+    Sangat penting, fungsi ini mengembalikan path lengkap ke file yang disimpan.
+    """
+    full_path, _ = ingest_uploaded_file(file, upload_folder)
+    return full_path
 
 def generate_unique_filename(prefix, extension, folder):
     """Menghasilkan nama file yang unik dengan path lengkap di dalam folder yang ditentukan."""
@@ -2,6 +2,12 @@ import subprocess
 import logging
 import platform
 import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from .config import ENCODER_CAPABILITIES_FILE, ENCODER_PROBE_TTL_HOURS
 
 def detect_available_encoders():
     """Detect available hardware encoders on the system."""
@@ -96,37 +102,21 @@ def detect_amd_hardware():
     
     return False
 
+# Priority order: NVIDIA > Intel > AMD > CPU
+ENCODER_PRIORITY = ['nvidia_nvenc', 'intel_qsv', 'amd_amf', 'cpu']
+
 def get_best_encoder(enable_gpu=True):
-    """Get the best available encoder based on system capabilities."""
+    """Get the best available encoder based on the cached capability probe."""
     if not enable_gpu:
         return 'libx264', 'CPU (libx264)'
     
-    encoders = detect_available_encoders()
-    
-    # Priority order: NVIDIA > Intel > AMD > CPU
-    priority_order = ['nvidia_nvenc', 'intel_qsv', 'amd_amf', 'cpu']
+    encoders = get_encoder_registry().get_capabilities()['encoders']
     
-    for encoder_type in priority_order:
-        if encoders[encoder_type]['available']:
-            codec = encoders[encoder_type]['codec']
-            name = encoders[encoder_type]['name']
-            
-            # For AMD AMF, use more lenient testing
-            if encoder_type == 'amd_amf':
-                if test_amd_encoder_lenient():
-                    logging.info(f"Selected encoder: {name} ({codec})")
-                    return codec, name
-                else:
-                    logging.warning("AMD AMF encoder failed lenient test, skipping")
-                    continue
-            else:
-                # Use standard testing for other encoders
-                if encoder_type == 'cpu' or test_encoder(codec):
-                    logging.info(f"Selected encoder: {name} ({codec})")
-                    return codec, name
-                else:
-                    logging.warning(f"{name} encoder failed test, trying next option")
-                    continue
+    for encoder_type in ENCODER_PRIORITY:
+        encoder = encoders.get(encoder_type)
+        if encoder and encoder.get('working'):
+            logging.info(f"Selected encoder: {encoder['name']} ({encoder['codec']})")
+            return encoder['codec'], encoder['name']
     
     # Fallback to CPU
     return 'libx264', 'CPU (libx264)'
@@ -165,6 +155,35 @@ def get_encoder_params(codec):
     
     return params.get(codec, params['libx264'])
 
+def get_encoder_ffmpeg_args(encoder_params):
+    """Get codec-specific ffmpeg quality arguments for the given encoder params."""
+    codec = encoder_params['codec']
+    ffmpeg_args = []
+    
+    if codec == 'libx264':
+        if 'crf' in encoder_params:
+            ffmpeg_args = ['-crf', str(encoder_params['crf'])]
+    elif codec == 'h264_qsv':
+        if 'global_quality' in encoder_params:
+            ffmpeg_args = ['-global_quality', str(encoder_params['global_quality'])]
+    elif codec == 'h264_nvenc':
+        if 'cq' in encoder_params:
+            ffmpeg_args = ['-cq', str(encoder_params['cq'])]
+    elif codec == 'h264_amf':
+        # Improved AMD AMF parameters
+        ffmpeg_args = ['-rc', 'cqp']
+        if 'qp_i' in encoder_params:
+            ffmpeg_args.extend(['-qp_i', str(encoder_params['qp_i'])])
+        if 'qp_p' in encoder_params:
+            ffmpeg_args.extend(['-qp_p', str(encoder_params['qp_p'])])
+        if 'qp_b' in encoder_params:
+            ffmpeg_args.extend(['-qp_b', str(encoder_params['qp_b'])])
+        
+        # Add AMD-specific optimizations
+        ffmpeg_args.extend(['-usage', 'transcoding', '-profile:v', 'main'])
+    
+    return ffmpeg_args
+
 def test_encoder(codec):
     """Test if a specific encoder is working properly."""
     if codec == 'libx264':
@@ -290,4 +309,152 @@ def validate_encoder_before_use(codec):
         
     except Exception as e:
         logging.warning(f"Encoder {codec} validation failed with exception: {e}")
-        return False
\ No newline at end of file
+        return False
+
+# ==============================================================================
+# CACHED ENCODER CAPABILITY REGISTRY
+# ==============================================================================
+
+def get_environment_fingerprint():
+    """Fingerprint of the ffmpeg binary and GPU drivers; probe results are only reused while it matches."""
+    parts = [platform.platform()]
+    
+    ffmpeg_path = shutil.which('ffmpeg')
+    parts.append(ffmpeg_path)
+    if ffmpeg_path:
+        stat = os.stat(ffmpeg_path)
+        parts.extend([stat.st_size, int(stat.st_mtime)])
+    
+    # Linux exposes driver versions as files; elsewhere the TTL picks up driver updates
+    for driver_file in ('/proc/driver/nvidia/version', '/sys/module/amdgpu/version'):
+        try:
+            with open(driver_file, 'r') as f:
+                parts.append(f.readline().strip())
+        except OSError:
+            parts.append(None)
+    
+    return hashlib.sha256(json.dumps(parts).encode('utf-8')).hexdigest()
+
+def probe_encoder_capabilities():
+    """Detect and test every hardware encoder once."""
+    encoders = detect_available_encoders()
+    
+    for info in encoders.values():
+        codec = info['codec']
+        if codec == 'libx264':
+            info['working'] = True
+        elif not info['available']:
+            info['working'] = False
+        else:
+            # For AMD AMF, use more lenient testing
+            passed = test_amd_encoder_lenient() if codec == 'h264_amf' else test_encoder(codec)
+            info['working'] = passed and validate_encoder_before_use(codec)
+            if not info['working']:
+                logging.warning(f"{info['name']} encoder failed test")
+    
+    return {
+        'encoders': encoders,
+        'fingerprint': get_environment_fingerprint(),
+        'probed_at': time.time()
+    }
+
+class EncoderCapabilityRegistry:
+    """Probes the encoders once and serves the results from memory.
+    
+    Results are persisted together with an environment fingerprint so restarts
+    can skip probing, and are refreshed in the background once the TTL expires
+    (callers keep getting the previous results meanwhile).
+    """
+    
+    def __init__(self, cache_file, ttl):
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.capabilities = None
+        self.probe_lock = threading.Lock()
+        self.state_lock = threading.Lock()
+        self.refreshing = False
+    
+    def get_capabilities(self):
+        """Get encoder capabilities, probing only if nothing usable is cached."""
+        capabilities = self.capabilities or self.load()
+        if capabilities is None:
+            capabilities = self.probe()
+        elif time.time() - capabilities['probed_at'] > self.ttl:
+            self.refresh_in_background()
+        return capabilities
+    
+    def is_working(self, codec):
+        """Check whether a codec passed its capability probe."""
+        if codec == 'libx264':
+            return True
+        encoders = self.get_capabilities()['encoders']
+        return any(info['codec'] == codec and info.get('working') for info in encoders.values())
+    
+    def load(self):
+        """Load persisted capabilities if they belong to this environment."""
+        try:
+            with open(self.cache_file, 'r') as f:
+                capabilities = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        
+        if capabilities.get('fingerprint') != get_environment_fingerprint():
+            logging.info("Encoder environment changed, capabilities will be probed again")
+            return None
+        
+        self.capabilities = capabilities
+        logging.info(f"Loaded cached encoder capabilities from {self.cache_file}")
+        return capabilities
+    
+    def save(self, capabilities):
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            tmp_file = f"{self.cache_file}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(capabilities, f, indent=2)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            logging.warning(f"Could not save encoder capabilities: {e}")
+    
+    def probe(self, force=False):
+        """Run the encoder probe; concurrent callers wait for a single probe."""
+        with self.probe_lock:
+            if self.capabilities and not force:
+                return self.capabilities
+            
+            start_time = time.monotonic()
+            capabilities = probe_encoder_capabilities()
+            self.capabilities = capabilities
+            self.save(capabilities)
+            logging.info(f"Encoder capabilities probed in {time.monotonic() - start_time:.1f}s")
+            return capabilities
+    
+    def refresh_in_background(self):
+        """Re-probe in a daemon thread unless a refresh is already running."""
+        with self.state_lock:
+            if self.refreshing:
+                return
+            self.refreshing = True
+        
+        def refresh():
+            try:
+                self.probe(force=True)
+            except Exception as e:
+                logging.warning(f"Background encoder probe failed: {e}")
+            finally:
+                self.refreshing = False
+        
+        threading.Thread(target=refresh, name='encoder-probe', daemon=True).start()
+    
+    def warm_up(self):
+        """Load persisted capabilities or start probing in the background at startup."""
+        capabilities = self.capabilities or self.load()
+        if capabilities is None or time.time() - capabilities['probed_at'] > self.ttl:
+            self.refresh_in_background()
+
+# Global encoder registry instance
+encoder_registry = EncoderCapabilityRegistry(ENCODER_CAPABILITIES_FILE, ENCODER_PROBE_TTL_HOURS * 3600)
+
+def get_encoder_registry():
+    """Get the global encoder capability registry."""
+    return encoder_registry
@@ -0,0 +1,132 @@
+import time
+import random
+import logging
+import requests
+from threading import Lock
+from requests.adapters import HTTPAdapter
+from .config import (
+    HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_MAX_RETRIES,
+    HTTP_BACKOFF_BASE, HTTP_BACKOFF_MAX, HTTP_POOL_SIZE
+)
+
+# ==============================================================================
+# SHARED HTTP SESSION
+# ==============================================================================
+
+# Status codes worth retrying (rate limited or transient server errors)
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+# A POST may have been processed despite a 5xx or gateway timeout; only retry
+# answers that mean the request was not handled
+RETRYABLE_POST_STATUS_CODES = {408, 429, 503}
+
+_session = None
+_session_lock = Lock()
+
+def get_session():
+    """Get the shared HTTP session with keep-alive connection pooling."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+            _session.mount('https://', adapter)
+            _session.mount('http://', adapter)
+        return _session
+
+# ==============================================================================
+# PER-ENDPOINT METRICS
+# ==============================================================================
+
+_metrics = {}
+_metrics_lock = Lock()
+
+def record_request(endpoint, status_code, latency, retries, success):
+    """Record the outcome of one logical request (including its retries)."""
+    with _metrics_lock:
+        stats = _metrics.setdefault(endpoint, {
+            'requests': 0,
+            'successes': 0,
+            'failures': 0,
+            'retries': 0,
+            'total_latency': 0.0,
+            'max_latency': 0.0,
+            'last_status': None
+        })
+        stats['requests'] += 1
+        stats['successes' if success else 'failures'] += 1
+        stats['retries'] += retries
+        stats['total_latency'] += latency
+        stats['max_latency'] = max(stats['max_latency'], latency)
+        stats['last_status'] = status_code
+
+def get_http_metrics():
+    """Get request metrics per endpoint."""
+    with _metrics_lock:
+        metrics = {}
+        for endpoint, stats in _metrics.items():
+            metrics[endpoint] = dict(stats)
+            metrics[endpoint]['avg_latency'] = round(stats['total_latency'] / stats['requests'], 3) if stats['requests'] else 0
+            metrics[endpoint]['total_latency'] = round(stats['total_latency'], 3)
+            metrics[endpoint]['max_latency'] = round(stats['max_latency'], 3)
+        return metrics
+
+# ==============================================================================
+# REQUESTS WITH RETRY AND BACKOFF
+# ==============================================================================
+
+def get_backoff_delay(attempt, response=None):
+    """Exponential backoff with full jitter, honouring Retry-After when given."""
+    if response is not None:
+        retry_after = response.headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), HTTP_BACKOFF_MAX)
+
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)))
+
+def request_with_retry(method, url, endpoint, max_retries=HTTP_MAX_RETRIES, timeout=None, throttle=None, **kwargs):
+    """Send a request through the shared session, retrying transient failures.
+
+    throttle, if given, is called before every attempt (e.g. to take a rate
+    limit token), so retries are paced like any other request. POSTs are not
+    retried after a read timeout or an error status the server may have
+    acted on, since that could repeat the work. Returns the final response
+    (which may still be an error status) or raises the last network
+    exception once retries are exhausted.
+    """
+    session = get_session()
+    timeout = timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+    retryable_status_codes = RETRYABLE_POST_STATUS_CODES if method == 'POST' else RETRYABLE_STATUS_CODES
+    start_time = time.monotonic()
+    attempt = 0
+
+    while True:
+        response = None
+        if throttle:
+            throttle()
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+            if response.status_code not in retryable_status_codes or attempt >= max_retries:
+                record_request(endpoint, response.status_code, time.monotonic() - start_time,
+                               attempt, response.ok)
+                return response
+            logging.warning(f"{endpoint}: HTTP {response.status_code}, retrying ({attempt + 1}/{max_retries})")
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            maybe_processed = method == 'POST' and isinstance(e, requests.exceptions.ReadTimeout)
+            if attempt >= max_retries or maybe_processed:
+                record_request(endpoint, None, time.monotonic() - start_time, attempt, False)
+                raise
+            logging.warning(f"{endpoint}: {e.__class__.__name__}, retrying ({attempt + 1}/{max_retries})")
+
+        delay = get_backoff_delay(attempt, response)
+        if response is not None:
+            response.close()
+        time.sleep(delay)
+        attempt += 1
+
+def http_get(url, endpoint, **kwargs):
+    """GET request with pooling and retries."""
+    return request_with_retry('GET', url, endpoint, **kwargs)
+
+def http_post(url, endpoint, **kwargs):
+    """POST request with pooling and retries."""
+    return request_with_retry('POST', url, endpoint, **kwargs)
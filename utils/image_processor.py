@@ -0,0 +1,178 @@
+import io
+import os
+import math
+import logging
+import mimetypes
+import numpy as np
+from PIL import Image, ImageOps, ImageFilter
+from .cache_store import DiskCache, hash_file, make_cache_key
+from .config import CACHE_FOLDER, CANVAS_CACHE_MAX_MB
+
+# ==============================================================================
+# IMAGE PREPARATION FOR THE VISION MODEL
+# ==============================================================================
+
+VISION_MIME_TYPES = {
+    'JPEG': 'image/jpeg',
+    'WEBP': 'image/webp'
+}
+
+def flatten_to_rgb(image):
+    """Convert an image to RGB, compositing any transparency onto white."""
+    if image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info):
+        rgba = image.convert('RGBA')
+        background = Image.new('RGB', rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.split()[-1])
+        return background
+    return image.convert('RGB')
+
+def encode_image_for_vision(image_path, max_edge=1024, image_format='JPEG', quality=85):
+    """Downscale and re-encode an image in memory for upload to the vision model.
+
+    Returns (image_bytes, mime_type). Falls back to the original file bytes
+    (with a mime type guessed from the extension) if the image can't be decoded.
+    """
+    original_size = os.path.getsize(image_path)
+    image_format = image_format.upper()
+
+    try:
+        with Image.open(image_path) as image:
+            # Let the JPEG decoder skip detail we would throw away anyway
+            image.draft('RGB', (max_edge, max_edge))
+            image = ImageOps.exif_transpose(image)
+            image = flatten_to_rgb(image)
+            image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+            buffer = io.BytesIO()
+            image.save(buffer, format=image_format, quality=quality, optimize=True)
+            data = buffer.getvalue()
+    except Exception as e:
+        logging.warning(f"Could not preprocess {os.path.basename(image_path)}, sending original: {e}")
+        with open(image_path, 'rb') as f:
+            data = f.read()
+        mime_type = mimetypes.guess_type(image_path)[0] or 'image/jpeg'
+        return data, mime_type
+
+    saved = original_size - len(data)
+    logging.info(
+        f"Prepared {os.path.basename(image_path)} for vision: {original_size / 1024:.0f} KB -> "
+        f"{len(data) / 1024:.0f} KB ({image.size[0]}x{image.size[1]} {image_format}, saved {saved / 1024:.0f} KB)"
+    )
+    return data, VISION_MIME_TYPES.get(image_format, 'image/jpeg')
+
+# ==============================================================================
+# SCENE CANVAS NORMALIZATION
+# ==============================================================================
+
+# EXIF orientations that rotate the image by 90 degrees
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+def needs_convert_before_reduce(mode):
+    """Modes Image.reduce() rejects ("image has wrong mode") or can't average (palette indices)."""
+    return mode in ('1', 'P', 'PA') or mode.startswith('I;16')
+
+def load_scaled_image(image_path, target_w, target_h, cover=True):
+    """Decode an image at roughly the size it will be shown at on the canvas.
+
+    With cover=True the decoded image is large enough to fill the canvas,
+    otherwise large enough to fit inside it. JPEGs are decoded at a reduced
+    scale via draft mode; other formats are shrunk with a cheap integer
+    reduce() before any high-quality resampling.
+    """
+    with Image.open(image_path) as image:
+        original_size = image.size
+        # Work in stored (pre-rotation) orientation until exif_transpose
+        if image.getexif().get(0x0112) in TRANSPOSED_ORIENTATIONS:
+            target_w, target_h = target_h, target_w
+
+        pick = max if cover else min
+        scale = min(1.0, pick(target_w / image.width, target_h / image.height))
+        min_w = max(1, math.ceil(image.width * scale))
+        min_h = max(1, math.ceil(image.height * scale))
+
+        image.draft('RGB', (min_w, min_h))
+        factor = min(image.width // min_w, image.height // min_h)
+        if factor >= 2:
+            if needs_convert_before_reduce(image.mode):
+                # convert() keeps image.info, so the EXIF orientation still applies below
+                has_alpha = image.mode == 'PA' or 'transparency' in image.info
+                image = image.convert('RGBA' if has_alpha else 'RGB')
+            image = image.reduce(factor)
+        image = ImageOps.exif_transpose(image)
+        image = flatten_to_rgb(image)
+
+    logging.info(
+        f"Decoded {os.path.basename(image_path)}: {original_size[0]}x{original_size[1]} -> "
+        f"{image.width}x{image.height}"
+    )
+    return image
+
+def build_cover_canvas(image, target_w, target_h):
+    """Scale the image to cover the canvas and crop the overflow around the center."""
+    scale = max(target_w / image.width, target_h / image.height)
+    resized_w = max(target_w, round(image.width * scale))
+    resized_h = max(target_h, round(image.height * scale))
+    resized = image.resize((resized_w, resized_h), Image.Resampling.LANCZOS)
+
+    left = (resized_w - target_w) // 2
+    top = (resized_h - target_h) // 2
+    return resized.crop((left, top, left + target_w, top + target_h))
+
+def build_blurred_background(image, target_w, target_h, blur_radius=30, downscale=8):
+    """Blurred, stretched background computed at 1/downscale resolution and upscaled.
+
+    A wide Gaussian blur removes all the detail a full-resolution pass would
+    compute, so blurring a small copy with a proportionally smaller radius
+    looks the same at a fraction of the cost.
+    """
+    small_w = max(1, math.ceil(target_w / downscale))
+    small_h = max(1, math.ceil(target_h / downscale))
+    small = image.resize((small_w, small_h), Image.Resampling.BOX)
+    small = small.filter(ImageFilter.GaussianBlur(radius=blur_radius / downscale))
+    return small.resize((target_w, target_h), Image.Resampling.BICUBIC)
+
+def build_center_blur_canvas(image, target_w, target_h, blur_radius=30):
+    """Stretched, blurred copy as background with the whole image centered on top."""
+    background = build_blurred_background(image, target_w, target_h, blur_radius)
+
+    scale = min(target_w / image.width, target_h / image.height)
+    foreground_w = min(target_w, int(image.width * scale))
+    foreground_h = min(target_h, int(image.height * scale))
+    foreground = image.resize((foreground_w, foreground_h), Image.Resampling.LANCZOS)
+
+    background.paste(foreground, ((target_w - foreground_w) // 2, (target_h - foreground_h) // 2))
+    return background
+
+# Bump when the canvas output changes so stale entries are ignored
+CANVAS_CACHE_VERSION = 1
+
+CANVAS_CACHE = DiskCache(
+    os.path.join(CACHE_FOLDER, 'canvas'),
+    max_bytes=CANVAS_CACHE_MAX_MB * 1024 * 1024,
+    suffix='.npy'
+)
+
+def normalize_scene_image(image_path, target_w, target_h, positioning='cover', image_hash=None):
+    """Decode an upload once and return the exact target-size canvas as an RGB array.
+
+    positioning is 'cover' (fill the frame, cropping the overflow) or
+    'center_blur' (whole image centered over a blurred background). Canvases
+    are memoized by image content and target, so re-renders skip the work.
+    """
+    image_hash = image_hash or hash_file(image_path)
+    cache_key = make_cache_key(CANVAS_CACHE_VERSION, image_hash, target_w, target_h, positioning)
+    canvas = CANVAS_CACHE.get_array(cache_key)
+    if canvas is not None:
+        logging.info(f"Using cached {positioning} canvas for {os.path.basename(image_path)}")
+        return canvas
+
+    if positioning == 'center_blur':
+        image = load_scaled_image(image_path, target_w, target_h, cover=False)
+        canvas = build_center_blur_canvas(image, target_w, target_h)
+    else:
+        image = load_scaled_image(image_path, target_w, target_h, cover=True)
+        canvas = build_cover_canvas(image, target_w, target_h)
+
+    canvas = np.asarray(canvas, dtype=np.uint8)
+    CANVAS_CACHE.put_array(cache_key, canvas)
+    return canvas
@@ -0,0 +1,259 @@
+import uuid
+import logging
+import time
+from collections import deque
+from threading import Lock, Condition
+from concurrent.futures import ThreadPoolExecutor
+from .config import MAX_CONCURRENT_JOBS, MAX_QUEUED_JOBS, JOB_RETENTION_SECONDS, JOB_EVENT_HISTORY
+
+# ==============================================================================
+# JOB STAGES
+# ==============================================================================
+
+# Stages of the video pipeline in execution order, with their share of the
+# overall progress bar (weights sum to 100)
+JOB_STAGES = [
+    ('upload', 5),
+    ('narration', 30),
+    ('tts', 30),
+    ('render', 30),
+    ('register', 5)
+]
+
+# ==============================================================================
+# JOB OBJECT
+# ==============================================================================
+
+class Job:
+    """State of one background video job plus its progress event bus.
+
+    Every state change is recorded as a numbered event (status changes,
+    stage start/finish with timings, progress inside a stage). The last
+    JOB_EVENT_HISTORY events are kept so event stream clients can resume
+    from the last id they saw.
+    """
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.status = 'queued'  # queued, running, completed, failed
+        self.stage = 'queued'
+        self.message = 'Waiting for a free worker'
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.finished_at = None
+        self.stages = {
+            name: {'status': 'pending', 'completed': 0, 'total': 0,
+                   'started_at': None, 'finished_at': None, 'duration': None}
+            for name, _ in JOB_STAGES
+        }
+        self.lock = Lock()
+        # Notified on every new event; event stream clients wait on it
+        self.changed = Condition(self.lock)
+        self.events = deque(maxlen=JOB_EVENT_HISTORY)
+        self.last_event_id = 0
+        with self.lock:
+            self.record_event('status')
+
+    def record_event(self, event_type, **data):
+        """Append an event to the job's progress bus (caller must hold the lock)."""
+        self.last_event_id += 1
+        self.updated_at = time.time()
+        event = {
+            'id': self.last_event_id,
+            'type': event_type,  # status, stage or progress
+            'time': self.updated_at,
+            'status': self.status,
+            'stage': self.stage,
+            'message': self.message,
+            'progress': self.get_overall_progress(),
+            **data
+        }
+        self.events.append(event)
+        self.changed.notify_all()
+        return event
+
+    def get_events(self, after_id=0, timeout=None):
+        """Events newer than after_id, waiting up to timeout seconds if there are none yet."""
+        with self.changed:
+            if timeout and self.last_event_id <= after_id and not self.is_finished():
+                self.changed.wait(timeout)
+            return [event for event in self.events if event['id'] > after_id]
+
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
+
+    def start_stage(self, stage, total=0, message=None):
+        """Mark a pipeline stage as running."""
+        with self.lock:
+            self.stage = stage
+            self.stages[stage].update({
+                'status': 'running', 'completed': 0, 'total': total,
+                'started_at': time.time(), 'finished_at': None, 'duration': None
+            })
+            self.message = message or f"Running {stage}"
+            self.record_event('stage', stage=stage, state='running', completed=0, total=total)
+        logging.info(f"Job {self.id}: stage '{stage}' started ({self.message})")
+
+    def advance_stage(self, stage, step=1, message=None, **details):
+        """Record progress inside a running stage."""
+        with self.lock:
+            info = self.stages[stage]
+            info['completed'] += step
+            if message:
+                self.message = message
+            self.record_event('progress', stage=stage, completed=info['completed'], total=info['total'], **details)
+
+    def update_stage(self, stage, completed, message=None, **details):
+        """Set the absolute progress of a running stage (e.g. the fraction of frames encoded)."""
+        with self.lock:
+            info = self.stages[stage]
+            info['completed'] = completed
+            if message:
+                self.message = message
+            self.record_event('progress', stage=stage, completed=completed, total=info['total'], **details)
+
+    def finish_stage(self, stage, message=None):
+        """Mark a pipeline stage as done."""
+        with self.lock:
+            info = self.stages[stage]
+            info['status'] = 'done'
+            info['completed'] = max(info['completed'], info['total'])
+            info['finished_at'] = time.time()
+            if info['started_at']:
+                info['duration'] = round(info['finished_at'] - info['started_at'], 3)
+            if message:
+                self.message = message
+            self.record_event('stage', stage=stage, state='done', duration=info['duration'])
+        logging.info(f"Job {self.id}: stage '{stage}' finished in {info['duration']}s")
+
+    def get_progress(self):
+        """Calculate overall progress (0-100) from the weighted stages."""
+        progress = 0.0
+        for name, weight in JOB_STAGES:
+            info = self.stages[name]
+            if info['status'] == 'done':
+                progress += weight
+            elif info['status'] == 'running' and info['total'] > 0:
+                progress += weight * min(info['completed'] / info['total'], 1.0)
+        return round(progress, 1)
+
+    def get_overall_progress(self):
+        return 100.0 if self.status == 'completed' else self.get_progress()
+
+    def to_dict(self):
+        """Serialize job status for the API."""
+        with self.lock:
+            return {
+                'id': self.id,
+                'status': self.status,
+                'stage': self.stage,
+                'message': self.message,
+                'progress': self.get_overall_progress(),
+                'stages': {name: dict(info) for name, info in self.stages.items()},
+                'error': self.error,
+                'created_at': self.created_at,
+                'updated_at': self.updated_at,
+                'finished_at': self.finished_at,
+                'last_event_id': self.last_event_id
+            }
+
+# ==============================================================================
+# JOB MANAGER
+# ==============================================================================
+
+class JobManager:
+    def __init__(self, max_workers=MAX_CONCURRENT_JOBS, max_queued=MAX_QUEUED_JOBS):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='video-job')
+        self.jobs = {}
+        self.lock = Lock()
+
+    def create_job(self):
+        """Create a new job, or return None if the queue is full."""
+        self.prune_finished_jobs()
+
+        with self.lock:
+            pending = sum(1 for job in self.jobs.values() if job.status in ('queued', 'running'))
+            if pending >= self.max_workers + self.max_queued:
+                logging.warning(f"Job queue is full ({pending} pending jobs)")
+                return None
+
+            job = Job()
+            self.jobs[job.id] = job
+
+        logging.info(f"Created job {job.id}")
+        return job
+
+    def start_job(self, job, func, *args, **kwargs):
+        """Submit a job function to the worker pool.
+
+        The function receives the job as its first argument and must return a
+        (success, result) tuple.
+        """
+        self.executor.submit(self._run_job, job, func, *args, **kwargs)
+        return job
+
+    def fail_unstarted_job(self, job, error):
+        """Mark a job that never reached start_job as failed, freeing its queue slot."""
+        with job.lock:
+            job.status = 'failed'
+            job.message = 'Job failed'
+            job.error = error
+            job.finished_at = time.time()
+            job.record_event('status', error=job.error)
+
+        logging.warning(f"Job {job.id} failed before it was started: {error}")
+
+    def _run_job(self, job, func, *args, **kwargs):
+        with job.lock:
+            job.status = 'running'
+            job.message = 'Job started'
+            job.record_event('status')
+
+        try:
+            success, result = func(job, *args, **kwargs)
+        except Exception as e:
+            logging.error(f"Job {job.id} crashed: {e}", exc_info=True)
+            success, result = False, str(e)
+
+        with job.lock:
+            if success:
+                job.status = 'completed'
+                job.stage = 'completed'
+                job.message = 'Video is ready'
+                job.result = result
+            else:
+                job.status = 'failed'
+                job.message = 'Job failed'
+                job.error = result
+            job.finished_at = time.time()
+            job.record_event('status', error=job.error)
+
+        logging.info(f"Job {job.id} {job.status}")
+
+    def get_job(self, job_id):
+        """Get a job by id."""
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def prune_finished_jobs(self):
+        """Forget finished jobs older than the retention period."""
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        with self.lock:
+            expired = [job_id for job_id, job in self.jobs.items()
+                       if job.finished_at and job.finished_at < cutoff]
+            for job_id in expired:
+                del self.jobs[job_id]
+
+        if expired:
+            logging.info(f"Pruned {len(expired)} finished jobs")
+
+# Global job manager instance
+job_manager = JobManager()
+
+def get_job_manager():
+    """Get the global job manager instance."""
+    return job_manager
@@ -1,322 +1,649 @@
 import os
+import base64
 import logging
 import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from .config import GENERATED_FOLDER, UPLOAD_FOLDER
+from .config import (
+    GENERATED_FOLDER, UPLOAD_FOLDER, MEDIA_DATABASE_FILE, MEDIA_STATS_RECONCILE_MINUTES, ORPHAN_GRACE_HOURS,
+    ALLOWED_UPLOAD_EXTENSIONS
+)
 
 # ==============================================================================
-# MEDIA MANAGEMENT FUNCTIONS
+# MEDIA REGISTRY DATABASE
 # ==============================================================================
 
+# Legacy JSON registry, imported once into the database
 MEDIA_REGISTRY_FILE = os.path.join(GENERATED_FOLDER, 'media_registry.json')
 
-def load_media_registry():
-    """Load media registry from JSON file."""
+_local = threading.local()
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+# Running aggregates in registry_meta, maintained by the media_stats_* triggers
+STATS_COUNTERS = ('total_files', 'existing_files', 'total_size')
+
+def migrate_create_schema(conn):
+    """Create the media registry tables, their indexes and the triggers that maintain derived data."""
+    # Statements run one by one: executescript() would commit the migration transaction
+    statements = [
+        """CREATE TABLE media (
+            id TEXT PRIMARY KEY,
+            video_path TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            scenes_count INTEGER NOT NULL DEFAULT 0,
+            file_size INTEGER NOT NULL DEFAULT 0,
+            file_exists INTEGER NOT NULL DEFAULT 1,
+            last_accessed TEXT
+        )""",
+        """CREATE TABLE scenes (
+            media_id TEXT NOT NULL REFERENCES media(id) ON DELETE CASCADE,
+            position INTEGER NOT NULL,
+            image_path TEXT,
+            image_hash TEXT,
+            narration TEXT,
+            audio_path TEXT,
+            PRIMARY KEY (media_id, position)
+        )""",
+        """CREATE TABLE images (
+            image_path TEXT PRIMARY KEY,
+            ref_count INTEGER NOT NULL DEFAULT 0
+        )""",
+        """CREATE TABLE registry_meta (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        )""",
+        "INSERT INTO registry_meta (name, value) VALUES ('media_version', 1)",
+        # Covers ORDER BY created_at DESC, id DESC and the keyset cursor comparison
+        "CREATE INDEX idx_media_created_at ON media(created_at, id)",
+        # The same listing order per file_exists, for status-filtered pages
+        "CREATE INDEX idx_media_exists_created_at ON media(file_exists, created_at, id)",
+        "CREATE INDEX idx_media_last_used ON media(COALESCE(last_accessed, created_at))",
+        "CREATE INDEX idx_media_video_path ON media(video_path)",
+        "CREATE INDEX idx_scenes_image_path ON scenes(image_path)",
+        # Image reference counts; cascading deletes from media fire these triggers too
+        """CREATE TRIGGER scenes_image_ref_insert AFTER INSERT ON scenes
+            WHEN NEW.image_path IS NOT NULL
+            BEGIN
+                INSERT INTO images (image_path, ref_count) VALUES (NEW.image_path, 1)
+                ON CONFLICT(image_path) DO UPDATE SET ref_count = ref_count + 1;
+            END""",
+        """CREATE TRIGGER scenes_image_ref_delete AFTER DELETE ON scenes
+            WHEN OLD.image_path IS NOT NULL
+            BEGIN
+                UPDATE images SET ref_count = ref_count - 1 WHERE image_path = OLD.image_path;
+            END""",
+        # Listing version; recording an access (last_accessed) doesn't change the listing
+        """CREATE TRIGGER media_version_insert AFTER INSERT ON media
+            BEGIN
+                UPDATE registry_meta SET value = value + 1 WHERE name = 'media_version';
+            END""",
+        """CREATE TRIGGER media_version_delete AFTER DELETE ON media
+            BEGIN
+                UPDATE registry_meta SET value = value + 1 WHERE name = 'media_version';
+            END""",
+        """CREATE TRIGGER media_version_update
+            AFTER UPDATE OF id, video_path, created_at, scenes_count, file_size, file_exists ON media
+            BEGIN
+                UPDATE registry_meta SET value = value + 1 WHERE name = 'media_version';
+            END""",
+        # Running stats aggregates
+        """CREATE TRIGGER media_stats_insert AFTER INSERT ON media
+            BEGIN
+                UPDATE registry_meta SET value = value + 1 WHERE name = 'total_files';
+                UPDATE registry_meta SET value = value + NEW.file_exists WHERE name = 'existing_files';
+                UPDATE registry_meta SET value = value + NEW.file_size * NEW.file_exists WHERE name = 'total_size';
+            END""",
+        """CREATE TRIGGER media_stats_delete AFTER DELETE ON media
+            BEGIN
+                UPDATE registry_meta SET value = value - 1 WHERE name = 'total_files';
+                UPDATE registry_meta SET value = value - OLD.file_exists WHERE name = 'existing_files';
+                UPDATE registry_meta SET value = value - OLD.file_size * OLD.file_exists WHERE name = 'total_size';
+            END""",
+        """CREATE TRIGGER media_stats_update AFTER UPDATE OF file_exists, file_size ON media
+            BEGIN
+                UPDATE registry_meta SET value = value - OLD.file_exists + NEW.file_exists WHERE name = 'existing_files';
+                UPDATE registry_meta SET value = value - OLD.file_size * OLD.file_exists + NEW.file_size * NEW.file_exists
+                    WHERE name = 'total_size';
+            END"""
+    ]
+    for statement in statements:
+        conn.execute(statement)
+    recompute_stats_counters(conn)
+
+def migrate_import_json_registry(conn):
+    """Import entries from the legacy media_registry.json (the file itself is left in place)."""
     if not os.path.exists(MEDIA_REGISTRY_FILE):
-        return {}
-    
+        return
+
     try:
         with open(MEDIA_REGISTRY_FILE, 'r') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError) as e:
-        logging.error(f"Error loading media registry: {e}")
-        return {}
+            registry = json.load(f)
+    except (json.JSONDecodeError, OSError) as e:
+        logging.error(f"Error loading legacy media registry, skipping import: {e}")
+        return
+
+    for media_id, data in registry.items():
+        scenes_data = data.get('scenes_data', [])
+        video_path = os.path.normpath(data['video_path']) if data.get('video_path') else ''
+        # One stat per entry now; afterwards only the background reconciler stats files
+        file_exists, file_size = stat_video(video_path, data.get('file_size', 0))
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO media (id, video_path, created_at, scenes_count, file_size, file_exists) VALUES (?, ?, ?, ?, ?, ?)",
+            (media_id, video_path, data.get('created_at', ''),
+             data.get('scenes_count', len(scenes_data)), file_size, int(file_exists))
+        )
+        if cursor.rowcount:
+            insert_scenes(conn, media_id, scenes_data)
+
+    logging.info(f"Imported {len(registry)} entries from {MEDIA_REGISTRY_FILE}")
 
-def save_media_registry(registry):
-    """Save media registry to JSON file."""
+def recompute_stats_counters(conn):
+    """Rebuild the aggregate counters from the media table."""
+    # "WHERE true" keeps SQLite from parsing ON CONFLICT as part of the SELECT
+    conn.execute("""INSERT INTO registry_meta (name, value)
+        SELECT name, value FROM (
+            SELECT 'total_files' AS name, COUNT(*) AS value FROM media
+            UNION ALL SELECT 'existing_files', COALESCE(SUM(file_exists), 0) FROM media
+            UNION ALL SELECT 'total_size', COALESCE(SUM(file_size * file_exists), 0) FROM media
+        ) WHERE true
+        ON CONFLICT(name) DO UPDATE SET value = excluded.value""")
+
+# Applied in order; PRAGMA user_version records how many have run
+MIGRATIONS = [
+    migrate_create_schema,
+    migrate_import_json_registry
+]
+
+def get_connection():
+    """Get this thread's connection to the media database."""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        # Autocommit mode; writes use explicit transactions (see transaction())
+        conn = sqlite3.connect(MEDIA_DATABASE_FILE, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        _local.conn = conn
+    ensure_schema(conn)
+    return conn
+
+def ensure_schema(conn):
+    """Run pending migrations once per process."""
+    global _schema_ready
+    if _schema_ready:
+        return
+
+    with _schema_lock:
+        if _schema_ready:
+            return
+        # IMMEDIATE takes the write lock up front so two processes can't both migrate
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+                logging.info(f"Applying media database migration {number}: {migration.__name__}")
+                migration(conn)
+                conn.execute(f"PRAGMA user_version = {number}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        _schema_ready = True
+
+@contextmanager
+def transaction():
+    """Run a block of writes atomically."""
+    conn = get_connection()
+    conn.execute("BEGIN IMMEDIATE")
     try:
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(MEDIA_REGISTRY_FILE), exist_ok=True)
-        
-        with open(MEDIA_REGISTRY_FILE, 'w') as f:
-            json.dump(registry, f, indent=4)
-        logging.info(f"Media registry saved successfully with {len(registry)} entries")
-        return True
-    except Exception as e:
-        logging.error(f"Error saving media registry: {e}")
-        return False
+        yield conn
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+def stat_video(video_path, recorded_size=0):
+    """Check a video on disk, returning (file_exists, file_size).
+
+    Missing files keep their recorded size so it still shows in listings.
+    """
+    if not video_path:
+        return False, recorded_size
+    try:
+        return True, os.stat(video_path).st_size
+    except OSError:
+        return False, recorded_size
+
+def insert_scenes(conn, media_id, scenes_data):
+    """Insert the scene rows of one media entry, keeping their order."""
+    conn.executemany(
+        "INSERT INTO scenes (media_id, position, image_path, image_hash, narration, audio_path) VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (media_id, position, scene.get('image_path'), scene.get('image_hash'),
+             scene.get('narration'), scene.get('audio_path'))
+            for position, scene in enumerate(scenes_data)
+        ]
+    )
+
+# ==============================================================================
+# MEDIA MANAGEMENT FUNCTIONS
+# ==============================================================================
 
 def register_generated_media(video_path, scenes_data):
     """Register generated media in the registry."""
-    registry = load_media_registry()
-    
-    media_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-    
-    # Ensure unique media_id
-    counter = 1
-    original_id = media_id
-    while media_id in registry:
-        media_id = f"{original_id}_{counter}"
-        counter += 1
-    
-    registry[media_id] = {
+    created_at = datetime.now()
+    original_id = created_at.strftime("%Y%m%d_%H%M%S")
+    # Stored normalized so touch_media matches it whatever separators the caller used
+    video_path = os.path.normpath(video_path)
+    file_exists, file_size = stat_video(video_path)
+
+    try:
+        with transaction() as conn:
+            # Ensure unique media_id
+            media_id = original_id
+            counter = 1
+            while conn.execute("SELECT 1 FROM media WHERE id = ?", (media_id,)).fetchone():
+                media_id = f"{original_id}_{counter}"
+                counter += 1
+
+            conn.execute(
+                "INSERT INTO media (id, video_path, created_at, scenes_count, file_size, file_exists) VALUES (?, ?, ?, ?, ?, ?)",
+                (media_id, video_path, created_at.isoformat(), len(scenes_data), file_size, int(file_exists))
+            )
+            insert_scenes(conn, media_id, scenes_data)
+    except sqlite3.Error as e:
+        logging.error(f"Failed to register media for {video_path}: {e}")
+        return None
+
+    logging.info(f"Registered media with ID: {media_id}")
+    return media_id
+
+def touch_media(video_path):
+    """Record that a registered video was just used (downloaded or viewed)."""
+    try:
+        with transaction() as conn:
+            conn.execute(
+                "UPDATE media SET last_accessed = ? WHERE video_path = ?",
+                (datetime.now().isoformat(), os.path.normpath(video_path))
+            )
+    except sqlite3.Error as e:
+        logging.warning(f"Could not record access to {video_path}: {e}")
+
+def get_relative_path(video_path):
+    """Path of a video relative to the static folder, with web separators."""
+    try:
+        # Convert absolute path to relative path from static folder
+        if video_path.startswith('static'):
+            relative_path = video_path.replace('static/', '').replace('static\\', '')
+        else:
+            relative_path = os.path.relpath(video_path, 'static')
+        # Normalize path separators for web
+        return relative_path.replace('\\', '/')
+    except Exception as e:
+        logging.warning(f"Error creating relative path for {video_path}: {e}")
+        return ''
+
+def encode_media_cursor(created_at, media_id):
+    """Opaque cursor pointing just past a listed entry."""
+    raw = json.dumps([created_at, media_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_media_cursor(cursor):
+    """Decode a cursor into (created_at, media_id), raising ValueError if it is malformed."""
+    try:
+        created_at, media_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(created_at, str) or not isinstance(media_id, str):
+        raise ValueError("Invalid cursor")
+    return created_at, media_id
+
+def get_media_list_version():
+    """Cheap token that changes whenever the listing could change.
+
+    Combines the registry write counter with the generated folder's mtime,
+    which moves when videos are added or removed outside the registry.
+    """
+    version = get_connection().execute(
+        "SELECT value FROM registry_meta WHERE name = 'media_version'"
+    ).fetchone()[0]
+    try:
+        folder_mtime = os.stat(GENERATED_FOLDER).st_mtime_ns
+    except OSError:
+        folder_mtime = 0
+    return f"{version}-{folder_mtime}"
+
+def build_media_entry(row):
+    """Listing entry for one media row."""
+    # Kept up to date by the registry and the background stats reconciler
+    video_path = row['video_path']
+    file_exists = bool(row['file_exists']) and bool(video_path)
+
+    return {
+        'id': row['id'],
         'video_path': video_path,
-        'created_at': datetime.now().isoformat(),
-        'scenes_count': len(scenes_data),
-        'file_size': os.path.getsize(video_path) if os.path.exists(video_path) else 0,
-        'scenes_data': scenes_data
+        'created_at': row['created_at'],
+        'scenes_count': row['scenes_count'],
+        'file_size': row['file_size'],
+        'file_exists': file_exists,
+        'relative_path': get_relative_path(video_path) if file_exists else ''
     }
-    
-    if save_media_registry(registry):
-        logging.info(f"Registered media with ID: {media_id}")
-        return media_id
-    else:
-        logging.error(f"Failed to register media with ID: {media_id}")
-        return None
 
-def get_all_generated_media():
-    """Get all generated media with their details."""
-    registry = load_media_registry()
-    media_list = []
-    
-    for media_id, data in registry.items():
-        # Check if file still exists
-        video_path = data.get('video_path', '')
-        file_exists = os.path.exists(video_path) if video_path else False
-        
-        # Create relative path for web access
-        relative_path = ''
-        if file_exists and video_path:
-            try:
-                # Convert absolute path to relative path from static folder
-                if video_path.startswith('static'):
-                    relative_path = video_path.replace('static/', '').replace('static\\', '')
-                else:
-                    relative_path = os.path.relpath(video_path, 'static')
-                # Normalize path separators for web
-                relative_path = relative_path.replace('\\', '/')
-            except Exception as e:
-                logging.warning(f"Error creating relative path for {video_path}: {e}")
-                relative_path = ''
-        
-        media_info = {
-            'id': media_id,
-            'video_path': video_path,
-            'created_at': data.get('created_at', ''),
-            'scenes_count': data.get('scenes_count', 0),
-            'file_size': data.get('file_size', 0),
-            'file_exists': file_exists,
-            'relative_path': relative_path
-        }
-        media_list.append(media_info)
-    
-    # Sort by creation date (newest first)
-    media_list.sort(key=lambda x: x['created_at'], reverse=True)
-    logging.info(f"Retrieved {len(media_list)} media entries")
-    return media_list
+def list_generated_media(limit, cursor=None, created_from=None, created_to=None, file_exists=None):
+    """Get one page of generated media, newest first.
+
+    Rows are read in index order (created_at, id) starting after the cursor,
+    so a page costs the same however large the registry is. created_from is
+    inclusive and created_to exclusive (ISO timestamps). file_exists filters
+    on the registry's file_exists column, read through its own listing
+    index. Returns (media_list, next_cursor), next_cursor being None on the
+    last page.
+    """
+    conditions = []
+    params = []
+    if cursor:
+        conditions.append("(created_at, id) < (?, ?)")
+        params.extend(decode_media_cursor(cursor))
+    if created_from:
+        conditions.append("created_at >= ?")
+        params.append(created_from)
+    if created_to:
+        conditions.append("created_at < ?")
+        params.append(created_to)
+    if file_exists is not None:
+        conditions.append("file_exists = ?")
+        params.append(int(file_exists))
+
+    query = "SELECT id, video_path, created_at, scenes_count, file_size, file_exists FROM media"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    # One extra row tells whether there is a next page
+    query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+    params.append(limit + 1)
+
+    media_list = [build_media_entry(row) for row in get_connection().execute(query, params)]
+    has_more = len(media_list) > limit
+    media_list = media_list[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = media_list[-1]
+        next_cursor = encode_media_cursor(last['created_at'], last['id'])
+
+    logging.info(f"Retrieved {len(media_list)} media entries{' (more available)' if has_more else ''}")
+    return media_list, next_cursor
+
+def delete_media_batch(media_ids):
+    """Delete many media entries in one transaction, then their files.
+
+    Uploaded images are only removed once no remaining media references
+    them (per the images reference count index) and they were not written
+    or reused within the orphan grace period. Returns
+    (deleted_ids, deleted_files, errors).
+    """
+    media_ids = list(dict.fromkeys(media_ids))
+    if not media_ids:
+        return [], [], []
+
+    try:
+        with transaction() as conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS delete_ids (id TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM delete_ids")
+            conn.executemany("INSERT INTO delete_ids (id) VALUES (?)", [(media_id,) for media_id in media_ids])
+
+            media_rows = conn.execute(
+                "SELECT id, video_path FROM media WHERE id IN (SELECT id FROM delete_ids)"
+            ).fetchall()
+            image_paths = [row['image_path'] for row in conn.execute(
+                "SELECT DISTINCT image_path FROM scenes WHERE media_id IN (SELECT id FROM delete_ids) AND image_path IS NOT NULL"
+            )]
+
+            # Scenes cascade, and their triggers decrement the image reference counts
+            conn.execute("DELETE FROM media WHERE id IN (SELECT id FROM delete_ids)")
+
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS delete_images (image_path TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM delete_images")
+            conn.executemany("INSERT INTO delete_images (image_path) VALUES (?)", [(path,) for path in image_paths])
+            unreferenced_images = [row['image_path'] for row in conn.execute(
+                "SELECT image_path FROM images WHERE ref_count <= 0 AND image_path IN (SELECT image_path FROM delete_images)"
+            )]
+            conn.execute("DELETE FROM images WHERE ref_count <= 0")
+    except sqlite3.Error as e:
+        logging.error(f"Error updating registry after deletion: {e}")
+        raise
 
-def delete_generated_media(media_id):
-    """Delete ONLY the specified media and remove from registry."""
-    logging.info(f"Attempting to delete media with ID: {media_id}")
-    
-    registry = load_media_registry()
-    
-    if media_id not in registry:
-        logging.warning(f"Media ID {media_id} not found in registry")
-        return False, "Media not found in registry"
-    
-    # Get the specific media data for this ID only
-    media_data = registry[media_id]
-    video_path = media_data.get('video_path')
-    scenes_data = media_data.get('scenes_data', [])
-    
     deleted_files = []
     errors = []
-    
-    # Delete video file if exists - ONLY for this specific media
-    if video_path and os.path.exists(video_path):
+    files_to_delete = [('video', row['video_path']) for row in media_rows] + [('image', path) for path in unreferenced_images]
+    # Uploads are deduplicated by content, so a job that is not registered yet may
+    # be rendering from the same image; ingesting it refreshed the mtime. Such images
+    # are left for the orphan sweep, which applies the same grace period.
+    recent_cutoff = time.time() - ORPHAN_GRACE_HOURS * 3600
+    recent_images = 0
+
+    for kind, path in files_to_delete:
+        if not path or not os.path.exists(path):
+            continue
         try:
-            os.remove(video_path)
-            deleted_files.append(f"video: {os.path.basename(video_path)}")
-            logging.info(f"Deleted video file: {video_path}")
+            if kind == 'image' and os.path.getmtime(path) > recent_cutoff:
+                recent_images += 1
+                continue
+            os.remove(path)
+            deleted_files.append(f"{kind}: {os.path.basename(path)}")
+            logging.info(f"Deleted {kind} file: {path}")
         except Exception as e:
-            error_msg = f"Error deleting video file {video_path}: {e}"
+            error_msg = f"Error deleting {kind} file {path}: {e}"
             logging.error(error_msg)
             errors.append(error_msg)
-    
-    # Delete associated uploaded image files - ONLY for this specific media
-    for scene in scenes_data:
-        image_path = scene.get('image_path')
-        if image_path and os.path.exists(image_path):
-            # CRITICAL: Check if this image is used by other media before deleting
-            image_used_elsewhere = False
-            for other_id, other_data in registry.items():
-                if other_id != media_id:  # Skip the current media being deleted
-                    other_scenes = other_data.get('scenes_data', [])
-                    for other_scene in other_scenes:
-                        if other_scene.get('image_path') == image_path:
-                            image_used_elsewhere = True
-                            logging.info(f"Image {image_path} is used by media {other_id}, not deleting")
-                            break
-                    if image_used_elsewhere:
-                        break
-            
-            # Only delete if not used by other media
-            if not image_used_elsewhere:
-                try:
-                    os.remove(image_path)
-                    deleted_files.append(f"image: {os.path.basename(image_path)}")
-                    logging.info(f"Deleted uploaded image file: {image_path}")
-                except Exception as e:
-                    error_msg = f"Error deleting image file {image_path}: {e}"
-                    logging.error(error_msg)
-                    errors.append(error_msg)
-            else:
-                logging.info(f"Skipped deleting shared image: {os.path.basename(image_path)}")
-    
-    # Remove ONLY this specific media_id from registry
+
+    skipped_images = len(image_paths) - len(unreferenced_images)
+    logging.info(
+        f"Removed {len(media_rows)} media from registry, deleted {len(deleted_files)} files "
+        f"(kept {skipped_images} shared and {recent_images} recently used images)"
+    )
+    return [row['id'] for row in media_rows], deleted_files, errors
+
+def delete_generated_media(media_id):
+    """Delete ONLY the specified media and remove from registry."""
+    logging.info(f"Attempting to delete media with ID: {media_id}")
+
     try:
-        del registry[media_id]
-        logging.info(f"Removed media ID {media_id} from registry")
-    except KeyError:
-        logging.warning(f"Media ID {media_id} was not in registry")
-    
-    # Save updated registry
-    if save_media_registry(registry):
-        success_msg = f"Media {media_id} deleted successfully"
-        if deleted_files:
-            success_msg += f". Deleted files: {', '.join(deleted_files)}"
-        if errors:
-            success_msg += f". Errors: {'; '.join(errors)}"
-        
-        logging.info(success_msg)
-        return True, success_msg
-    else:
-        error_msg = "Error updating registry after deletion"
-        logging.error(error_msg)
-        return False, error_msg
+        deleted_ids, deleted_files, errors = delete_media_batch([media_id])
+    except sqlite3.Error as e:
+        return False, f"Error updating registry after deletion: {e}"
+
+    if not deleted_ids:
+        logging.warning(f"Media ID {media_id} not found in registry")
+        return False, "Media not found in registry"
+
+    success_msg = f"Media {media_id} deleted successfully"
+    if deleted_files:
+        success_msg += f". Deleted files: {', '.join(deleted_files)}"
+    if errors:
+        success_msg += f". Errors: {'; '.join(errors)}"
+
+    logging.info(success_msg)
+    return True, success_msg
 
 def cleanup_old_media(days_old=7):
     """Clean up media files older than specified days."""
     logging.info(f"Starting cleanup of media older than {days_old} days")
-    
-    registry = load_media_registry()
+
     cutoff_date = datetime.now() - timedelta(days=days_old)
-    
-    deleted_count = 0
-    media_ids_to_delete = []
-    
-    # First, identify which media to delete
-    for media_id, data in registry.items():
-        try:
-            created_at_str = data.get('created_at', '')
-            if created_at_str:
-                created_at = datetime.fromisoformat(created_at_str)
-                if created_at < cutoff_date:
-                    media_ids_to_delete.append(media_id)
-                    logging.info(f"Media {media_id} marked for deletion (created: {created_at})")
-        except Exception as e:
-            logging.error(f"Error processing media {media_id} for cleanup: {e}")
-    
-    # Then delete each identified media ONE BY ONE
-    for media_id in media_ids_to_delete:
-        try:
-            success, message = delete_generated_media(media_id)
-            if success:
-                deleted_count += 1
-                logging.info(f"Auto-deleted old media: {media_id}")
-            else:
-                logging.warning(f"Failed to delete old media {media_id}: {message}")
-        except Exception as e:
-            logging.error(f"Error deleting old media {media_id}: {e}")
-    
-    logging.info(f"Cleanup completed. Deleted {deleted_count} old media files")
-    return deleted_count
+    media_ids = [row['id'] for row in get_connection().execute(
+        "SELECT id FROM media WHERE created_at != '' AND created_at < ?",
+        (cutoff_date.isoformat(),)
+    )]
+
+    # All expired media go in a single batch
+    try:
+        deleted_ids, _, errors = delete_media_batch(media_ids)
+    except sqlite3.Error as e:
+        logging.error(f"Error deleting old media: {e}")
+        return 0
+
+    for error in errors:
+        logging.warning(f"Cleanup error: {error}")
+
+    logging.info(f"Cleanup completed. Deleted {len(deleted_ids)} old media files")
+    return len(deleted_ids)
+
+def get_stats_counters():
+    """Current values of the running aggregates (total_files, existing_files, total_size in bytes)."""
+    counters = dict(get_connection().execute(
+        f"SELECT name, value FROM registry_meta WHERE name IN ({', '.join('?' * len(STATS_COUNTERS))})",
+        STATS_COUNTERS
+    ).fetchall())
+    return {name: counters.get(name, 0) for name in STATS_COUNTERS}
 
 def get_media_stats():
-    """Get statistics about generated media."""
-    registry = load_media_registry()
-    
-    total_files = len(registry)
-    total_size = 0
-    existing_files = 0
-    
-    for data in registry.values():
-        video_path = data.get('video_path', '')
-        if video_path and os.path.exists(video_path):
-            existing_files += 1
-            file_size = data.get('file_size', 0)
-            if file_size == 0 and os.path.exists(video_path):
-                # Recalculate file size if not stored
-                try:
-                    file_size = os.path.getsize(video_path)
-                except:
-                    file_size = 0
-            total_size += file_size
-    
+    """Get statistics about generated media from the running aggregates."""
+    counters = get_stats_counters()
+
     stats = {
-        'total_files': total_files,
-        'existing_files': existing_files,
-        'total_size_mb': round(total_size / (1024 * 1024), 2),
-        'orphaned_files': total_files - existing_files
+        'total_files': counters['total_files'],
+        'existing_files': counters['existing_files'],
+        'total_size_mb': round(counters['total_size'] / (1024 * 1024), 2),
+        'orphaned_files': counters['total_files'] - counters['existing_files'],
+        'reconciled_at': stats_reconciler.last_run
     }
-    
-    logging.info(f"Media stats: {stats}")
     return stats
 
-def cleanup_orphaned_files():
+def reconcile_media_stats():
+    """Re-check every video on disk and correct entries and aggregates that drifted.
+
+    Files are stat'ed outside any transaction; only entries whose state
+    changed are written. Returns the number of corrected entries.
+    """
+    rows = get_connection().execute("SELECT id, video_path, file_exists, file_size FROM media").fetchall()
+
+    changes = []
+    for row in rows:
+        file_exists, file_size = stat_video(row['video_path'], row['file_size'])
+        if int(file_exists) != row['file_exists'] or file_size != row['file_size']:
+            changes.append((int(file_exists), file_size, row['id']))
+
+    with transaction() as conn:
+        # Entries deleted meanwhile simply match no row
+        conn.executemany("UPDATE media SET file_exists = ?, file_size = ? WHERE id = ?", changes)
+        recompute_stats_counters(conn)
+
+    logging.info(f"Media stats reconciled: checked {len(rows)} entries, corrected {len(changes)}")
+    return len(changes)
+
+class MediaStatsReconciler:
+    """Periodically re-checks video files in a daemon thread.
+
+    Registry writes keep the aggregates current; this catches files that
+    were removed or replaced behind the registry's back.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.last_run = None
+        self.last_changes = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def run_once(self):
+        try:
+            self.last_changes = reconcile_media_stats()
+            self.last_run = datetime.now().isoformat()
+        except Exception as e:
+            logging.error(f"Media stats reconciliation failed: {e}")
+
+    def start(self):
+        """Start the reconciler thread (first pass runs immediately)."""
+        with self.lock:
+            if self.thread and self.thread.is_alive():
+                return
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._run, name='media-stats-reconciler', daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _run(self):
+        while True:
+            start_time = time.monotonic()
+            self.run_once()
+            logging.debug(f"Media stats reconciliation took {time.monotonic() - start_time:.2f}s")
+            if self.stop_event.wait(self.interval):
+                return
+
+# Global stats reconciler instance
+stats_reconciler = MediaStatsReconciler(MEDIA_STATS_RECONCILE_MINUTES * 60)
+
+def get_stats_reconciler():
+    """Get the global media stats reconciler."""
+    return stats_reconciler
+
+def get_registered_paths():
+    """Snapshot of registered video and image paths (absolute), read in one transaction."""
+    conn = get_connection()
+    conn.execute("BEGIN")
+    try:
+        videos = {os.path.abspath(row['video_path']) for row in conn.execute("SELECT video_path FROM media WHERE video_path != ''")}
+        images = {os.path.abspath(row['image_path']) for row in conn.execute("SELECT image_path FROM images WHERE ref_count > 0")}
+    finally:
+        conn.execute("COMMIT")
+    return videos, images
+
+# Files the orphan scan looks at, per folder (.part files are uploads that were never finished)
+ORPHAN_SCAN_FOLDERS = [
+    (GENERATED_FOLDER, ('.mp4',)),
+    (UPLOAD_FOLDER, ALLOWED_UPLOAD_EXTENSIONS + ('.part',))
+]
+
+def find_orphaned_files(grace_seconds=ORPHAN_GRACE_HOURS * 3600):
+    """Find unregistered videos, images and stale upload parts older than the grace period.
+
+    The grace period protects files of jobs that are still running (uploads
+    and renders are only registered once the job finishes). Returns a list
+    of (path, size).
+    """
+    registered_videos, registered_images = get_registered_paths()
+    cutoff = time.time() - grace_seconds
+    orphans = []
+
+    for folder, extensions in ORPHAN_SCAN_FOLDERS:
+        registered = registered_videos if folder == GENERATED_FOLDER else registered_images
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if not entry.name.lower().endswith(extensions) or not entry.is_file():
+                        continue
+                    if os.path.abspath(entry.path) in registered:
+                        continue
+                    stat = entry.stat()
+                    if stat.st_mtime < cutoff:
+                        orphans.append((entry.path, stat.st_size))
+        except FileNotFoundError:
+            continue
+        except OSError as e:
+            logging.error(f"Error scanning {folder}: {e}")
+
+    return orphans
+
+def cleanup_orphaned_files(grace_seconds=ORPHAN_GRACE_HOURS * 3600):
     """Clean up files that exist but are not in registry."""
     logging.info("Starting cleanup of orphaned files")
-    
+
     deleted_count = 0
-    
-    # Clean up orphaned video files in generated folder
-    if os.path.exists(GENERATED_FOLDER):
-        registry = load_media_registry()
-        registered_files = set()
-        
-        # Get all registered file paths
-        for data in registry.values():
-            video_path = data.get('video_path')
-            if video_path:
-                registered_files.add(os.path.abspath(video_path))
-        
-        # Check all files in generated folder
-        try:
-            for filename in os.listdir(GENERATED_FOLDER):
-                if filename.endswith('.mp4'):
-                    file_path = os.path.join(GENERATED_FOLDER, filename)
-                    abs_path = os.path.abspath(file_path)
-                    
-                    if abs_path not in registered_files:
-                        try:
-                            os.remove(file_path)
-                            deleted_count += 1
-                            logging.info(f"Deleted orphaned video file: {filename}")
-                        except Exception as e:
-                            logging.error(f"Error deleting orphaned file {filename}: {e}")
-        except Exception as e:
-            logging.error(f"Error scanning generated folder: {e}")
-    
-    # Clean up orphaned uploaded image files
-    if os.path.exists(UPLOAD_FOLDER):
-        registry = load_media_registry()
-        registered_images = set()
-        
-        # Get all registered image paths
-        for data in registry.values():
-            scenes_data = data.get('scenes_data', [])
-            for scene in scenes_data:
-                image_path = scene.get('image_path')
-                if image_path:
-                    registered_images.add(os.path.abspath(image_path))
-        
-        # Check all files in upload folder
+    for file_path, _ in find_orphaned_files(grace_seconds):
         try:
-            for filename in os.listdir(UPLOAD_FOLDER):
-                if filename.lower().endswith(('.jpg', '.jpeg', '.png', '.gif')):
-                    file_path = os.path.join(UPLOAD_FOLDER, filename)
-                    abs_path = os.path.abspath(file_path)
-                    
-                    if abs_path not in registered_images:
-                        try:
-                            os.remove(file_path)
-                            deleted_count += 1
-                            logging.info(f"Deleted orphaned image file: {filename}")
-                        except Exception as e:
-                            logging.error(f"Error deleting orphaned image file {filename}: {e}")
-        except Exception as e:
-            logging.error(f"Error scanning upload folder: {e}")
-    
+            os.remove(file_path)
+            deleted_count += 1
+            logging.info(f"Deleted orphaned file: {file_path}")
+        except OSError as e:
+            logging.error(f"Error deleting orphaned file {file_path}: {e}")
+
     logging.info(f"Orphaned files cleanup completed. Deleted {deleted_count} files")
-    return deleted_count
\ No newline at end of file
+    return deleted_count
@@ -0,0 +1,228 @@
+import os
+import time
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from .config import (
+    RETENTION_INTERVAL_MINUTES, MEDIA_RETENTION_DAYS, MEDIA_DISK_QUOTA_MB,
+    RETENTION_DELETE_ORPHANS, ORPHAN_GRACE_HOURS, RETENTION_BATCH_SIZE
+)
+from .media_manager import (
+    get_connection, get_stats_counters, delete_media_batch, find_orphaned_files
+)
+from .cache_store import has_expiring_caches, sweep_disk_caches
+
+# ==============================================================================
+# RETENTION POLICIES
+# ==============================================================================
+
+def select_expired_media(days_old):
+    """IDs and sizes of media created more than days_old days ago."""
+    cutoff_date = datetime.now() - timedelta(days=days_old)
+    return [(row['id'], row['file_size'] * row['file_exists']) for row in get_connection().execute(
+        "SELECT id, file_size, file_exists FROM media WHERE created_at != '' AND created_at < ?",
+        (cutoff_date.isoformat(),)
+    )]
+
+def select_quota_evictions(quota_bytes):
+    """Least recently used media to delete so the videos on disk fit in quota_bytes."""
+    excess = get_stats_counters()['total_size'] - quota_bytes
+    if excess <= 0:
+        return []
+
+    evictions = []
+    # Walks idx_media_last_used from the least recently used end, stops once enough is freed
+    for row in get_connection().execute(
+        "SELECT id, file_size FROM media WHERE file_exists = 1 ORDER BY COALESCE(last_accessed, created_at)"
+    ):
+        evictions.append((row['id'], row['file_size']))
+        excess -= row['file_size']
+        if excess <= 0:
+            break
+    return evictions
+
+# ==============================================================================
+# RETENTION WORKER
+# ==============================================================================
+
+class RetentionWorker:
+    """Applies the retention policies on a schedule in a daemon thread.
+
+    Each run deletes media past the age limit, then evicts least recently
+    used videos while the total exceeds the disk quota, then removes
+    unregistered files older than the orphan grace period. Each of these is
+    opt-in. Every run also sweeps expired entries out of the disk caches;
+    with no media policy and no cache TTL the worker is not started.
+    Progress and the outcome of the last run are kept for the metrics
+    endpoint.
+    """
+
+    def __init__(self, interval, retention_days, quota_bytes, delete_orphans, orphan_grace_seconds):
+        self.interval = interval
+        self.retention_days = retention_days
+        self.quota_bytes = quota_bytes
+        self.delete_orphans = delete_orphans
+        self.orphan_grace_seconds = orphan_grace_seconds
+        self.run_lock = threading.Lock()
+        self.state_lock = threading.Lock()
+        self.wake_event = threading.Event()
+        self.stopped = False
+        self.thread = None
+        self.progress = None
+        self.last_run = None
+        self.total_runs = 0
+        self.next_run_at = None
+
+    def get_metrics(self):
+        """Policies, progress of the current run and results of the last one."""
+        with self.state_lock:
+            return {
+                'policies': {
+                    'interval_minutes': self.interval / 60,
+                    'retention_days': self.retention_days,
+                    'disk_quota_mb': self.quota_bytes // (1024 * 1024),
+                    'delete_orphans': self.delete_orphans,
+                    'sweep_caches': has_expiring_caches(),
+                    'orphan_grace_hours': self.orphan_grace_seconds / 3600
+                },
+                'enabled': self.has_policies(),
+                'running': self.progress is not None,
+                'progress': dict(self.progress) if self.progress else None,
+                'last_run': dict(self.last_run) if self.last_run else None,
+                'total_runs': self.total_runs,
+                'next_run_at': self.next_run_at
+            }
+
+    def has_policies(self):
+        """Whether any retention policy is enabled (cache TTLs included)."""
+        return self.retention_days > 0 or self.quota_bytes > 0 or self.delete_orphans or has_expiring_caches()
+
+    def set_progress(self, phase, processed=0, total=0):
+        with self.state_lock:
+            self.progress = {'phase': phase, 'processed': processed, 'total': total}
+
+    def delete_in_batches(self, phase, candidates, result):
+        """Delete (media_id, size) candidates in registry batches, updating progress."""
+        self.set_progress(phase, 0, len(candidates))
+        for start in range(0, len(candidates), RETENTION_BATCH_SIZE):
+            batch = candidates[start:start + RETENTION_BATCH_SIZE]
+            sizes = dict(batch)
+            try:
+                deleted_ids, _, errors = delete_media_batch([media_id for media_id, _ in batch])
+            except sqlite3.Error as e:
+                result['errors'].append(f"{phase}: {e}")
+                break
+
+            result[f'deleted_{phase}'] += len(deleted_ids)
+            result['bytes_freed'] += sum(sizes.get(media_id, 0) for media_id in deleted_ids)
+            result['errors'].extend(errors)
+            self.set_progress(phase, start + len(batch), len(candidates))
+
+    def run_once(self):
+        """Apply all policies once; skipped if a run is already in progress."""
+        if not self.run_lock.acquire(blocking=False):
+            logging.info("Retention run already in progress, skipping")
+            return None
+
+        start_time = time.monotonic()
+        result = {
+            'started_at': datetime.now().isoformat(),
+            'deleted_by_age': 0,
+            'deleted_by_quota': 0,
+            'orphans_deleted': 0,
+            'cache_entries_evicted': 0,
+            'bytes_freed': 0,
+            'errors': []
+        }
+
+        try:
+            if self.retention_days > 0:
+                self.set_progress('by_age')
+                self.delete_in_batches('by_age', select_expired_media(self.retention_days), result)
+
+            if self.quota_bytes > 0:
+                self.set_progress('by_quota')
+                self.delete_in_batches('by_quota', select_quota_evictions(self.quota_bytes), result)
+
+            if self.delete_orphans:
+                self.set_progress('orphans')
+                orphans = find_orphaned_files(self.orphan_grace_seconds)
+                self.set_progress('orphans', 0, len(orphans))
+                for processed, (file_path, size) in enumerate(orphans, start=1):
+                    try:
+                        os.remove(file_path)
+                        result['orphans_deleted'] += 1
+                        result['bytes_freed'] += size
+                    except OSError as e:
+                        result['errors'].append(f"Error deleting orphaned file {file_path}: {e}")
+                    self.set_progress('orphans', processed, len(orphans))
+
+            self.set_progress('caches')
+            result['cache_entries_evicted'] = sweep_disk_caches()
+        except Exception as e:
+            logging.error(f"Retention run failed: {e}")
+            result['errors'].append(str(e))
+        finally:
+            result['finished_at'] = datetime.now().isoformat()
+            result['duration'] = round(time.monotonic() - start_time, 3)
+            with self.state_lock:
+                self.progress = None
+                self.last_run = result
+                self.total_runs += 1
+            self.run_lock.release()
+
+        logging.info(
+            f"Retention run finished in {result['duration']}s: {result['deleted_by_age']} expired, "
+            f"{result['deleted_by_quota']} evicted, {result['orphans_deleted']} orphans, "
+            f"{result['cache_entries_evicted']} cache entries, "
+            f"{result['bytes_freed'] / (1024 * 1024):.1f} MB freed, {len(result['errors'])} errors"
+        )
+        return result
+
+    def start(self):
+        """Start the worker thread (first run happens immediately) if any policy is enabled."""
+        if not self.has_policies():
+            logging.info("No retention policy or cache TTL enabled, retention worker not started")
+            return
+        with self.state_lock:
+            if self.thread and self.thread.is_alive():
+                return
+            self.stopped = False
+            self.thread = threading.Thread(target=self._run, name='media-retention', daemon=True)
+            self.thread.start()
+
+    def trigger(self):
+        """Run the policies now instead of waiting for the next scheduled run."""
+        with self.state_lock:
+            running = self.thread is not None and self.thread.is_alive()
+        if running:
+            self.wake_event.set()
+        else:
+            # Not scheduled: do a one-off pass
+            threading.Thread(target=self.run_once, name='media-retention-once', daemon=True).start()
+
+    def stop(self):
+        self.stopped = True
+        self.wake_event.set()
+
+    def _run(self):
+        while not self.stopped:
+            self.run_once()
+            with self.state_lock:
+                self.next_run_at = (datetime.now() + timedelta(seconds=self.interval)).isoformat()
+            self.wake_event.wait(self.interval)
+            self.wake_event.clear()
+
+# Global retention worker instance
+retention_worker = RetentionWorker(
+    RETENTION_INTERVAL_MINUTES * 60,
+    MEDIA_RETENTION_DAYS,
+    MEDIA_DISK_QUOTA_MB * 1024 * 1024,
+    RETENTION_DELETE_ORPHANS,
+    ORPHAN_GRACE_HOURS * 3600
+)
+
+def get_retention_worker():
+    """Get the global media retention worker."""
+    return retention_worker
@@ -1,37 +1,141 @@
 import os
 import json
+import hashlib
 import logging
+import tempfile
+import threading
 from .config import PROMPTS_FILE
 
+# ==============================================================================
+# PROMPT STORE
+# ==============================================================================
+
+DEFAULT_PROMPTS = {
+    "Expert Narrator": "You are an expert narrator. Describe the following image in a clear, concise, and engaging way for a short explainer video. Focus on the key elements and their meaning.",
+    "Comic Book Style": "You are a classic comic book narrator. Describe this scene with a dramatic and punchy tone. Use onomatopoeia if it fits.",
+    "Simple Explainer": "You are a friendly teacher. Explain what is happening in this image in simple terms that anyone can understand."
+}
+
+class PromptStore:
+    """Process-wide cache of the prompts file.
+
+    The parsed prompts are kept in memory and only re-read when the file's
+    mtime or size changes (e.g. edited by hand). Writers are serialized and
+    replace the file atomically through a temp file, so readers never see a
+    truncated file. Every change bumps the version, and etag identifies the
+    content for conditional requests.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.prompts = None
+        self.signature = None
+        self.version = 0
+        self.etag = None
+
+    def get_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def set_prompts(self, prompts, signature):
+        self.prompts = prompts
+        self.signature = signature
+        self.version += 1
+        # The content hash keeps ETags valid across restarts, which reset the version
+        content = json.dumps(prompts).encode('utf-8')
+        self.etag = hashlib.sha256(content).hexdigest()[:32]
+
+    def refresh(self):
+        """Re-read the file if it changed since it was last loaded or written."""
+        signature = self.get_signature()
+        if self.prompts is not None and signature == self.signature:
+            return
+
+        with self.lock:
+            signature = self.get_signature()
+            if self.prompts is not None and signature == self.signature:
+                return
+
+            if signature is None:
+                # Create default file if it doesn't exist
+                self.write(dict(DEFAULT_PROMPTS))
+                return
+
+            try:
+                with open(self.path, 'r') as f:
+                    prompts = json.load(f)
+            except (json.JSONDecodeError, FileNotFoundError) as e:
+                logging.error(f"Error loading prompts: {e}")
+                prompts = {}
+            self.set_prompts(prompts, signature)
+            logging.info(f"Loaded {len(prompts)} prompts from {self.path} (version {self.version})")
+
+    def get(self):
+        """Get (prompts, version, etag); prompts is a copy the caller may change."""
+        self.refresh()
+        with self.lock:
+            return dict(self.prompts), self.version, self.etag
+
+    def write(self, prompts):
+        """Atomically replace the prompts file and the cached copy."""
+        with self.lock:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(prefix='.prompts_', suffix='.tmp', dir=directory)
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(prompts, f, indent=4)
+                # mkstemp creates owner-only files; keep the usual permissions
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, self.path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self.set_prompts(prompts, self.get_signature())
+
+    def modify(self, change):
+        """Apply change(prompts) to a fresh copy and save it, all under the writer lock.
+
+        change returns an error message to abort without saving, or None.
+        Returns (success, prompts or error message).
+        """
+        with self.lock:
+            self.refresh()
+            prompts = dict(self.prompts)
+            error = change(prompts)
+            if error:
+                return False, error
+            try:
+                self.write(prompts)
+            except Exception as e:
+                logging.error(f"Error saving prompts: {e}")
+                return False, "Failed to save prompts"
+            return True, dict(prompts)
+
+# Global prompt store instance
+prompt_store = PromptStore(PROMPTS_FILE)
+
+def get_prompt_store():
+    """Get the global prompt store."""
+    return prompt_store
+
 # ==============================================================================
 # PROMPT MANAGEMENT FUNCTIONS
 # ==============================================================================
 
 def load_prompts():
-    """Load prompts from JSON file."""
-    if not os.path.exists(PROMPTS_FILE):
-        # Create default file if it doesn't exist
-        default_prompts = {
-            "Expert Narrator": "You are an expert narrator. Describe the following image in a clear, concise, and engaging way for a short explainer video. Focus on the key elements and their meaning.",
-            "Comic Book Style": "You are a classic comic book narrator. Describe this scene with a dramatic and punchy tone. Use onomatopoeia if it fits.",
-            "Simple Explainer": "You are a friendly teacher. Explain what is happening in this image in simple terms that anyone can understand."
-        }
-        with open(PROMPTS_FILE, 'w') as f:
-            json.dump(default_prompts, f, indent=4)
-        return default_prompts
-    
-    try:
-        with open(PROMPTS_FILE, 'r') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError) as e:
-        logging.error(f"Error loading prompts: {e}")
-        return {}
+    """Load prompts (served from the prompt store cache)."""
+    prompts, _, _ = prompt_store.get()
+    return prompts
 
 def save_prompts(prompts_data):
     """Save prompts to JSON file."""
     try:
-        with open(PROMPTS_FILE, 'w') as f:
-            json.dump(prompts_data, f, indent=4)
+        prompt_store.write(dict(prompts_data))
         return True
     except Exception as e:
         logging.error(f"Error saving prompts: {e}")
@@ -41,40 +145,32 @@ def add_prompt(name, text):
     """Add a new prompt."""
     if not name or not text:
         return False, "Name and text are required"
-    
-    prompts = load_prompts()
-    prompts[name] = text
-    
-    if save_prompts(prompts):
-        return True, prompts
-    return False, "Failed to save prompt"
+
+    def change(prompts):
+        prompts[name] = text
+
+    return prompt_store.modify(change)
 
 def delete_prompt(name):
     """Delete a prompt by name."""
     if not name:
         return False, "Name is required"
-    
-    prompts = load_prompts()
-    if name not in prompts:
-        return False, "Prompt not found"
-    
-    del prompts[name]
-    
-    if save_prompts(prompts):
-        return True, prompts
-    return False, "Failed to save prompts"
+
+    def change(prompts):
+        if name not in prompts:
+            return "Prompt not found"
+        del prompts[name]
+
+    return prompt_store.modify(change)
 
 def update_prompt(name, new_text):
     """Update an existing prompt."""
     if not name or not new_text:
         return False, "Name and new text are required"
-    
-    prompts = load_prompts()
-    if name not in prompts:
-        return False, "Prompt not found"
-    
-    prompts[name] = new_text
-    
-    if save_prompts(prompts):
-        return True, prompts
-    return False, "Failed to save prompts"
\ No newline at end of file
+
+    def change(prompts):
+        if name not in prompts:
+            return "Prompt not found"
+        prompts[name] = new_text
+
+    return prompt_store.modify(change)
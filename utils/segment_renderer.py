@@ -0,0 +1,74 @@
+import os
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from .ffmpeg_renderer import run_ffmpeg, write_concat_list
+
+# ==============================================================================
+# PARALLEL SEGMENT RENDERING
+# ==============================================================================
+
+def render_segments_parallel(render_func, tasks, max_workers, use_processes=False, on_done=None, slots=None):
+    """Render scene segments concurrently, returning segment paths in task order.
+
+    render_func must be a top-level function (picklable) that takes one task
+    and returns the segment path, or None on failure. Processes are used for
+    CPU-bound Python rendering (MoviePy); threads are enough when the work
+    happens inside an ffmpeg subprocess. on_done(position, segment_path) is
+    called in this process as each segment finishes, in completion order.
+    slots, if given, is a semaphore shared with other renders (e.g. hardware
+    encoder sessions); each segment holds one slot while it renders.
+    """
+    max_workers = max(1, min(max_workers, len(tasks)))
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+
+    logging.info(f"Rendering {len(tasks)} segments with {max_workers} {'processes' if use_processes else 'threads'}")
+
+    results = [None] * len(tasks)
+
+    if max_workers == 1:
+        for position, task in enumerate(tasks):
+            if slots:
+                with slots:
+                    results[position] = render_func(task)
+            else:
+                results[position] = render_func(task)
+            if on_done:
+                on_done(position, results[position])
+        return results
+
+    with executor_class(max_workers=max_workers) as executor:
+        in_flight = {}
+        next_position = 0
+        while next_position < len(tasks) or in_flight:
+            # Submit while slots are free; block for one only when nothing of ours is running
+            while next_position < len(tasks) and (not slots or slots.acquire(blocking=not in_flight)):
+                future = executor.submit(render_func, tasks[next_position])
+                if slots:
+                    future.add_done_callback(lambda _: slots.release())
+                in_flight[future] = next_position
+                next_position += 1
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                position = in_flight.pop(future)
+                results[position] = future.result()
+                if on_done:
+                    on_done(position, results[position])
+    return results
+
+def concat_segments(segment_paths, output_path, scratch_dir):
+    """Join segments with identical codec parameters using ffmpeg's concat demuxer (no re-encode)."""
+    list_path = os.path.join(scratch_dir, 'segments.txt')
+    write_concat_list(segment_paths, list_path)
+
+    success, stderr = run_ffmpeg([
+        '-f', 'concat', '-safe', '0', '-i', list_path,
+        '-c', 'copy', '-movflags', '+faststart', output_path
+    ])
+
+    if not success:
+        logging.error(f"Failed to concatenate segments: {stderr}")
+        return False
+
+    logging.info(f"Concatenated {len(segment_paths)} segments into {output_path}")
+    return True
@@ -0,0 +1,167 @@
+import os
+import shutil
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from .ai_services import generate_narration, generate_narrations_batch, generate_tts_audio
+from .video_processor import create_video_from_scenes
+from .file_handler import generate_unique_filename
+from .media_manager import register_generated_media
+from .config import SCENE_WORKERS, SCRATCH_FOLDER, NARRATION_BATCH_SIZE
+
+# ==============================================================================
+# VIDEO PIPELINE (RUNS INSIDE A BACKGROUND JOB)
+# ==============================================================================
+
+def get_scene_narration(scene_input, options):
+    """Get narration for one uploaded image based on the selected mode."""
+    mode = options['mode']
+    image_path = scene_input['image_path']
+    image_hash = scene_input.get('image_hash')
+
+    if mode == 'full-ai':
+        return generate_narration(image_path, options['vision_model'], options['system_prompt'], options['language'], image_hash=image_hash)
+    elif mode == 'semi-auto':
+        custom_prompt = scene_input.get('custom_prompt', '')
+        if custom_prompt:
+            custom_system_prompt = f"You are an expert narrator. Use the following context: {custom_prompt}. Describe the image incorporating this context."
+            return generate_narration(image_path, options['vision_model'], custom_system_prompt, options['language'], image_hash=image_hash)
+        logging.warning(f"No custom prompt provided for image {scene_input['index']}")
+        return ""
+    else:  # semi-manual mode
+        return scene_input.get('narration', '')
+
+def narrate_in_batches(job, scene_inputs, options):
+    """Narrate full-AI scenes NARRATION_BATCH_SIZE panels per request.
+
+    Neighbouring panels are described together, which needs fewer vision
+    calls and keeps the story continuous. Yields (scene_input, narration)
+    pairs batch by batch so TTS can start before all batches are done.
+    """
+    for start in range(0, len(scene_inputs), NARRATION_BATCH_SIZE):
+        batch = scene_inputs[start:start + NARRATION_BATCH_SIZE]
+        narrations = generate_narrations_batch(
+            [scene_input['image_path'] for scene_input in batch],
+            options['vision_model'], options['system_prompt'], options['language'],
+            image_hashes=[scene_input.get('image_hash') for scene_input in batch]
+        )
+        job.advance_stage(
+            'narration', step=len(batch), message=f"Narrated images {start + 1}-{start + len(batch)}",
+            scenes=[scene_input['index'] + 1 for scene_input in batch]
+        )
+        yield from zip(batch, narrations)
+
+def process_scene(job, scene_input, options, scratch_dir, narration=None):
+    """Generate narration (unless given) and TTS audio for one scene, or return None if it fails."""
+    i = scene_input['index']
+    if narration is None:
+        narration = get_scene_narration(scene_input, options)
+        job.advance_stage('narration', message=f"Narrated image {i + 1}", scene=i + 1)
+
+    if not narration or narration.startswith("Error:"):
+        logging.warning(f"Skipping scene for {scene_input['filename']} due to narration error: {narration}")
+        job.advance_stage('tts', message=f"Skipped scene {i + 1}", scene=i + 1)
+        return None
+
+    # Generate audio (TTS)
+    audio_path = generate_unique_filename(f"audio_{i}", "mp3", scratch_dir)
+    logging.info(f"Generating TTS audio for scene {i}")
+
+    success = generate_tts_audio(narration, options['voice_model'], audio_path)
+    job.advance_stage('tts', message=f"Voiced scene {i + 1}", scene=i + 1)
+    if not success:
+        logging.warning(f"Skipping scene for {scene_input['filename']} due to audio generation error.")
+        return None
+
+    logging.info(f"Successfully created scene {i}")
+    return {
+        'image_path': scene_input['image_path'],
+        'image_hash': scene_input.get('image_hash'),
+        'narration': narration,
+        'audio_path': audio_path
+    }
+
+def run_video_pipeline(job, options):
+    """Run a video job inside its own scratch directory, removed when the job ends."""
+    os.makedirs(SCRATCH_FOLDER, exist_ok=True)
+    scratch_dir = tempfile.mkdtemp(prefix=f"job_{job.id[:8]}_", dir=SCRATCH_FOLDER)
+    try:
+        return generate_video(job, options, scratch_dir)
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+        logging.info(f"Removed scratch directory {scratch_dir}")
+
+def generate_video(job, options, scratch_dir):
+    """Run narration, TTS, rendering and registration for a video job."""
+    scene_inputs = options['scene_inputs']
+    generated_folder = options['generated_folder']
+
+    # Scenes run concurrently; the shared rate limiters in ai_services keep the
+    # API calls spaced out, so narration of one scene overlaps TTS of another
+    job.start_stage('narration', total=len(scene_inputs), message='Generating narrations')
+    job.start_stage('tts', total=len(scene_inputs), message='Generating narrations and audio')
+    with ThreadPoolExecutor(max_workers=SCENE_WORKERS, thread_name_prefix=f"scene-{job.id[:8]}") as executor:
+        if options['mode'] == 'full-ai' and NARRATION_BATCH_SIZE > 1 and len(scene_inputs) > 1:
+            # Several panels per vision request; each batch's TTS starts as soon as it is narrated
+            futures = [
+                executor.submit(process_scene, job, scene_input, options, scratch_dir, narration)
+                for scene_input, narration in narrate_in_batches(job, scene_inputs, options)
+            ]
+        else:
+            futures = [
+                executor.submit(process_scene, job, scene_input, options, scratch_dir)
+                for scene_input in scene_inputs
+            ]
+        results = [future.result() for future in futures]
+    job.finish_stage('narration')
+    job.finish_stage('tts')
+
+    # Keep the original upload order
+    scenes = [scene for scene in results if scene]
+
+    if not scenes:
+        logging.error("No valid scenes created")
+        return False, "No valid scenes could be created from the uploaded images"
+
+    # Render; completed is the fraction of the render done (scenes composited, frames encoded)
+    job.start_stage('render', total=1, message=f"Rendering video with {len(scenes)} scenes")
+    logging.info(f"Creating video with {len(scenes)} scenes")
+
+    def report_render_progress(message, fraction, **details):
+        job.update_stage('render', round(fraction, 4), message=message, **details)
+
+    video_path = create_video_from_scenes(
+        scenes,
+        generated_folder,
+        resolution=options['resolution'],
+        image_positioning=options['image_positioning'],
+        enable_movement=options['enable_movement'],
+        effect_weights=options['effect_weights'],
+        pause_duration=options['pause_duration'],
+        movement_speed=options['movement_speed'],
+        gpu_acceleration=options['gpu_acceleration'],
+        render_engine=options.get('render_engine', 'moviepy'),
+        scratch_dir=scratch_dir,
+        progress=report_render_progress
+    )
+
+    if not video_path or not os.path.exists(video_path):
+        logging.error("Video creation failed")
+        return False, "Video creation failed"
+    job.finish_stage('render')
+
+    # Register the generated media
+    job.start_stage('register', total=1, message='Registering video')
+    media_id = register_generated_media(video_path, scenes)
+    logging.info(f"Video generated and registered with ID: {media_id}")
+    job.finish_stage('register')
+
+    # Path relative to the 'static' folder, used with url_for('static', filename=...)
+    video_file = f"generated/{os.path.basename(video_path)}"
+
+    return True, {
+        'media_id': media_id,
+        'video_path': video_path,
+        'video_file': video_file,
+        'scenes_count': len(scenes)
+    }
@@ -1,16 +1,32 @@
 import os
+import shutil
 import logging
+import time
 import random
+import tempfile
+from bisect import bisect_right
+from contextlib import contextmanager
+from threading import BoundedSemaphore
+from proglog import ProgressBarLogger
 from moviepy.editor import (
-    ImageClip, AudioFileClip, concatenate_videoclips, vfx, CompositeVideoClip,
-    CompositeAudioClip, AudioClip
+    ImageClip, AudioFileClip, concatenate_videoclips, vfx, VideoClip
 )
 from moviepy.video.fx.all import crop
-from PIL import Image, ImageFilter
+from PIL import Image
 import numpy as np
-from .gpu_detector import get_best_encoder, get_encoder_params, validate_encoder_before_use
+from .gpu_detector import get_best_encoder, get_encoder_params, get_encoder_ffmpeg_args, get_encoder_registry
+from .image_processor import normalize_scene_image
+from .file_handler import generate_unique_filename
+from .ffmpeg_renderer import render_video_with_ffmpeg, get_media_duration
+from .segment_renderer import render_segments_parallel, concat_segments
+from .audio_assembler import assemble_audio_track
+from .cache_store import DiskCache, hash_file, make_cache_key
+from .config import (
+    PARALLEL_SEGMENT_RENDERING, RENDER_WORKERS, HW_ENCODER_MAX_SESSIONS, CACHE_FOLDER, SEGMENT_CACHE_MAX_MB,
+    RENDER_PROGRESS_INTERVAL, SCRATCH_FOLDER
+)
 
-def get_random_effect(weights):
+def get_random_effect(weights, rng=random):
     """Memilih efek acak berdasarkan bobot yang diberikan."""
     if not weights or sum(weights.values()) == 0:
         return 'pan_right'  # Efek default
@@ -18,188 +34,93 @@ def get_random_effect(weights):
     effects = list(weights.keys())
     chances = list(weights.values())
     
-    return random.choices(effects, weights=chances, k=1)[0]
+    return rng.choices(effects, weights=chances, k=1)[0]
 
-def apply_ken_burns_effect(clip, effect_type='pan_right', intensity=0.08):
-    """Menerapkan efek Ken Burns pada klip video dengan implementasi yang diperbaiki berdasarkan script referensi."""
-    w, h = clip.size
-    duration = clip.duration
-    
-    logging.info(f"Applying {effect_type} effect with intensity {intensity} on clip size {w}x{h}")
-    
-    # Faktor zoom untuk efek pan (berdasarkan script referensi)
-    zoom_factor = 1 + intensity * 3  # Konversi intensity ke zoom factor yang lebih besar
+class KenBurnsFrameGenerator:
+    """Generator frame Ken Burns berbasis NumPy dengan jendela crop yang dihitung di awal.
     
-    # Hitung rentang gerak berdasarkan script referensi
-    travel_factor = intensity * 4  # Konversi intensity ke travel factor
+    Gambar diperbesar sekali ke skala maksimum yang dibutuhkan. Setiap frame pan
+    hanyalah slicing array; frame zoom memotong jendela lalu me-resize ke ukuran
+    output dengan resampler cepat.
+    """
     
-    if effect_type in ['pan_right', 'pan_left', 'pan_up', 'pan_down']:
-        # Untuk efek pan, perbesar gambar terlebih dahulu
-        enlarged_clip = clip.resize(zoom_factor)
-        enlarged_w, enlarged_h = enlarged_clip.size
-        
-        # Hitung rentang gerak maksimal
-        max_range_x = max(0, (enlarged_w - w) / 2)
-        max_range_y = max(0, (enlarged_h - h) / 2)
-        
-        # Terapkan travel factor
-        range_x = max_range_x * travel_factor
-        range_y = max_range_y * travel_factor
-        
-        # Posisi tengah
-        center_x = (w - enlarged_w) / 2
-        center_y = (h - enlarged_h) / 2
-        
-        def position_func(t):
-            progress = t / duration
+    def __init__(self, frame, effect_type='pan_right', intensity=0.08, duration=1.0, fps=24):
+        h, w = frame.shape[:2]
+        self.size = (w, h)
+        self.fps = fps
+        self.effect_type = effect_type
+        
+        # Faktor zoom dan travel sama dengan implementasi MoviePy sebelumnya
+        zoom_factor = 1 + intensity * 3
+        travel_factor = intensity * 4
+        
+        # Perbesar gambar sekali saja ke skala maksimum
+        enlarged_w, enlarged_h = int(round(w * zoom_factor)), int(round(h * zoom_factor))
+        self.source = np.asarray(
+            Image.fromarray(frame).resize((enlarged_w, enlarged_h), Image.Resampling.LANCZOS)
+        )
+        
+        n_frames = max(1, int(np.ceil(duration * fps)) + 1)
+        progress = np.linspace(0.0, 1.0, n_frames)
+        
+        center_x = (enlarged_w - w) / 2
+        center_y = (enlarged_h - h) / 2
+        
+        if effect_type in ['zoom_in', 'zoom_out']:
+            # Skala tampilan per frame: 1x -> zoom_factor (zoom_in) atau sebaliknya
+            if effect_type == 'zoom_in':
+                scales = 1 + (zoom_factor - 1) * progress
+            else:
+                scales = zoom_factor - (zoom_factor - 1) * progress
+            crop_w = np.clip(np.round(enlarged_w / scales), 1, enlarged_w)
+            crop_h = np.clip(np.round(enlarged_h / scales), 1, enlarged_h)
+            xs = np.round((enlarged_w - crop_w) / 2)
+            ys = np.round((enlarged_h - crop_h) / 2)
+        else:
+            range_x = center_x * travel_factor
+            range_y = center_y * travel_factor
+            xs = np.full(n_frames, center_x)
+            ys = np.full(n_frames, center_y)
             if effect_type == 'pan_right':
-                return (center_x - range_x * progress, center_y)
+                xs = center_x + range_x * progress
             elif effect_type == 'pan_left':
-                return (center_x + range_x * progress, center_y)
+                xs = center_x - range_x * progress
             elif effect_type == 'pan_up':
-                return (center_x, center_y + range_y * progress)
+                ys = center_y - range_y * progress
             elif effect_type == 'pan_down':
-                return (center_x, center_y - range_y * progress)
-            return ('center', 'center')
-        
-        # Buat composite clip dengan posisi yang berubah
-        result_clip = CompositeVideoClip(
-            [enlarged_clip.set_position(position_func)], 
-            size=(w, h)
-        ).set_duration(duration)
-        
-        return result_clip
-    
-    elif effect_type in ['zoom_in', 'zoom_out']:
-        # Untuk efek zoom, gunakan resize dengan fungsi waktu
-        def resize_func(t):
-            progress = t / duration
-            if effect_type == 'zoom_in':
-                return 1 + intensity * 3 * progress  # Zoom dari 1x ke zoom_factor
-            elif effect_type == 'zoom_out':
-                return zoom_factor - intensity * 3 * progress  # Zoom dari zoom_factor ke 1x
-            return 1
-        
-        # Terapkan resize dengan fungsi waktu dan posisi tengah
-        result_clip = CompositeVideoClip(
-            [clip.resize(resize_func).set_position('center')],
-            size=(w, h)
-        ).set_duration(duration)
-        
-        return result_clip
+                ys = center_y + range_y * progress
+            xs = np.clip(np.round(xs), 0, enlarged_w - w)
+            ys = np.clip(np.round(ys), 0, enlarged_h - h)
+            crop_w = np.full(n_frames, w)
+            crop_h = np.full(n_frames, h)
+        
+        # Jendela crop (x, y, lebar, tinggi) untuk setiap frame
+        self.windows = np.stack([xs, ys, crop_w, crop_h], axis=1).astype(np.int32)
     
-    # Fallback: return original clip
-    return clip
-
-def create_blur_background_with_centered_image(image_path, target_w, target_h, blur_radius=30):
-    """Membuat background blur dengan gambar asli di tengah (mempertahankan aspect ratio)."""
-    try:
-        from PIL import Image, ImageFilter
-        
-        # Buka gambar asli
-        original_image = Image.open(image_path)
-        img_w, img_h = original_image.size
-        
-        logging.info(f"Creating blur background: original {img_w}x{img_h} -> target {target_w}x{target_h}")
-        
-        # 1. Buat background blur dengan resize ke ukuran target (akan terdistorsi)
-        background_image = original_image.resize((target_w, target_h), Image.Resampling.LANCZOS)
-        background_image = background_image.filter(ImageFilter.GaussianBlur(radius=blur_radius))
-        
-        # 2. Hitung ukuran gambar asli yang akan diletakkan di tengah (mempertahankan aspect ratio)
-        img_aspect = img_w / img_h
-        target_aspect = target_w / target_h
-        
-        # Tentukan ukuran gambar foreground agar fit di dalam target tanpa crop
-        if img_aspect > target_aspect:
-            # Gambar lebih lebar, fit berdasarkan lebar target
-            foreground_width = target_w
-            foreground_height = int(target_w / img_aspect)
-        else:
-            # Gambar lebih tinggi, fit berdasarkan tinggi target
-            foreground_height = target_h
-            foreground_width = int(target_h * img_aspect)
-        
-        # Pastikan gambar tidak melebihi batas target
-        if foreground_width > target_w:
-            foreground_width = target_w
-            foreground_height = int(target_w / img_aspect)
-        if foreground_height > target_h:
-            foreground_height = target_h
-            foreground_width = int(target_h * img_aspect)
-        
-        logging.info(f"Foreground size: {foreground_width}x{foreground_height}")
-        
-        # 3. Resize gambar asli untuk foreground (mempertahankan aspect ratio)
-        foreground_image = original_image.resize((foreground_width, foreground_height), Image.Resampling.LANCZOS)
-        
-        # 4. Hitung posisi tengah untuk menempelkan foreground
-        pos_x = (target_w - foreground_width) // 2
-        pos_y = (target_h - foreground_height) // 2
-        
-        logging.info(f"Positioning foreground at: ({pos_x}, {pos_y})")
-        
-        # 5. Tempelkan gambar foreground ke atas background
-        final_image = background_image.copy()
-        final_image.paste(foreground_image, (pos_x, pos_y))
-        
-        # 6. Simpan sebagai file sementara
-        temp_path = image_path.replace('.', '_center_blur.')
-        final_image.save(temp_path, quality=95)
-        
-        logging.info(f"Center blur image created: {temp_path}")
-        return temp_path
-        
-    except Exception as e:
-        logging.error(f"Error creating center blur background: {e}")
-        return image_path  # Return original if blur fails
+    def make_frame(self, t):
+        index = min(int(round(t * self.fps)), len(self.windows) - 1)
+        x, y, crop_w, crop_h = self.windows[index]
+        window = self.source[y:y + crop_h, x:x + crop_w]
+        
+        if (crop_w, crop_h) == self.size:
+            return window
+        return np.asarray(Image.fromarray(window).resize(self.size, Image.Resampling.BILINEAR))
 
-def create_blur_background(image_path, target_w, target_h, blur_radius=30):
-    """Membuat background blur berdasarkan script referensi blur.py (fit to screen)."""
-    try:
-        from PIL import Image, ImageFilter
-        
-        # Buka gambar asli
-        original_image = Image.open(image_path)
-        
-        # Buat background blur dengan resize ke ukuran target
-        background_image = original_image.resize((target_w, target_h), Image.Resampling.LANCZOS)
-        background_image = background_image.filter(ImageFilter.GaussianBlur(radius=blur_radius))
-        
-        # Hitung ukuran foreground (gambar asli) agar pas di tengah
-        img_w, img_h = original_image.size
-        img_aspect = img_w / img_h
-        target_aspect = target_w / target_h
-        
-        if img_aspect > target_aspect:
-            # Gambar lebih lebar, sesuaikan dengan tinggi target
-            foreground_height = target_h
-            foreground_width = int(foreground_height * img_aspect)
-        else:
-            # Gambar lebih tinggi, sesuaikan dengan lebar target
-            foreground_width = target_w
-            foreground_height = int(foreground_width / img_aspect)
-        
-        # Resize gambar asli untuk foreground
-        foreground_image = original_image.resize((foreground_width, foreground_height), Image.Resampling.LANCZOS)
-        
-        # Hitung posisi tengah untuk menempelkan foreground
-        pos_x = (target_w - foreground_width) // 2
-        pos_y = (target_h - foreground_height) // 2
-        
-        # Tempelkan gambar foreground ke atas background
-        final_image = background_image.copy()
-        final_image.paste(foreground_image, (pos_x, pos_y))
-        
-        # Simpan sebagai file sementara
-        temp_path = image_path.replace('.', '_blurred.')
-        final_image.save(temp_path)
-        
-        return temp_path
-        
-    except Exception as e:
-        logging.error(f"Error creating blur background: {e}")
-        return image_path  # Return original if blur fails
+def apply_ken_burns_effect(clip, effect_type='pan_right', intensity=0.08, fps=24):
+    """Menerapkan efek Ken Burns pada klip gambar statis menggunakan KenBurnsFrameGenerator."""
+    w, h = clip.size
+    duration = clip.duration
+    
+    logging.info(f"Applying {effect_type} effect with intensity {intensity} on clip size {w}x{h}")
+    
+    if effect_type not in ['pan_right', 'pan_left', 'pan_up', 'pan_down', 'zoom_in', 'zoom_out']:
+        # Fallback: return original clip
+        return clip
+    
+    # Adegan berupa gambar statis, jadi cukup ambil satu frame
+    frame = clip.get_frame(0).astype(np.uint8)
+    generator = KenBurnsFrameGenerator(frame, effect_type, intensity, duration, fps)
+    return VideoClip(generator.make_frame, duration=duration)
 
 def get_encoder_settings(gpu_acceleration='auto'):
     """Get encoder settings based on GPU acceleration preference with improved AMD support."""
@@ -214,18 +135,10 @@ def get_encoder_settings(gpu_acceleration='auto'):
     try:
         codec, name = encoder_map.get(gpu_acceleration, encoder_map['auto'])()
         
-        # For AMD AMF, use more thorough validation
-        if codec == 'h264_amf':
-            if validate_encoder_before_use(codec):
-                logging.info(f"AMD AMF encoder validated successfully")
-            else:
-                logging.warning(f"AMD AMF encoder validation failed, falling back to CPU")
-                codec, name = 'libx264', 'CPU (libx264)'
-        elif codec != 'libx264':
-            # Test other hardware encoders
-            if not validate_encoder_before_use(codec):
-                logging.warning(f"Selected encoder {codec} failed validation, falling back to CPU")
-                codec, name = 'libx264', 'CPU (libx264)'
+        # Explicitly chosen hardware encoders are checked against the cached probe
+        if codec != 'libx264' and not get_encoder_registry().is_working(codec):
+            logging.warning(f"Selected encoder {codec} failed validation, falling back to CPU")
+            codec, name = 'libx264', 'CPU (libx264)'
         
         params = get_encoder_params(codec)
         logging.info(f"Using video encoder: {name} ({codec})")
@@ -237,265 +150,551 @@ def get_encoder_settings(gpu_acceleration='auto'):
         # Fallback to CPU
         return get_encoder_params('libx264')
 
-def create_video_from_scenes(scenes, output_folder, resolution='9:16', image_positioning='fit_screen', enable_movement=False, effect_weights=None, pause_duration=0.5, movement_speed=8, gpu_acceleration='auto'):
-    """Membuat video dari daftar adegan dengan resolusi HD 720p."""
-    if not scenes:
-        logging.warning("Tidak ada adegan yang diberikan untuk membuat video.")
+# Menggunakan resolusi HD 720p untuk semua rasio
+RESOLUTION_MAP = {
+    '9:16': (720, 1280),   # HD Portrait (720p)
+    '16:9': (1280, 720),   # HD Landscape (720p) 
+    '1:1': (720, 720)      # HD Square (720p)
+}
+
+VIDEO_FPS = 24
+
+# Sesi encoder hardware dibatasi GPU; dibagi oleh semua render (semua job) di proses ini
+HW_ENCODER_SESSIONS = BoundedSemaphore(HW_ENCODER_MAX_SESSIONS)
+
+# Anggaran CPU untuk segmen libx264, juga dibagi oleh semua job agar CPU tidak oversubscribe
+CPU_RENDER_SLOTS = BoundedSemaphore(RENDER_WORKERS)
+
+def get_encoder_session_slots(encoder_params):
+    """Semaphore sesi encoder untuk codec ini, atau None untuk libx264 (tanpa batas)."""
+    return None if encoder_params['codec'] == 'libx264' else HW_ENCODER_SESSIONS
+
+def get_segment_render_slots(encoder_params):
+    """Semaphore yang ditahan setiap segmen selama dirender: sesi GPU atau slot CPU."""
+    return get_encoder_session_slots(encoder_params) or CPU_RENDER_SLOTS
+
+@contextmanager
+def encoder_session(encoder_params):
+    """Menahan satu sesi encoder hardware selama satu proses encoding."""
+    slots = get_encoder_session_slots(encoder_params)
+    if slots is None:
+        yield
+        return
+    with slots:
+        yield
+
+def get_moviepy_write_params(encoder_params, temp_audiofile, logger='bar'):
+    """Menyiapkan parameter write_videofile MoviePy untuk encoder yang dipilih."""
+    write_params = {
+        'codec': encoder_params['codec'],
+        'audio_codec': encoder_params['audio_codec'],
+        'fps': VIDEO_FPS,
+        'logger': logger,
+        'temp_audiofile': temp_audiofile,
+        'remove_temp': True
+    }
+    
+    # Add codec-specific parameters
+    if encoder_params['codec'] in ('libx264', 'h264_nvenc'):
+        write_params['preset'] = encoder_params.get('preset', 'medium')
+    ffmpeg_args = get_encoder_ffmpeg_args(encoder_params)
+    if ffmpeg_args:
+        write_params['ffmpeg_params'] = ffmpeg_args
+    
+    return write_params
+
+# ==============================================================================
+# RENDER PROGRESS
+# ==============================================================================
+
+# Bagian progres render untuk komposisi/encoding adegan; sisanya untuk penggabungan akhir
+RENDER_COMPOSITE_SHARE = 0.95
+
+def ignore_progress(message, fraction, **details):
+    """Callback progres default: progress(message, fraction 0-1, **details)."""
+
+class FrameProgressLogger(ProgressBarLogger):
+    """Logger proglog untuk write_videofile yang meneruskan progres frame ke callback.
+
+    MoviePy memajukan bar 't' setiap kali satu frame dikomposisi dan di-encode;
+    on_frames(done, total) dipanggil paling sering setiap RENDER_PROGRESS_INTERVAL
+    detik, dan selalu setelah frame terakhir.
+    """
+
+    def __init__(self, on_frames, min_interval=RENDER_PROGRESS_INTERVAL):
+        # Bar audio ('chunk') diabaikan dan tidak ada log per frame yang disimpan
+        super().__init__(bars=['t'], ignored_bars='all_others', logged_bars=None)
+        self.on_frames = on_frames
+        self.min_interval = min_interval
+        self.last_report = 0.0
+
+    def bars_callback(self, bar, attr, value, old_value=None):
+        if attr != 'index':
+            return
+        total = self.bars[bar]['total']
+        now = time.monotonic()
+        if not total or (value < total and now - self.last_report < self.min_interval):
+            return
+        self.last_report = now
+        try:
+            self.on_frames(min(value, total), total)
+        except Exception as e:
+            logging.warning(f"Render progress callback failed: {e}")
+
+def plan_scenes(scenes, enable_movement, effect_weights):
+    """Memilih adegan yang valid dan menentukan efek gerak masing-masing sebelum rendering."""
+    planned_scenes = []
+    for i, scene in enumerate(scenes):
+        image_path = scene['image_path']
+        audio_path = scene['audio_path']
+        logging.info(f"Memproses adegan {i}: Gambar='{image_path}', Audio='{audio_path}'")
+        
+        if not os.path.exists(image_path):
+            logging.error(f"File gambar tidak ditemukan: {image_path}")
+            continue
+            
+        if not os.path.exists(audio_path):
+            logging.error(f"File audio tidak ditemukan: {audio_path}")
+            continue
+        
+        image_hash = scene.get('image_hash') or hash_file(image_path)
+        audio_hash = hash_file(audio_path)
+        
+        effect = None
+        if enable_movement and effect_weights:
+            # Seeded per scene so an unchanged scene keeps its effect (and its cached segment) on re-renders
+            seed = make_cache_key(image_hash, audio_hash, sorted(effect_weights.items()))
+            effect = get_random_effect(effect_weights, random.Random(seed))
+        
+        planned_scenes.append({
+            'index': i,
+            'scene': scene,
+            'effect': effect,
+            'image_hash': image_hash,
+            'audio_hash': audio_hash
+        })
+    return planned_scenes
+
+def get_positioning_mode(resolution, image_positioning):
+    """Menentukan mode kanvas: 'center_blur' hanya untuk 16:9, selain itu 'cover'."""
+    return 'center_blur' if resolution == '16:9' and image_positioning == 'center_blur' else 'cover'
+
+def get_scene_duration(planned_scene, pause_duration):
+    """Durasi adegan: panjang narasi ditambah jeda, atau None jika audio tidak terbaca."""
+    try:
+        return get_media_duration(planned_scene['scene']['audio_path']) + pause_duration
+    except Exception as e:
+        logging.error(f"Error reading audio duration for scene {planned_scene['index']}: {e}")
         return None
-        
-    final_clips = []
+
+def build_ffmpeg_scene_spec(planned_scene, resolution, image_positioning, pause_duration, movement_intensity):
+    """Mengubah satu adegan menjadi spesifikasi untuk renderer ffmpeg, atau None jika gagal."""
+    i = planned_scene['index']
+    scene = planned_scene['scene']
     
-    # UPDATED: Menggunakan resolusi HD 720p untuk semua rasio
-    res_map = {
-        '9:16': (720, 1280),   # HD Portrait (720p)
-        '16:9': (1280, 720),   # HD Landscape (720p) 
-        '1:1': (720, 720)      # HD Square (720p)
-    }
-    target_w, target_h = res_map.get(resolution, (720, 1280))
+    total_duration = get_scene_duration(planned_scene, pause_duration)
+    if total_duration is None:
+        return None
     
-    logging.info(f"Creating video with HD 720p resolution: {target_w}x{target_h} ({resolution})")
+    spec = {
+        'image_path': scene['image_path'],
+        'audio_path': scene['audio_path'],
+        'frames': max(1, int(round(total_duration * VIDEO_FPS))),
+        'positioning': get_positioning_mode(resolution, image_positioning)
+    }
     
-    # Convert movement speed from percentage to decimal (8% -> 0.08)
-    movement_intensity = movement_speed / 100.0
-    logging.info(f"Using movement intensity: {movement_intensity} (from speed: {movement_speed}%)")
-    logging.info(f"Image positioning mode: {image_positioning}")
+    if planned_scene['effect']:
+        spec['effect'] = planned_scene['effect']
+        spec['intensity'] = movement_intensity
+        logging.info(f"Menerapkan efek '{spec['effect']}' dengan intensitas {movement_intensity} pada adegan {i}")
     
-    # Get encoder settings
-    encoder_params = get_encoder_settings(gpu_acceleration)
-    logging.info(f"Video encoding settings: {encoder_params}")
+    return spec
 
+def build_scene_clip(planned_scene, target_w, target_h, resolution, image_positioning, pause_duration, movement_intensity):
+    """Membuat klip video MoviePy (tanpa audio) untuk satu adegan, atau None jika gagal.
+
+    Audio disusun terpisah dengan assemble_audio_track, durasi klip sudah
+    mencakup narasi dan jeda.
+    """
+    i = planned_scene['index']
+    image_path = planned_scene['scene']['image_path']
+    
     try:
-        for i, scene in enumerate(scenes):
-            image_path = scene['image_path']
-            audio_path = scene['audio_path']
-            logging.info(f"Memproses adegan {i}: Gambar='{image_path}', Audio='{audio_path}'")
-            
-            if not os.path.exists(image_path):
-                logging.error(f"File gambar tidak ditemukan: {image_path}")
-                continue
-                
-            if not os.path.exists(audio_path):
-                logging.error(f"File audio tidak ditemukan: {audio_path}")
-                continue
+        # Narration length plus the pause; the silence itself is added by ffmpeg
+        total_duration = get_scene_duration(planned_scene, pause_duration)
+        if total_duration is None:
+            return None
+        
+        # Decode the upload once, straight into the final target-size canvas
+        positioning = get_positioning_mode(resolution, image_positioning)
+        logging.info(f"Using '{positioning}' positioning for scene {i} ({resolution}, {image_positioning})")
+        canvas = normalize_scene_image(image_path, target_w, target_h, positioning, planned_scene['image_hash'])
+        final_clip_canvas = ImageClip(canvas).set_duration(total_duration)
 
+        # Apply movement effects if enabled
+        chosen_effect = planned_scene['effect']
+        if chosen_effect:
             try:
-                # Load audio clip and get duration
-                audio_clip = AudioFileClip(audio_path)
-                audio_duration = audio_clip.duration
-                
-                # Add pause duration to total duration
-                total_duration = audio_duration + pause_duration
-                
-                # Create silent pause audio
-                if pause_duration > 0:
-                    silent_pause = AudioClip(lambda t: 0, duration=pause_duration, fps=44100)
-                    final_audio = CompositeAudioClip([audio_clip, silent_pause.set_start(audio_duration)])
-                else:
-                    final_audio = audio_clip
-                
-                # Tentukan path gambar yang akan digunakan
-                working_image_path = image_path
-                temp_files_to_cleanup = []
-                
-                # Process image based on positioning mode and resolution
-                if resolution == '16:9' and image_positioning == 'center_blur':
-                    # Center with blur background mode - FIXED VERSION
-                    logging.info(f"Creating center with blur background for scene {i}")
-                    working_image_path = create_blur_background_with_centered_image(image_path, target_w, target_h)
-                    temp_files_to_cleanup.append(working_image_path)
-                    
-                    # Load the processed image and set it to exact target size
-                    final_clip_canvas = ImageClip(working_image_path).set_duration(total_duration)
-                    # Ensure exact target size
-                    final_clip_canvas = final_clip_canvas.resize((target_w, target_h))
-                    
-                elif resolution == '16:9' and image_positioning == 'fit_screen':
-                    # Fit to screen mode (original behavior)
-                    logging.info(f"Using fit to screen mode for scene {i}")
-                    
-                    # Load dan proses gambar
-                    img_clip = ImageClip(working_image_path).set_duration(total_duration)
-                    
-                    # Get image dimensions
-                    img_w, img_h = img_clip.size
-                    if img_w == 0 or img_h == 0:
-                        logging.error(f"Invalid image dimensions for {working_image_path}: {img_w}x{img_h}")
-                        continue
-                    
-                    img_aspect = img_w / img_h
-                    target_aspect = target_w / target_h
-                    
-                    # Resize image to fit target resolution (may crop)
-                    if img_aspect > target_aspect:
-                        # Image is wider, fit by height (crop sides)
-                        resized_clip = img_clip.resize(height=target_h)
-                    else:
-                        # Image is taller, fit by width (crop top/bottom)
-                        resized_clip = img_clip.resize(width=target_w)
-                    
-                    # Create final composition
-                    final_clip_canvas = CompositeVideoClip(
-                        [resized_clip.set_position("center")], 
-                        size=(target_w, target_h), 
-                        bg_color=(0, 0, 0)
-                    )
-                
-                else:
-                    # Default behavior for 9:16 and other resolutions
-                    logging.info(f"Using default positioning for resolution {resolution}")
-                    
-                    # Load dan proses gambar
-                    img_clip = ImageClip(working_image_path).set_duration(total_duration)
-                    
-                    # Get image dimensions
-                    img_w, img_h = img_clip.size
-                    if img_w == 0 or img_h == 0:
-                        logging.error(f"Invalid image dimensions for {working_image_path}: {img_w}x{img_h}")
-                        continue
-                    
-                    img_aspect = img_w / img_h
-                    target_aspect = target_w / target_h
-                    
-                    # Resize image to fit target resolution
-                    if img_aspect > target_aspect:
-                        # Image is wider, fit by height
-                        resized_clip = img_clip.resize(height=target_h)
-                    else:
-                        # Image is taller, fit by width
-                        resized_clip = img_clip.resize(width=target_w)
-                    
-                    # Create final composition
-                    final_clip_canvas = CompositeVideoClip(
-                        [resized_clip.set_position("center")], 
-                        size=(target_w, target_h), 
-                        bg_color=(0, 0, 0)
-                    )
-
-                # Apply movement effects if enabled
-                if enable_movement and effect_weights:
-                    try:
-                        chosen_effect = get_random_effect(effect_weights)
-                        logging.info(f"Menerapkan efek '{chosen_effect}' dengan intensitas {movement_intensity} pada adegan {i}")
-                        final_clip_canvas = apply_ken_burns_effect(final_clip_canvas, effect_type=chosen_effect, intensity=movement_intensity)
-                    except Exception as e:
-                        logging.warning(f"Failed to apply movement effect for scene {i}: {e}")
-
-                # Set audio and duration
-                final_clip_canvas = final_clip_canvas.set_audio(final_audio).set_duration(total_duration)
-                final_clips.append(final_clip_canvas)
-                
-                logging.info(f"Successfully processed scene {i} with HD 720p resolution")
-                
-                # Clean up temporary files if created
-                for temp_file in temp_files_to_cleanup:
-                    if temp_file != image_path and os.path.exists(temp_file):
-                        try:
-                            os.remove(temp_file)
-                            logging.info(f"Cleaned up temporary file: {temp_file}")
-                        except Exception as cleanup_error:
-                            logging.warning(f"Failed to cleanup temp file {temp_file}: {cleanup_error}")
-                
+                logging.info(f"Menerapkan efek '{chosen_effect}' dengan intensitas {movement_intensity} pada adegan {i}")
+                final_clip_canvas = apply_ken_burns_effect(final_clip_canvas, effect_type=chosen_effect, intensity=movement_intensity)
             except Exception as e:
-                logging.error(f"Error processing scene {i}: {e}")
-                continue
+                logging.warning(f"Failed to apply movement effect for scene {i}: {e}")
+
+        final_clip_canvas = final_clip_canvas.set_duration(total_duration)
+        
+        logging.info(f"Successfully processed scene {i} with HD 720p resolution")
+        
+        return final_clip_canvas
+        
+    except Exception as e:
+        logging.error(f"Error processing scene {i}: {e}")
+        return None
+
+def close_clip(clip):
+    """Menutup klip dan audionya untuk membebaskan memori."""
+    try:
+        if hasattr(clip, 'close'): 
+            clip.close()
+        if hasattr(clip, 'audio') and hasattr(clip.audio, 'close'): 
+            clip.audio.close()
+    except Exception as e:
+        logging.warning(f"Error closing clip: {e}")
+
+def render_segment_file(task, output_path):
+    """Merender satu adegan ke output_path; mengembalikan True bila berhasil."""
+    planned_scene = task['planned_scene']
+    encoder_params = task['encoder_params']
+    target_w, target_h = task['target_size']
+    
+    if task['render_engine'] == 'ffmpeg':
+        spec = build_ffmpeg_scene_spec(
+            planned_scene, task['resolution'], task['image_positioning'],
+            task['pause_duration'], task['movement_intensity']
+        )
+        return bool(spec) and render_video_with_ffmpeg([spec], output_path, target_w, target_h, encoder_params, allow_cpu_fallback=False)
+    
+    clip = build_scene_clip(
+        planned_scene, target_w, target_h, task['resolution'], task['image_positioning'],
+        task['pause_duration'], task['movement_intensity']
+    )
+    if clip is None:
+        return False
+    
+    try:
+        # Narration padded with the pause by ffmpeg, no per-sample Python callbacks
+        audio_path = os.path.join(task['scratch_dir'], f"segment_{planned_scene['index']}_audio.wav")
+        if not assemble_audio_track([(planned_scene['scene']['audio_path'], clip.duration)], audio_path):
+            return False
+        clip = clip.set_audio(AudioFileClip(audio_path))
+        
+        temp_audiofile = os.path.join(task['scratch_dir'], f"segment_{planned_scene['index']}_audio.m4a")
+        # Progres frame hanya tersedia bila segmen dirender di proses ini
+        logger = FrameProgressLogger(task['on_frames']) if task.get('on_frames') else None
+        clip.write_videofile(output_path, **get_moviepy_write_params(encoder_params, temp_audiofile, logger=logger))
+        return True
+    except Exception as e:
+        logging.error(f"Error rendering segment for scene {planned_scene['index']}: {e}")
+        return False
+    finally:
+        close_clip(clip)
+
+def render_scene_segment(task):
+    """Merender satu adegan menjadi segmen video tersendiri (dijalankan di worker pool).
+    
+    Segmen ditulis dengan nama sementara lalu dipindahkan ke segment_path, karena
+    segment_path bisa berupa hard link ke entri cache segmen yang akan ikut tertimpa
+    bila file ditulis ulang di tempat.
+    """
+    base, extension = os.path.splitext(task['segment_path'])
+    partial_path = f"{base}.partial{extension}"
+    try:
+        if not render_segment_file(task, partial_path):
+            return None
+        os.replace(partial_path, task['segment_path'])
+        return task['segment_path']
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+# Bump when segment rendering changes so stale segments are not reused
+SEGMENT_CACHE_VERSION = 2
+
+SEGMENT_CACHE = DiskCache(
+    os.path.join(CACHE_FOLDER, 'segments'),
+    max_bytes=SEGMENT_CACHE_MAX_MB * 1024 * 1024,
+    suffix='.mp4'
+)
+
+def get_segment_cache_key(task):
+    """Fingerprint of everything that affects a rendered scene segment."""
+    planned_scene = task['planned_scene']
+    return make_cache_key(
+        SEGMENT_CACHE_VERSION,
+        planned_scene['image_hash'],
+        planned_scene['audio_hash'],  # Covers narration text and voice
+        planned_scene['effect'],
+        task['render_engine'],
+        task['encoder_params'],
+        task['target_size'],
+        get_positioning_mode(task['resolution'], task['image_positioning']),
+        task['pause_duration'],
+        task['movement_intensity'] if planned_scene['effect'] else None,
+        VIDEO_FPS
+    )
+
+def render_segments_incremental(tasks, max_workers, use_processes, progress=ignore_progress, slots=None):
+    """Mengambil segmen yang tidak berubah dari cache dan hanya merender sisanya."""
+    segment_paths = [None] * len(tasks)
+    pending = []
+    
+    for position, task in enumerate(tasks):
+        task['cache_key'] = get_segment_cache_key(task)
+        if SEGMENT_CACHE.copy_to(task['cache_key'], task['segment_path']):
+            segment_paths[position] = task['segment_path']
+        else:
+            pending.append((position, task))
+    
+    logging.info(f"Segment cache: {len(tasks) - len(pending)} reused, {len(pending)} to render")
+    
+    total = len(tasks)
+    done = total - len(pending)
+    progress(f"Reused {done} cached scenes, compositing {len(pending)}", done / total * RENDER_COMPOSITE_SHARE, scenes=total)
+    
+    if not pending:
+        return segment_paths
+    
+    def on_segment_done(pending_position, segment_path):
+        nonlocal done
+        done += 1
+        position, task = pending[pending_position]
+        if segment_path:
+            SEGMENT_CACHE.put_file(task['cache_key'], segment_path)
+        segment_paths[position] = segment_path
+        progress(
+            f"Composited scene {task['planned_scene']['index'] + 1} ({done}/{total})",
+            done / total * RENDER_COMPOSITE_SHARE, scene=task['planned_scene']['index'] + 1, scenes=total
+        )
+    
+    if not use_processes or min(max_workers, len(pending)) == 1:
+        # Segments rendered in this process can report MoviePy's frame progress as well
+        for _, task in pending:
+            scene_number = task['planned_scene']['index'] + 1
+            
+            def on_frames(frames_done, frames_total, scene_number=scene_number):
+                progress(
+                    f"Compositing scene {scene_number}: frame {frames_done}/{frames_total}",
+                    (done + frames_done / frames_total) / total * RENDER_COMPOSITE_SHARE,
+                    scene=scene_number, scenes=total, frame=frames_done, frames=frames_total
+                )
+            task['on_frames'] = on_frames
+    
+    render_segments_parallel(
+        render_scene_segment, [task for _, task in pending], max_workers, use_processes,
+        on_done=on_segment_done, slots=slots
+    )
+    return segment_paths
+
+def create_video_from_segments(planned_scenes, output_path, scratch_dir, render_engine, encoder_params, progress=ignore_progress, **render_options):
+    """Merender setiap adegan paralel menjadi segmen, lalu menggabungkannya tanpa re-encode."""
+    def build_tasks(params):
+        return [{
+            'planned_scene': planned_scene,
+            'segment_path': os.path.join(scratch_dir, f"segment_{planned_scene['index']:04d}.mp4"),
+            'scratch_dir': scratch_dir,
+            'render_engine': render_engine,
+            'encoder_params': params,
+            **render_options
+        } for planned_scene in planned_scenes]
+    
+    # Segments hold a hardware encoder session or a CPU slot, both counted across all jobs
+    slots = get_segment_render_slots(encoder_params)
+    max_workers = RENDER_WORKERS if encoder_params['codec'] == 'libx264' else min(RENDER_WORKERS, HW_ENCODER_MAX_SESSIONS)
+    use_processes = render_engine != 'ffmpeg'
+    
+    segment_paths = render_segments_incremental(build_tasks(encoder_params), max_workers, use_processes, progress, slots)
+    
+    if not all(segment_paths) and encoder_params['codec'] != 'libx264':
+        # Segments must share codec parameters, so re-render all of them on the CPU
+        logging.warning("Hardware encoding failed for some segments, re-rendering all segments on CPU...")
+        cpu_params = get_encoder_params('libx264')
+        segment_paths = render_segments_incremental(
+            build_tasks(cpu_params), RENDER_WORKERS, use_processes, progress, get_segment_render_slots(cpu_params)
+        )
+    
+    segment_paths = [path for path in segment_paths if path]
+    if not segment_paths:
+        logging.error("Tidak ada segmen yang berhasil dirender. Membatalkan pembuatan video.")
+        return False
+    
+    progress(f"Joining {len(segment_paths)} scene segments", RENDER_COMPOSITE_SHARE)
+    return concat_segments(segment_paths, output_path, scratch_dir)
+
+def render_planned_scenes(planned_scenes, output_path, render_dir, render_engine, encoder_params, target_size, resolution, image_positioning, pause_duration, movement_intensity, progress=None):
+    """Merender adegan yang sudah direncanakan ke output_path; semua file sementara ditulis ke render_dir."""
+    target_w, target_h = target_size
+    
+    if PARALLEL_SEGMENT_RENDERING:
+        # Each scene becomes its own (cached) segment, joined afterwards by stream copy
+        return create_video_from_segments(
+            planned_scenes, output_path, render_dir, render_engine, encoder_params,
+            progress=progress or ignore_progress,
+            target_size=target_size,
+            resolution=resolution,
+            image_positioning=image_positioning,
+            pause_duration=pause_duration,
+            movement_intensity=movement_intensity
+        )
+    
+    if render_engine == 'ffmpeg':
+        # Static-image slideshow rendered by a single ffmpeg filtergraph
+        scene_specs = [
+            spec for spec in (
+                build_ffmpeg_scene_spec(planned_scene, resolution, image_positioning, pause_duration, movement_intensity)
+                for planned_scene in planned_scenes
+            ) if spec
+        ]
+        if progress:
+            progress(f"Rendering {len(scene_specs)} scenes with ffmpeg", 0.0, scenes=len(scene_specs))
+        if not scene_specs:
+            return False
+        with encoder_session(encoder_params):
+            return render_video_with_ffmpeg(scene_specs, output_path, target_w, target_h, encoder_params)
+
+    final_clips = []
+    audio_tracks = []
+    mixed_audio = None
+    try:
+        for planned_scene in planned_scenes:
+            clip = build_scene_clip(
+                planned_scene, target_w, target_h, resolution, image_positioning,
+                pause_duration, movement_intensity
+            )
+            if clip is not None:
+                final_clips.append(clip)
+                audio_tracks.append((planned_scene['scene']['audio_path'], clip.duration))
         
         if not final_clips:
             logging.error("Tidak ada klip yang valid yang dibuat. Membatalkan pembuatan video.")
-            return None
+            return False
 
+        # One pre-mixed narration track for the whole comic
+        audio_path = os.path.join(render_dir, 'audio.wav')
+        if not assemble_audio_track(audio_tracks, audio_path):
+            return False
+        
         logging.info(f"Concatenating {len(final_clips)} clips...")
         final_video = concatenate_videoclips(final_clips, method="compose")
-        
-        # Ensure output directory exists
-        os.makedirs(output_folder, exist_ok=True)
-        output_path = os.path.join(output_folder, "output.mp4")
+        mixed_audio = AudioFileClip(audio_path)
+        final_video = final_video.set_audio(mixed_audio)
         
         logging.info(f"Writing HD 720p video to {output_path} using {encoder_params['codec']}...")
         
         # Prepare encoding parameters with improved AMD AMF support
-        write_params = {
-            'codec': encoder_params['codec'],
-            'audio_codec': encoder_params['audio_codec'],
-            'fps': 24,
-            'logger': 'bar',
-            'temp_audiofile': 'temp-audio.m4a',
-            'remove_temp': True
-        }
-        
-        # Add codec-specific parameters
-        if encoder_params['codec'] == 'libx264':
-            write_params['preset'] = encoder_params.get('preset', 'medium')
-            if 'crf' in encoder_params:
-                write_params['ffmpeg_params'] = ['-crf', str(encoder_params['crf'])]
-        elif encoder_params['codec'] == 'h264_qsv':
-            if 'global_quality' in encoder_params:
-                write_params['ffmpeg_params'] = ['-global_quality', str(encoder_params['global_quality'])]
-        elif encoder_params['codec'] == 'h264_nvenc':
-            write_params['preset'] = encoder_params.get('preset', 'medium')
-            if 'cq' in encoder_params:
-                write_params['ffmpeg_params'] = ['-cq', str(encoder_params['cq'])]
-        elif encoder_params['codec'] == 'h264_amf':
-            # Improved AMD AMF parameters
-            ffmpeg_params = ['-rc', 'cqp']
-            if 'qp_i' in encoder_params:
-                ffmpeg_params.extend(['-qp_i', str(encoder_params['qp_i'])])
-            if 'qp_p' in encoder_params:
-                ffmpeg_params.extend(['-qp_p', str(encoder_params['qp_p'])])
-            if 'qp_b' in encoder_params:
-                ffmpeg_params.extend(['-qp_b', str(encoder_params['qp_b'])])
+        temp_audiofile = os.path.join(render_dir, 'temp-audio.m4a')
+        logger = 'bar'
+        if progress:
+            # Frame progress goes to the job instead of the console bar
+            scene_starts = []
+            elapsed = 0.0
+            for clip in final_clips:
+                scene_starts.append(elapsed)
+                elapsed += clip.duration
             
-            # Add AMD-specific optimizations
-            ffmpeg_params.extend(['-usage', 'transcoding', '-profile:v', 'main'])
-            write_params['ffmpeg_params'] = ffmpeg_params
+            def on_frames(frames_done, frames_total):
+                scene_number = min(bisect_right(scene_starts, frames_done / VIDEO_FPS), len(final_clips))
+                progress(
+                    f"Compositing scene {scene_number}/{len(final_clips)}: frame {frames_done}/{frames_total}",
+                    frames_done / frames_total * RENDER_COMPOSITE_SHARE,
+                    scene=scene_number, scenes=len(final_clips), frame=frames_done, frames=frames_total
+                )
+            logger = FrameProgressLogger(on_frames)
+        write_params = get_moviepy_write_params(encoder_params, temp_audiofile, logger=logger)
         
         try:
-            final_video.write_videofile(output_path, **write_params)
+            with encoder_session(encoder_params):
+                final_video.write_videofile(output_path, **write_params)
             logging.info(f"HD 720p video successfully created using {encoder_params['codec']}: {output_path}")
         except Exception as e:
             logging.error(f"Hardware encoding failed: {e}")
             logging.info("Falling back to CPU encoding...")
             
             # Fallback to CPU encoding
-            fallback_params = {
-                'codec': 'libx264',
-                'audio_codec': 'aac',
-                'fps': 24,
-                'preset': 'medium',
-                'logger': 'bar',
-                'temp_audiofile': 'temp-audio.m4a',
-                'remove_temp': True,
-                'ffmpeg_params': ['-crf', '23']
-            }
+            fallback_params = get_moviepy_write_params(get_encoder_params('libx264'), temp_audiofile, logger=logger)
             
             final_video.write_videofile(output_path, **fallback_params)
             logging.info(f"HD 720p video successfully created using CPU fallback: {output_path}")
         
-        return output_path
+        return True
 
-    except Exception as e:
-        logging.error(f"Terjadi kesalahan saat pemrosesan video: {e}", exc_info=True)
-        return None
     finally:
         # Clean up clips to free memory
         for clip in final_clips:
-            try:
-                if hasattr(clip, 'close'): 
-                    clip.close()
-                if hasattr(clip, 'audio') and hasattr(clip.audio, 'close'): 
-                    clip.audio.close()
-            except Exception as e:
-                logging.warning(f"Error closing clip: {e}")
+            close_clip(clip)
+        if mixed_audio is not None:
+            mixed_audio.close()
+
+def create_video_from_scenes(scenes, output_folder, resolution='9:16', image_positioning='fit_screen', enable_movement=False, effect_weights=None, pause_duration=0.5, movement_speed=8, gpu_acceleration='auto', render_engine='moviepy', scratch_dir=None, progress=None):
+    """Membuat video dari daftar adegan dengan resolusi HD 720p.
+    
+    Setiap pemanggilan menulis ke file output dengan nama unik dan memakai folder
+    kerja sendiri (di dalam scratch_dir bila diberikan), sehingga beberapa render
+    dapat berjalan bersamaan. progress(message, fraction, **details) bila diberikan
+    menerima progres komposisi per adegan dan encoding per frame.
+    """
+    if not scenes:
+        logging.warning("Tidak ada adegan yang diberikan untuk membuat video.")
+        return None
+    
+    target_w, target_h = RESOLUTION_MAP.get(resolution, (720, 1280))
+    
+    logging.info(f"Creating video with HD 720p resolution: {target_w}x{target_h} ({resolution})")
+    
+    # Convert movement speed from percentage to decimal (8% -> 0.08)
+    movement_intensity = movement_speed / 100.0
+    logging.info(f"Using movement intensity: {movement_intensity} (from speed: {movement_speed}%)")
+    logging.info(f"Image positioning mode: {image_positioning}")
+    
+    # Get encoder settings
+    encoder_params = get_encoder_settings(gpu_acceleration)
+    logging.info(f"Video encoding settings: {encoder_params}")
+    
+    planned_scenes = plan_scenes(scenes, enable_movement, effect_weights)
+    if not planned_scenes:
+        logging.error("Tidak ada klip yang valid yang dibuat. Membatalkan pembuatan video.")
+        return None
+    
+    # Ensure output directory exists
+    os.makedirs(output_folder, exist_ok=True)
+    output_path = generate_unique_filename("video", "mp4", output_folder)
+    # Never inside output_folder, which is served publicly
+    if not scratch_dir:
+        os.makedirs(SCRATCH_FOLDER, exist_ok=True)
+    render_dir = tempfile.mkdtemp(prefix='render_', dir=scratch_dir or SCRATCH_FOLDER)
+    
+    try:
+        success = render_planned_scenes(
+            planned_scenes, output_path, render_dir, render_engine, encoder_params,
+            target_size=(target_w, target_h),
+            resolution=resolution,
+            image_positioning=image_positioning,
+            pause_duration=pause_duration,
+            movement_intensity=movement_intensity,
+            progress=progress
+        )
+    except Exception as e:
+        logging.error(f"Terjadi kesalahan saat pemrosesan video: {e}", exc_info=True)
+        success = False
+    finally:
+        shutil.rmtree(render_dir, ignore_errors=True)
+    
+    if not success:
+        # Jangan tinggalkan file output yang setengah jadi
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        return None
+    
+    return output_path
 
-def cleanup_temporary_files(scenes):
-    """Menghapus file audio sementara setelah video dibuat."""
-    for scene in scenes:
-        try:
-            if 'audio_path' in scene and os.path.exists(scene['audio_path']):
-                os.remove(scene['audio_path'])
-                logging.info(f"Cleaned up temporary audio file: {scene['audio_path']}")
-        except Exception as e:
-            logging.warning(f"Tidak dapat menghapus file sementara {scene['audio_path']}: {e}")
-            
 def get_effect_weights(form_data):
     """Mengekstrak bobot efek dari data formulir."""
     weights = {}